@@ -0,0 +1,58 @@
+"""
+Loads the NumPy helpers of the add-on without Blender.
+
+The add-on is a single file importing bpy at the top, so tests compile only
+the requested top-level functions and constants from its source.
+
+"""
+import ast
+import os
+import types
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_PATH = os.path.join(ROOT, "tetrapod-toolkit-addon.py")
+SHEET_PATH = os.path.join(ROOT, "data", "Data Sheet of Salamander Model.csv")
+
+# Stands in for bpy where helpers read tables from files or parse data paths.
+FAKE_BPY = types.SimpleNamespace(
+    data=types.SimpleNamespace(texts={}),
+    path=types.SimpleNamespace(abspath=lambda path: path),
+    utils=types.SimpleNamespace(unescape_identifier=lambda text: text.replace('\\"', '"').replace("\\\\", "\\"))
+)
+
+
+def load_addon(*names):
+    """
+    Returns a namespace with the named top-level functions, classes and constants of the add-on.
+    
+    """
+    with open(ADDON_PATH) as reader:
+        tree = ast.parse(reader.read(), ADDON_PATH)
+    wanted = set(names) | {"Object"}
+    nodes = [
+        node for node in tree.body
+        if (isinstance(node, (ast.FunctionDef, ast.ClassDef)) and node.name in wanted)
+        or (isinstance(node, ast.Assign) and any(getattr(target, "id", None) in wanted for target in node.targets))
+    ]
+    namespace = {"np": np, "bpy": FAKE_BPY}
+    for node in tree.body:
+        # Standard library imports are kept, Blender modules are left out.
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            try:
+                exec(compile(ast.Module([node], type_ignores=[]), ADDON_PATH, "exec"), namespace)
+            except ImportError:
+                pass
+    exec(compile(ast.Module(nodes, type_ignores=[]), ADDON_PATH, "exec"), namespace)
+    missing = wanted - set(namespace)
+    if missing:
+        raise NameError("Not defined in the add-on: " + ", ".join(sorted(missing)))
+    
+    return types.SimpleNamespace(**namespace)
+
+
+@pytest.fixture
+def addon():
+    return load_addon
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class KeyframePoints(list):
+    """
+    Keyframe points of a fake F-curve, read with foreach_get like bpy collections.
+    
+    """
+    def foreach_get(self, prop, values):
+        values[:] = np.ravel([getattr(point, prop) for point in self])
+
+
+class Keyframe:
+    def __init__(self, co, handle_left=None, handle_right=None, interpolation='BEZIER'):
+        self.co = co
+        self.handle_left = handle_left or co
+        self.handle_right = handle_right or co
+        self.interpolation = interpolation
+
+
+class FCurve:
+    def __init__(self, points):
+        self.keyframe_points = KeyframePoints(points)
+        self.modifiers = []
+        self.extrapolation = 'CONSTANT'
+    
+    def evaluate(self, frame):
+        raise AssertionError("evaluated per frame")
+
+
+def load_fcurves(addon):
+    return addon("evaluate_fcurve", "evaluate_bezier", "FCURVE_INTERPOLATIONS")
+
+
+def test_bezier_with_flat_handles(addon):
+    tt = load_fcurves(addon)
+    # Handles at a third of the segment make x linear in t and y a smoothstep.
+    fcurve = FCurve([
+        Keyframe((0.0, 0.0), handle_right=(1.0, 0.0)),
+        Keyframe((3.0, 1.0), handle_left=(2.0, 1.0))
+    ])
+    t = np.array([0.0, 0.25, 0.5, 0.9, 1.0])
+    values = tt.evaluate_fcurve(fcurve, 3.0 * t)
+    np.testing.assert_allclose(values, 3.0 * t ** 2 - 2.0 * t ** 3, atol=1e-6)
+
+
+def test_bezier_with_aligned_handles_is_linear(addon):
+    tt = load_fcurves(addon)
+    fcurve = FCurve([
+        Keyframe((1.0, 2.0), handle_right=(2.0, 4.0)),
+        Keyframe((4.0, 8.0), handle_left=(3.0, 6.0))
+    ])
+    frames = np.linspace(1.0, 4.0, 13)
+    np.testing.assert_allclose(tt.evaluate_fcurve(fcurve, frames), 2.0 * frames, atol=1e-5)
+
+
+def test_mixed_interpolation_and_extrapolation(addon):
+    tt = load_fcurves(addon)
+    fcurve = FCurve([
+        Keyframe((0.0, 1.0), interpolation='CONSTANT'),
+        Keyframe((2.0, 3.0), interpolation='LINEAR'),
+        Keyframe((4.0, 7.0))
+    ])
+    values = tt.evaluate_fcurve(fcurve, [-1.0, 0.0, 1.5, 2.0, 3.0, 4.0, 9.0])
+    np.testing.assert_allclose(values, [1.0, 1.0, 1.0, 3.0, 5.0, 7.0, 7.0])
+
+
+def test_rotation_stats(addon):
+    tt = addon("rotation_stats")
+    frames = np.array([10, 11, 12, 13])
+    rotations = np.array([
+        [[0.0, 5.0, -1.0]],
+        [[2.0, 1.0, -3.0]],
+        [[-4.0, 3.0, 0.0]],
+        [[1.0, 7.0, -2.0]]
+    ])
+    stats = tt.rotation_stats(rotations, frames)
+    np.testing.assert_array_equal(stats.min, [[-4.0, 1.0, -3.0]])
+    np.testing.assert_array_equal(stats.max, [[2.0, 7.0, 0.0]])
+    np.testing.assert_array_equal(stats.range, [[6.0, 6.0, 3.0]])
+    np.testing.assert_allclose(stats.mean, [[-0.25, 4.0, -1.5]])
+    np.testing.assert_array_equal(stats.min_frame, [[12, 11, 11]])
+    np.testing.assert_array_equal(stats.max_frame, [[11, 13, 12]])
+    np.testing.assert_array_equal(stats.travel, [[1.0, 2.0, -1.0]])
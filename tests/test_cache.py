@@ -0,0 +1,141 @@
+import types
+
+import numpy as np
+import pytest
+
+CACHE_FUNCTIONS = (
+    "bone_cache_keys", "hash_fcurves", "hash_rna", "hash_object", "hash_animation_settings",
+    "pose_bone_name_from_path", "BAKE_CACHE_VERSION"
+)
+
+
+class KeyframePoints(list):
+    def foreach_get(self, prop, values):
+        values[:] = np.ravel([getattr(point, prop) for point in self])
+
+
+def struct(**values):
+    """
+    Returns a fake RNA struct whose simple properties are hashed by hash_rna().
+    
+    """
+    properties = [types.SimpleNamespace(identifier=key, is_readonly=False, type='FLOAT') for key in values]
+    return types.SimpleNamespace(bl_rna=types.SimpleNamespace(properties=properties), **values)
+
+
+def fcurve(bone, path, index, values, modifiers=()):
+    points = KeyframePoints(
+        types.SimpleNamespace(co=(frame, value), handle_left=(frame, value), handle_right=(frame, value),
+                              interpolation=1, easing=0)
+        for frame, value in enumerate(values, 1)
+    )
+    return types.SimpleNamespace(
+        data_path='pose.bones["{}"].{}'.format(bone, path), array_index=index, extrapolation='CONSTANT',
+        mute=False, modifiers=list(modifiers), keyframe_points=points
+    )
+
+
+def target_object(constraints=()):
+    return types.SimpleNamespace(
+        name="Target", parent=None, parent_type='OBJECT', parent_bone="", constraints=list(constraints),
+        animation_data=None, matrix_world=np.eye(4).tolist()
+    )
+
+
+def pose_bone(name, parent=None, constraints=()):
+    bone = types.SimpleNamespace(
+        name=name, parent=parent.bone if parent else None, matrix_local=np.eye(4).tolist(), head_local=(0, 0, 0), tail_local=(0, 1, 0), use_connect=False,
+        use_inherit_rotation=True, inherit_scale='FULL', use_local_location=True
+    )
+    return types.SimpleNamespace(
+        name=name, bone=bone, parent=parent, constraints=list(constraints), rotation_mode='XYZ',
+        location=(0, 0, 0), rotation_quaternion=(1, 0, 0, 0), rotation_euler=(0, 0, 0),
+        rotation_axis_angle=(0, 0, 1, 0), scale=(1, 1, 1)
+    )
+
+
+def rig():
+    hip = pose_bone("hip")
+    femur = pose_bone("femur", hip)
+    tail = pose_bone("tail")
+    animation = types.SimpleNamespace(
+        nla_tracks=[], drivers=[], action_influence=1.0, action_blend_type='REPLACE',
+        action_extrapolation='HOLD', action=types.SimpleNamespace(fcurves=[
+            fcurve("hip", "rotation_euler", 0, [0.0, 1.0]),
+            fcurve("femur", "rotation_euler", 2, [0.5, 0.2])
+        ])
+    )
+    armature = types.SimpleNamespace(
+        name="Rig", animation_data=animation, data=types.SimpleNamespace(pose_position='POSE'),
+        pose=types.SimpleNamespace(bones={pb.name: pb for pb in (hip, femur, tail)})
+    )
+    scene = types.SimpleNamespace(render=types.SimpleNamespace(frame_map_old=100, frame_map_new=100))
+    return scene, armature
+
+
+def keys(tt, scene, armature, frame_end=10):
+    return dict(zip(("hip", "femur", "tail"), tt.bone_cache_keys(scene, armature, ["hip", "femur", "tail"], 1, frame_end)))
+
+
+@pytest.fixture
+def tt(addon):
+    return addon(*CACHE_FUNCTIONS)
+
+
+def test_keys_are_stable(tt):
+    scene, armature = rig()
+    first = keys(tt, scene, armature)
+    assert None not in first.values()
+    assert len(set(first.values())) == 3
+    assert keys(tt, *rig()) == first
+
+
+def test_changed_fcurve_invalidates_bone_and_children(tt):
+    scene, armature = rig()
+    before = keys(tt, scene, armature)
+    armature.animation_data.action.fcurves[0].keyframe_points[1].co = (2, 1.5)
+    after = keys(tt, scene, armature)
+    assert after["hip"] != before["hip"]
+    assert after["femur"] != before["femur"]
+    assert after["tail"] == before["tail"]
+
+
+@pytest.mark.parametrize("change", [
+    lambda scene, armature: setattr(armature.data, "pose_position", 'REST'),
+    lambda scene, armature: setattr(scene.render, "frame_map_new", 50),
+    lambda scene, armature: setattr(armature.animation_data, "action_influence", 0.5),
+    lambda scene, armature: setattr(armature.animation_data, "action_blend_type", 'ADD'),
+    lambda scene, armature: setattr(armature.animation_data, "action_extrapolation", 'NOTHING'),
+])
+def test_shared_settings_invalidate_every_bone(tt, change):
+    scene, armature = rig()
+    before = keys(tt, scene, armature)
+    change(scene, armature)
+    after = keys(tt, scene, armature)
+    assert all(after[name] != before[name] for name in before)
+
+
+def test_modifier_settings_are_hashed(tt):
+    scene, armature = rig()
+    modifier = struct(type='NOISE', mute=False, strength=1.0)
+    armature.animation_data.action.fcurves[1].modifiers.append(modifier)
+    before = keys(tt, scene, armature)
+    modifier.strength = 2.0
+    assert keys(tt, scene, armature)["femur"] != before["femur"]
+    modifier.mute = True
+    muted = keys(tt, scene, armature)["femur"]
+    modifier.strength = 3.0
+    assert keys(tt, scene, armature)["femur"] == muted
+
+
+def test_drivers_and_rigged_targets_are_not_cached(tt):
+    scene, armature = rig()
+    target = target_object()
+    armature.pose.bones["tail"].constraints.append(struct(target=target, subtarget="", mute=False))
+    assert keys(tt, scene, armature)["tail"] is not None
+    target.constraints.append(types.SimpleNamespace(mute=False))
+    assert keys(tt, scene, armature)["tail"] is None
+    
+    armature.animation_data.drivers.append(fcurve("hip", "location", 0, []))
+    result = keys(tt, scene, armature)
+    assert result["hip"] is None and result["femur"] is None
@@ -0,0 +1,109 @@
+import types
+
+import numpy as np
+import pytest
+
+
+def pose_bone(name, parent=None, constraints=()):
+    return types.SimpleNamespace(name=name, parent=parent, constraints=list(constraints))
+
+
+def constraint(type, chain_count, use_tail=True, mute=False, influence=1.0):
+    return types.SimpleNamespace(type=type, chain_count=chain_count, use_tail=use_tail, mute=mute, influence=influence)
+
+
+def leg(foot_constraints):
+    hip = pose_bone("hip")
+    femur = pose_bone("femur", hip)
+    crus = pose_bone("crus", femur)
+    foot = pose_bone("foot", crus, foot_constraints)
+    toe = pose_bone("toe", foot)
+    return types.SimpleNamespace(pose=types.SimpleNamespace(bones=[hip, femur, crus, foot, toe]))
+
+
+@pytest.mark.parametrize("ik, chain", [
+    (constraint('IK', 3), {"foot", "crus", "femur"}),
+    (constraint('IK', 0), {"foot", "crus", "femur", "hip"}),
+    (constraint('IK', 2, use_tail=False), {"crus", "femur"}),
+    (constraint('SPLINE_IK', 2), {"foot", "crus"}),
+    (constraint('IK', 3, mute=True), set()),
+    (constraint('IK', 3, influence=0.0), set()),
+    (constraint('COPY_ROTATION', 0), set()),
+])
+def test_ik_chain_bones(addon, ik, chain):
+    tt = addon("ik_chain_bones")
+    assert tt.ik_chain_bones(leg([ik])) == chain
+
+
+def blender_addon():
+    bpy = pytest.importorskip("bpy")
+    import importlib.util
+    from conftest import ADDON_PATH
+    spec = importlib.util.spec_from_file_location("tetrapod_toolkit_addon", ADDON_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return bpy, module
+
+
+def foot_ik_rig(bpy):
+    """
+    Returns an armature with a leg whose foot IK follows an animated target, and an animated tail.
+    
+    """
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    scene = bpy.context.scene
+    data = bpy.data.armatures.new("Leg")
+    armature = bpy.data.objects.new("Leg", data)
+    scene.collection.objects.link(armature)
+    bpy.context.view_layer.objects.active = armature
+    bpy.ops.object.mode_set(mode='EDIT')
+    parent = None
+    for name, head, tail in (
+        ("hip", (0, 0, 3), (0, 0, 2.5)), ("femur", (0, 0, 2.5), (0, 0.1, 1.5)),
+        ("crus", (0, 0.1, 1.5), (0, 0, 0.5)), ("foot", (0, 0, 0.5), (0, -0.4, 0.1)),
+        ("tail", (0, 0, 3), (0, 1, 3)), ("tail_tip", (0, 1, 3), (0, 2, 3))
+    ):
+        bone = data.edit_bones.new(name)
+        bone.head, bone.tail = head, tail
+        if parent is not None and name != "tail":
+            bone.parent = parent
+            bone.use_connect = True
+        parent = bone if name != "foot" else None
+    bpy.ops.object.mode_set(mode='OBJECT')
+    
+    target = bpy.data.objects.new("Target", None)
+    scene.collection.objects.link(target)
+    target.location = (0, -0.2, 0.6)
+    target.keyframe_insert("location", frame=1)
+    target.location = (0, 0.6, 1.0)
+    target.keyframe_insert("location", frame=20)
+    ik = armature.pose.bones["foot"].constraints.new('IK')
+    ik.target = target
+    ik.chain_count = 3
+    tail = armature.pose.bones["tail"]
+    tail.rotation_mode = 'XYZ'
+    for frame, angle in ((1, 0.0), (20, 1.0)):
+        tail.rotation_euler = (0.0, 0.0, angle)
+        tail.keyframe_insert("rotation_euler", frame=frame)
+        # Connected bones ignore their location channels.
+        armature.pose.bones["tail_tip"].location = (0.0, angle, 0.0)
+        armature.pose.bones["tail_tip"].keyframe_insert("location", frame=frame)
+    
+    return scene, armature
+
+
+def test_direct_sampling_matches_frame_set_with_foot_ik():
+    bpy, tt = blender_addon()
+    tt.register()
+    try:
+        scene, armature = foot_ik_rig(bpy)
+        assert tt.direct_sampling_bones(armature) == {"hip", "tail", "tail_tip"}
+        pose_bones = list(armature.pose.bones)
+        scene.measure_direct_sampling = True
+        direct = tt.bake_pose_bones(scene, pose_bones, 1, 20, armature_only=False, use_cache=False)
+        scene.measure_direct_sampling = False
+        sampled = tt.bake_pose_bones(scene, pose_bones, 1, 20, armature_only=False, use_cache=False)
+        np.testing.assert_allclose(direct.matrices, sampled.matrices, atol=1e-5)
+        np.testing.assert_allclose(direct.tails, sampled.tails, atol=1e-5)
+    finally:
+        tt.unregister()
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+GAIT_FUNCTIONS = ("segment_strides", "normalize_cycles", "detect_contacts", "clean_contacts", "true_runs")
+
+
+def walk(cycles=4, stance=12, swing=8, step=1.0):
+    """
+    Returns foot positions shaped (samples, 3) of a foot resting during stance and stepping forward in swing.
+    
+    """
+    positions = []
+    x = 0.0
+    for _ in range(cycles):
+        positions += [(x, 0.0, 0.0)] * stance
+        for i in range(1, swing + 1):
+            positions.append((x + step * i / swing, 0.0, 0.5 * np.sin(np.pi * i / swing)))
+        x += step
+    return np.array(positions)
+
+
+def test_segment_strides(addon):
+    tt = addon(*GAIT_FUNCTIONS)
+    contact = np.tile([False] * 4 + [True] * 6, 4)
+    times = np.arange(len(contact)) / 10.0
+    positions = np.zeros((len(contact), 3))
+    positions[:, 0] = 0.1 * np.arange(len(contact))
+    positions[:, 2] = 5.0
+    strides = tt.segment_strides(contact, positions, times)
+    np.testing.assert_array_equal(strides.start, [4, 14, 24])
+    np.testing.assert_array_equal(strides.end, [14, 24, 34])
+    np.testing.assert_allclose(strides.duration, 1.0)
+    np.testing.assert_allclose(strides.frequency, 1.0)
+    np.testing.assert_allclose(strides.length, 1.0)
+    np.testing.assert_allclose(strides.speed, 1.0)
+    np.testing.assert_allclose(strides.duty_factor, 0.6)
+
+
+def test_segment_strides_without_touchdown(addon):
+    tt = addon(*GAIT_FUNCTIONS)
+    contact = np.ones(10, dtype=bool)
+    strides = tt.segment_strides(contact, np.zeros((10, 3)), np.arange(10.0))
+    assert len(strides.start) == 0 and len(strides.duty_factor) == 0
+
+
+def test_detect_contacts_of_a_walk(addon):
+    tt = addon(*GAIT_FUNCTIONS)
+    positions = walk()
+    times = np.arange(len(positions)) / 20.0
+    contact = tt.detect_contacts(positions[:, None], times)[:, 0]
+    strides = tt.segment_strides(contact, positions, times)
+    # The walk starts in stance, so its strides run from the second touchdown on.
+    np.testing.assert_array_equal(strides.start, [20, 40])
+    np.testing.assert_allclose(strides.duration, 1.0)
+    np.testing.assert_allclose(strides.length, 1.0)
+    np.testing.assert_allclose(strides.duty_factor, 0.6, atol=0.1)
+
+
+def test_normalize_cycles(addon):
+    tt = addon(*GAIT_FUNCTIONS)
+    values = np.arange(40.0)[:, None, None] * np.ones((1, 2, 3))
+    cycles = tt.normalize_cycles(values, np.array([4, 14]), np.array([14, 30]), points=11)
+    assert cycles.shape == (2, 11, 2, 3)
+    np.testing.assert_allclose(cycles[0, :, 0, 0], np.linspace(4.0, 14.0, 11))
+    np.testing.assert_allclose(cycles[1, :, 1, 2], np.linspace(14.0, 30.0, 11))
+    # The last cycle may end on the last sample.
+    np.testing.assert_allclose(tt.normalize_cycles(values, np.array([30]), np.array([39]), 4)[0, -1], 39.0)
@@ -0,0 +1,66 @@
+import types
+
+import numpy as np
+import pytest
+
+from conftest import SHEET_PATH
+
+SHEET_BOUNDS = {
+    "Trunk Bending Lower": (19.5, 57.75, 38.5),
+    "Trunk Bending Middle": (16.425, 49.275, 32.85),
+    "Trunk Bending Top": (16.425, 49.275, 32.85),
+    "Femur: Limb Protraction": (53.1, 159.3, 106.2),
+    "Crus: Limb Protraction": (32.35, 97.05, 64.7),
+    "Pelvic Girdle-Femur": (-55.2, 51.1, np.nan),
+    "Femur-Crus": (108.0, 172.6, np.nan),
+}
+
+
+def test_read_shipped_sheet(addon):
+    tt = addon("read_limit_sheet", "read_table_text", "normalize_label", "LIMIT_LABELS")
+    limits = tt.read_limit_sheet(SHEET_PATH)
+    assert set(limits) == set(SHEET_BOUNDS)
+    for name, (lower, upper, average) in SHEET_BOUNDS.items():
+        limit = limits[name]
+        assert limit.name == name
+        assert limit.axis == 'Z'
+        assert (limit.lower, limit.upper) == pytest.approx((lower, upper))
+        np.testing.assert_allclose(limit.average, average)
+
+
+def test_check_joint_limits(addon):
+    tt = addon("check_joint_limits")
+    frames = np.array([1, 2, 3, 4])
+    angles = np.array([
+        [0.0, 50.0],
+        [12.0, 60.0],
+        [-15.0, 55.0],
+        [5.0, 40.0],
+    ])
+    check = tt.check_joint_limits(frames, angles, [-10.0, 45.0], [10.0, 58.0])
+    np.testing.assert_allclose(check.excess, [[0, 0], [2, 2], [-5, 0], [0, -5]])
+    np.testing.assert_array_equal(check.out_count, [2, 2])
+    np.testing.assert_allclose(check.percent_out, [50.0, 50.0])
+    np.testing.assert_allclose(check.max_over, [2.0, 2.0])
+    np.testing.assert_allclose(check.max_under, [-5.0, -5.0])
+    np.testing.assert_array_equal(check.worst_frame, [3, 4])
+
+
+def test_check_joint_limits_without_frames(addon):
+    tt = addon("check_joint_limits")
+    check = tt.check_joint_limits(np.zeros(0, dtype=int), np.zeros((0, 2)), [0.0, 0.0], [1.0, 1.0])
+    np.testing.assert_array_equal(check.out_count, [0, 0])
+    np.testing.assert_array_equal(check.max_over, [0.0, 0.0])
+
+
+def test_guess_joint_map(addon):
+    tt = addon("guess_joint_map", "name_key")
+    pelvis = types.SimpleNamespace(name="Pelvic_Girdle", parent=None)
+    femur = types.SimpleNamespace(name="femur", parent=pelvis)
+    crus = types.SimpleNamespace(name="Crus", parent=femur)
+    armature = types.SimpleNamespace(data=types.SimpleNamespace(bones=[pelvis, femur, crus]))
+    mapping = tt.guess_joint_map(["Pelvic Girdle-Femur", "Crus: Limb Protraction", "Trunk Bending Lower"], armature)
+    assert [(joint.name, joint.parent, joint.child) for joint in mapping] == [
+        ("Pelvic Girdle-Femur", "Pelvic_Girdle", "femur"),
+        ("Crus: Limb Protraction", "femur", "Crus"),
+    ]
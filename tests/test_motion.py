@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+
+def test_table_floats_marks_empty_cells(addon):
+    tt = addon("table_floats")
+    # Single character cells give the table a dtype too narrow for "nan".
+    table = np.array([["1", "", " "], ["2", "3", "4"]], dtype=str)
+    values = tt.table_floats(table, [1, 2])
+    np.testing.assert_array_equal(np.isnan(values), [[True, True], [False, False]])
+    np.testing.assert_array_equal(values[1], [3.0, 4.0])
+    np.testing.assert_array_equal(tt.table_floats(table, 0), [1.0, 2.0])
+
+
+def interpolation_error(frames, values, kept):
+    """
+    Returns the largest distance of the samples to the linear interpolation of the kept samples.
+    
+    """
+    return np.abs(np.interp(frames, frames[kept], values[kept]) - values).max()
+
+
+def test_decimate_keys_steps(addon):
+    tt = addon("decimate_keys")
+    frames = np.arange(10.0)
+    np.testing.assert_array_equal(tt.decimate_keys(frames, frames, step=1), np.arange(10))
+    np.testing.assert_array_equal(tt.decimate_keys(frames, frames, step=3), [0, 3, 6, 9])
+    np.testing.assert_array_equal(tt.decimate_keys(frames, frames, step=4), [0, 4, 8, 9])
+    assert len(tt.decimate_keys(frames[:0], frames[:0], step=2)) == 0
+
+
+def test_decimate_keys_removes_linear_samples(addon):
+    tt = addon("decimate_keys")
+    frames = np.arange(50.0)
+    values = np.where(frames < 20, frames, 40.0 - frames)
+    np.testing.assert_array_equal(tt.decimate_keys(frames, values, tolerance=1e-6), [0, 20, 49])
+
+
+@pytest.mark.parametrize("tolerance", [0.001, 0.01, 0.1, 0.5])
+def test_decimate_keys_stays_within_tolerance(addon, tolerance):
+    tt = addon("decimate_keys")
+    frames = np.arange(200.0)
+    values = np.sin(frames / 7.0) + 0.3 * np.cos(frames / 3.0)
+    kept = tt.decimate_keys(frames, values, tolerance=tolerance)
+    assert kept[0] == 0 and kept[-1] == len(frames) - 1
+    assert np.all(np.diff(kept) > 0)
+    assert interpolation_error(frames, values, kept) <= tolerance
+    assert len(kept) < len(frames)
+
+
+def test_decimate_keys_tolerance_applies_to_stepped_samples(addon):
+    tt = addon("decimate_keys")
+    frames = np.arange(101.0)
+    values = np.sin(frames / 5.0)
+    stepped = tt.decimate_keys(frames, values, step=2)
+    kept = tt.decimate_keys(frames, values, step=2, tolerance=0.05)
+    assert set(kept) <= set(stepped)
+    assert interpolation_error(frames[stepped], values[stepped], np.searchsorted(stepped, kept)) <= 0.05
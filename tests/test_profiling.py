@@ -0,0 +1,53 @@
+import types
+
+import pytest
+
+
+class Operator:
+    bl_idname = "object.test"
+    
+    def __init__(self, results):
+        self.results = list(results)
+    
+    def as_pointer(self):
+        return id(self)
+    
+    def execute(self, context):
+        return self.results.pop(0)
+
+
+@pytest.fixture
+def tt(addon):
+    tt = addon("profiled", "profiler")
+    tt.profiler.trace = None
+    tt.profiler.owner = None
+    namespace = tt.profiled.__globals__
+    ended = []
+    
+    def begin_trace(name, scene=None):
+        tt.profiler.trace = {"name": name, "calls": 0, "busy_seconds": 0.0}
+    
+    def end_trace(status):
+        ended.append((tt.profiler.trace["name"], tt.profiler.trace["calls"], status))
+        tt.profiler.trace = None
+        tt.profiler.owner = None
+    
+    namespace.update(begin_trace=begin_trace, end_trace=end_trace, profiling_enabled=lambda scene: True)
+    tt.ended = ended
+    return tt
+
+
+def test_trace_ends_only_with_its_operator(tt):
+    context = types.SimpleNamespace(scene=None)
+    export = Operator([{'RUNNING_MODAL'}, {'PASS_THROUGH'}, {'FINISHED'}])
+    export.bl_idname = "object.export"
+    other = Operator([{'FINISHED'}])
+    execute = tt.profiled(Operator.execute)
+    
+    assert execute(export, context) == {'RUNNING_MODAL'}
+    # Another operator finishing while the export runs leaves its trace open.
+    assert execute(other, context) == {'FINISHED'}
+    assert tt.ended == []
+    execute(export, context)
+    execute(export, context)
+    assert tt.ended == [("object.export", 3, 'FINISHED')]
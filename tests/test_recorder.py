@@ -0,0 +1,65 @@
+import types
+
+import numpy as np
+
+RECORDER_FUNCTIONS = (
+    "range_recorder", "record_samples", "recorded_stats", "rotation_stats", "continuous_euler",
+    "matrix_to_euler", "matrix_to_euler_pair", "euler_to_matrix", "EULER_AXES"
+)
+
+
+def start(tt, frame_start, frame_count, bone_count, continuous):
+    recorder = tt.range_recorder
+    recorder.names = ["bone{}".format(j) for j in range(bone_count)]
+    recorder.frame_start = frame_start
+    recorder.frame_end = frame_start + frame_count - 1
+    recorder.settings = types.SimpleNamespace(space='ARMATURE', order='XYZ', continuous=continuous)
+    recorder.seen = np.zeros(frame_count, dtype=bool)
+    recorder.matrices = np.zeros((frame_count, bone_count, 3, 3), dtype=np.float32)
+    recorder.locations = np.zeros((frame_count, bone_count, 3))
+    return recorder
+
+
+def motion(frame_count):
+    t = np.linspace(0.0, 1.0, frame_count)
+    # The second bone turns past 180 degrees, where wrapped and continuous angles differ.
+    angles = np.stack([
+        np.stack([0.3 * np.sin(5.0 * t), 0.2 * t, 0.5 * t], axis=-1),
+        np.stack([0.1 * t, -0.2 * t, np.radians(300.0) * t], axis=-1)
+    ], axis=1)
+    locations = np.stack([np.stack([t, 2.0 * t, 0.0 * t], axis=-1)] * 2, axis=1)
+    return angles, locations
+
+
+def test_recording_out_of_order_matches_bake(addon):
+    tt = addon(*RECORDER_FUNCTIONS)
+    frames = np.arange(10, 70)
+    angles, locations = motion(len(frames))
+    matrices = tt.euler_to_matrix(angles, 'XYZ')
+    start(tt, 10, len(frames), 2, continuous=True)
+    order = np.random.default_rng(4).permutation(len(frames))
+    for chunk in np.array_split(order, 7):
+        tt.record_samples(frames[chunk], matrices[chunk], locations[chunk])
+    # Frames already seen and frames outside the range are ignored.
+    tt.record_samples(np.array([5, 10, 80]), np.zeros((3, 2, 3, 3)), np.full((3, 2, 3), 9.0))
+    
+    stats = tt.recorded_stats()
+    expected = tt.rotation_stats(np.degrees(angles), frames)
+    for key in ("min", "max", "mean", "range", "min_frame", "max_frame", "travel"):
+        np.testing.assert_allclose(getattr(stats, key), getattr(expected, key), atol=1e-4)
+    assert stats.max[1, 2] > 180.0
+    np.testing.assert_allclose(stats.loc_change, locations[-1] - locations[0])
+
+
+def test_partial_recording_has_no_travel(addon):
+    tt = addon(*RECORDER_FUNCTIONS)
+    frames = np.arange(1, 21)
+    angles, locations = motion(len(frames))
+    start(tt, 1, len(frames), 2, continuous=False)
+    matrices = tt.euler_to_matrix(angles[:-1], 'XYZ')
+    tt.record_samples(frames[:-1], matrices, locations[:-1])
+    stats = tt.recorded_stats()
+    # Without continuity, angles wrap at 180 degrees.
+    np.testing.assert_allclose(stats.min, np.degrees(tt.matrix_to_euler(matrices, 'XYZ')).min(axis=0), atol=1e-4)
+    assert stats.max[1, 2] < 180.0
+    assert np.all(np.isnan(stats.travel)) and np.all(np.isnan(stats.loc_change))
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+
+def random_quaternions(count, seed=0):
+    quaternions = np.random.default_rng(seed).normal(size=(count, 4))
+    return quaternions / np.linalg.norm(quaternions, axis=1, keepdims=True)
+
+
+def test_quaternion_round_trip(addon):
+    tt = addon("matrix_to_quaternion", "quaternion_to_matrix")
+    quaternions = random_quaternions(1000)
+    quaternions *= np.sign(quaternions[:, :1])
+    result = tt.matrix_to_quaternion(tt.quaternion_to_matrix(quaternions))
+    assert np.all(result[:, 0] >= 0.0)
+    np.testing.assert_allclose(result, quaternions, atol=1e-12)
+
+
+def test_quaternion_half_turns(addon):
+    tt = addon("matrix_to_quaternion", "quaternion_to_matrix")
+    axes = np.array([(1, -1, 0), (1, 1, 0), (0, 1, -1), (1, 0, -1), (1, 1, 1), (1, 0, 0), (0, 1, 0), (0, 0, 1)], dtype=np.float64)
+    axes /= np.linalg.norm(axes, axis=1, keepdims=True)
+    matrices = 2.0 * axes[:, :, None] * axes[:, None, :] - np.eye(3)
+    result = tt.matrix_to_quaternion(matrices)
+    np.testing.assert_allclose(tt.quaternion_to_matrix(result), matrices, atol=1e-12)
+    np.testing.assert_allclose(np.abs(result[:, 1:]), np.abs(axes), atol=1e-12)
+
+
+EULER_FUNCTIONS = ("matrix_to_euler", "matrix_to_euler_pair", "euler_to_matrix", "EULER_AXES")
+
+
+@pytest.mark.parametrize("order", ["XYZ", "XZY", "YXZ", "YZX", "ZXY", "ZYX"])
+def test_euler_round_trip(addon, order):
+    tt = addon(*EULER_FUNCTIONS)
+    rng = np.random.default_rng(1)
+    # Within a quarter turn the angles are the solution with the smallest angles.
+    angles = rng.uniform(-0.49 * np.pi, 0.49 * np.pi, size=(500, 3))
+    matrices = tt.euler_to_matrix(angles, order)
+    np.testing.assert_allclose(tt.matrix_to_euler(matrices, order), angles, atol=1e-9)
+
+
+@pytest.mark.parametrize("order", ["XYZ", "ZXY"])
+def test_euler_matches_quaternion_matrix(addon, order):
+    tt = addon("quaternion_to_matrix", "matrix_to_quaternion", *EULER_FUNCTIONS)
+    matrices = tt.quaternion_to_matrix(random_quaternions(200, seed=2))
+    angles = tt.matrix_to_euler(matrices, order)
+    np.testing.assert_allclose(tt.euler_to_matrix(angles, order), matrices, atol=1e-9)
+
+
+def test_continuous_euler_across_chunks(addon):
+    tt = addon("continuous_euler", *EULER_FUNCTIONS)
+    frames = np.linspace(0.0, 1.0, 200)
+    # Turns more than once about Z, so wrapped angles would jump.
+    angles = np.stack([0.2 * np.sin(6.0 * frames), 0.3 * frames, np.radians(400.0) * frames], axis=-1)
+    matrices = tt.euler_to_matrix(angles, 'XYZ')
+    whole = tt.continuous_euler(matrices, 'XYZ')
+    np.testing.assert_allclose(whole, angles, atol=1e-9)
+    first = tt.continuous_euler(matrices[:77], 'XYZ')
+    second = tt.continuous_euler(matrices[77:], 'XYZ', first[-1])
+    np.testing.assert_allclose(np.concatenate((first, second)), whole, atol=1e-12)
+
+
+def test_continuous_quaternions_across_chunks(addon):
+    tt = addon("continuous_quaternions")
+    angles = np.linspace(0.0, 3.0 * np.pi, 120)
+    quaternions = np.stack([np.cos(angles / 2), np.sin(angles / 2), 0.0 * angles, 0.0 * angles], axis=-1)
+    flipped = quaternions * np.where(np.random.default_rng(3).random(len(angles)) < 0.5, -1.0, 1.0)[:, None]
+    whole = tt.continuous_quaternions(flipped)
+    np.testing.assert_allclose(whole, quaternions * np.sign(flipped[0, 0] / quaternions[0, 0]), atol=1e-12)
+    first = tt.continuous_quaternions(flipped[:50])
+    second = tt.continuous_quaternions(flipped[50:], first[-1])
+    np.testing.assert_allclose(np.concatenate((first, second)), whole, atol=1e-12)
@@ -0,0 +1,92 @@
+import json
+import types
+
+import pytest
+
+from conftest import SHEET_PATH
+
+SWEEP_FUNCTIONS = (
+    "read_sweep_grid", "read_limit_sheet", "read_table_text", "normalize_label", "LIMIT_LABELS", "SWEEP_LEVELS"
+)
+
+
+def write_grid(tmp_path, grid):
+    path = tmp_path / "grid.json"
+    path.write_text(json.dumps(grid))
+    return str(path)
+
+
+def test_sheet_joint_amplitudes(addon, tmp_path):
+    tt = addon(*SWEEP_FUNCTIONS)
+    limits = tt.read_limit_sheet(SHEET_PATH)
+    path = write_grid(tmp_path, [
+        {"bones": "Femur*", "axis": "Z", "sheet_joint": "Femur: Limb Protraction"},
+        {"bones": "Trunk*", "amplitude": [0.5, 2], "offset": [0, 10]}
+    ])
+    femur, trunk = tt.read_sweep_grid(path, limits)
+    assert femur.amplitudes == pytest.approx([53.1 / 106.2, 1.0, 159.3 / 106.2])
+    assert femur.offsets == [0.0]
+    assert femur.name == "Femur*:Z"
+    assert trunk.amplitudes == [0.5, 2.0]
+    assert trunk.offsets == [0.0, 10.0]
+
+
+@pytest.mark.parametrize("joint", ["Pelvic Girdle-Femur", "Femur-Crus"])
+def test_sheet_joint_without_levels(addon, tmp_path, joint):
+    tt = addon(*SWEEP_FUNCTIONS)
+    path = write_grid(tmp_path, {"parameters": [{"bones": "Femur", "sheet_joint": joint}]})
+    with pytest.raises(ValueError, match=joint):
+        tt.read_sweep_grid(path, tt.read_limit_sheet(SHEET_PATH))
+
+
+def test_sheet_joint_missing(addon, tmp_path):
+    tt = addon(*SWEEP_FUNCTIONS)
+    path = write_grid(tmp_path, [{"bones": "Femur", "sheet_joint": "Tail"}])
+    with pytest.raises(KeyError):
+        tt.read_sweep_grid(path, tt.read_limit_sheet(SHEET_PATH))
+
+
+def armature(bone_names, fcurves):
+    action = types.SimpleNamespace(fcurves=[
+        types.SimpleNamespace(data_path=path, array_index=index, keyframe_points=[None]) for path, index in fcurves
+    ])
+    return types.SimpleNamespace(
+        name="Rig",
+        pose=types.SimpleNamespace(bones=[types.SimpleNamespace(name=name) for name in bone_names]),
+        animation_data=types.SimpleNamespace(action=action)
+    )
+
+
+def parameter(name, bones, axis=None, amplitudes=(1.0,), offsets=(0.0,)):
+    return types.SimpleNamespace(name=name, bones=bones, axis=axis, amplitudes=list(amplitudes), offsets=list(offsets))
+
+
+def test_unmatched_sweep_parameters(addon):
+    tt = addon("unmatched_sweep_parameters", "sweep_channels", "match_names", "pose_bone_name_from_path")
+    rig = armature(["Femur", "Crus", "Trunk"], [
+        ('pose.bones["Femur"].rotation_euler', 2),
+        ('pose.bones["Crus"].rotation_quaternion', 1),
+        ('pose.bones["Trunk"].rotation_euler', 0)
+    ])
+    parameters = [
+        parameter("femur z", "Femur", "Z"),
+        parameter("femur x", "Femur", "X"),
+        parameter("crus", "Crus"),
+        parameter("trunk", "Tr*"),
+        parameter("tail", "Tail*")
+    ]
+    assert tt.unmatched_sweep_parameters(rig, parameters) == ["femur x", "crus", "tail"]
+
+
+def test_sweep_variants_compose_scalings(addon):
+    tt = addon("sweep_variants", "sweep_channels", "match_names")
+    rig = armature(["Femur", "Crus"], [])
+    variants = tt.sweep_variants(rig, [
+        parameter("legs", "Femur,Crus", "Z", amplitudes=[1.0, 2.0]),
+        parameter("femur", "Femur", "Z", amplitudes=[1.0, 0.5], offsets=[5.0])
+    ])
+    assert len(variants) == 4
+    scalings = [variant.scalings for variant in variants]
+    assert scalings[0] == [("Femur", 2, 1.0, 5.0)]
+    assert scalings[3] == [("Crus", 2, 2.0, 0.0), ("Femur", 2, 1.0, 5.0)]
+    assert len({variant.key for variant in variants}) == 4
@@ -0,0 +1,58 @@
+import numpy as np
+
+WEIGHT_FUNCTIONS = ("distance_weights", "candidate_bones", "segment_distances")
+
+
+def chain(count=6):
+    """
+    Returns the heads and tails of count bones laid end to end along x.
+    
+    """
+    heads = np.zeros((count, 3))
+    heads[:, 0] = np.arange(count)
+    tails = heads + (1.0, 0.0, 0.0)
+    return heads, tails
+
+
+def test_segment_distances(addon):
+    tt = addon(*WEIGHT_FUNCTIONS)
+    heads = np.array([[0.0, 0.0, 0.0], [0.0, 0.0, 0.0]])
+    tails = np.array([[2.0, 0.0, 0.0], [0.0, 0.0, 0.0]])
+    points = np.array([[1.0, 1.0, 0.0], [-3.0, 0.0, 4.0], [5.0, 0.0, 0.0]])
+    np.testing.assert_allclose(tt.segment_distances(points, heads, tails), [[1.0, np.sqrt(2.0)], [5.0, 5.0], [3.0, 5.0]])
+
+
+def test_distance_weights(addon):
+    tt = addon(*WEIGHT_FUNCTIONS)
+    heads, tails = chain()
+    points = np.random.default_rng(0).uniform((-1.0, -1.0, -1.0), (7.0, 1.0, 1.0), (500, 3))
+    indices, weights = tt.distance_weights(points, heads, tails, bone_count=3)
+    assert indices.shape == weights.shape == (500, 3)
+    np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+    assert np.all(weights > 0.0)
+    distances = tt.segment_distances(points, heads, tails)
+    nearest = indices[np.arange(500), weights.argmax(axis=1)]
+    np.testing.assert_allclose(distances[np.arange(500), nearest], distances.min(axis=1))
+    chosen = np.take_along_axis(distances, indices, axis=1).max(axis=1)
+    assert np.all(chosen <= np.partition(distances, 2, axis=1)[:, 2] + 1e-12)
+
+
+def test_distance_weights_chunks(addon):
+    tt = addon(*WEIGHT_FUNCTIONS)
+    heads, tails = chain(10)
+    points = np.random.default_rng(1).uniform((-2.0, -2.0, -2.0), (12.0, 2.0, 2.0), (301, 3))
+    indices, weights = tt.distance_weights(points, heads, tails)
+    chunked_indices, chunked_weights = tt.distance_weights(points, heads, tails, chunk_size=17)
+    np.testing.assert_array_equal(np.sort(chunked_indices, axis=1), np.sort(indices, axis=1))
+    np.testing.assert_allclose(np.sort(chunked_weights, axis=1), np.sort(weights, axis=1))
+
+
+def test_distance_weights_few_bones(addon):
+    tt = addon(*WEIGHT_FUNCTIONS)
+    heads, tails = chain(2)
+    indices, weights = tt.distance_weights(np.array([[0.5, 0.5, 0.0]]), heads, tails, bone_count=4)
+    assert indices.shape == (1, 2)
+    np.testing.assert_array_equal(np.sort(indices, axis=1), [[0, 1]])
+    assert indices[0, weights[0].argmax()] == 0
+    indices, weights = tt.distance_weights(np.zeros((0, 3)), heads, tails)
+    assert indices.shape == weights.shape == (0, 2)
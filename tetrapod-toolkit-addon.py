@@ -12,10 +12,28 @@ bl_info = {
 
 import bpy
 import os
+import sys
 import csv
+import json
 import bmesh
 from math import degrees
 import mathutils
+from mathutils.bvhtree import BVHTree
+from bpy.app.handlers import persistent
+import numpy as np
+import time
+import argparse
+import hashlib
+import fnmatch
+import shutil
+import subprocess
+import tempfile
+import io
+import itertools
+import platform
+import functools
+import tracemalloc
+from contextlib import contextmanager, nullcontext
 
 # Allows for initialization of empty objects.
 class Object(object):
@@ -24,8 +42,11 @@ class Object(object):
 
 ### Functions ###
 def get_timecode(scene):
-    fps = scene.render.fps
-    totalFrames = scene.frame_current
+    return format_timecode(scene.frame_current, scene.render.fps)
+
+
+def format_timecode(frame, fps):
+    totalFrames = frame
 
     hours = int((totalFrames / fps) / 3600)
     if hours >= 1:
@@ -49,63 +70,53 @@ def get_timecode(scene):
     return timecode_hours + ':' + timecode_minutes + ':' + timecode_seconds
         
 
-def write_pb_rot_in_range_csv(scene, path):
-    min_x = None
-    max_x = None
-    min_y = None
-    max_y = None
-    min_z = None
-    max_z = None
-    with open(path, mode='a') as writer:
-        writer = csv.DictWriter(writer, ['frame', 'timecode', 'name', 'X', 'Y', 'Z', 'min', 'max']) 
-        writer.writeheader()
-        
-        frame_count = scene.measure_end_frame - scene.measure_start_frame
-        for frame in range(frame_count):
-            scene.frame_set(frame + 1)
-            for pb in bpy.context.selected_pose_bones_from_active_object:
-                pb_mw = pb.matrix
-                pb_rot = pb_mw.to_euler()
-                xrot = degrees(pb_rot.x)
-                yrot = degrees(pb_rot.y)
-                zrot = degrees(pb_rot.z)
-                rot = current_bone_rot(scene, frame)
-                # X axis
-                if max_x == None or rot.to_euler().x >= max_x:
-                    max_x = rot.to_euler().x
-                if min_x == None or rot.to_euler().x <= min_x:
-                    min_x = rot.to_euler().x
-                
-                # Y axis
-                if max_y == None or rot.to_euler().y >= max_y:
-                    max_y = rot.to_euler().y
-                if min_y == None or rot.to_euler().z <= min_z:
-                    min_y = rot.to_euler().y
-                    
-                # Z axis
-                if max_z == None or rot.to_euler().z >= max_z:
-                    max_z = rot.to_euler().z
-                if min_z == None or rot.to_euler().z <= min_z:
-                    min_z = rot.to_euler().z
-                        
-                pb_rot = Object()
-                pb_rot.min = degrees(min_x), degrees(min_y), degrees(min_z)
-                pb_rot.max = degrees(max_x), degrees(max_y), degrees(max_z)
-                row = {
-                    "frame": scene.frame_current,
-                    "timecode": get_timecode(scene),
-                    "name": pb.name,
-                    "X": "{:.3f}".format(xrot),
-                    "Y": "{:.3f}".format(yrot),
-                    "Z": "{:.3f}".format(zrot),
-                    'min': pb_rot.min,
-                    'max': pb_rot.max
-                }
-                writer.writerow(row)
+ROT_CSV_HEADER = ['frame', 'timecode', 'name', 'X', 'Y', 'Z', 'min', 'max']
+
+
+def write_pb_rot_in_range_csv(scene, path, bake=None):
+    if bake is None:
+        bake = bake_pose_bones(
+            scene,
+            pose_bones_to_bake(bpy.context),
+            scene.measure_start_frame,
+            scene.measure_end_frame
+        )
+    with profile_phase("convert"):
+        rotations = bake_rotations(bake)
+        rot_min = rot_max = rotations
+        if bake.names and len(bake.frames):
+            stats = rotation_stats(rotations, bake.frames)
+            rot_min = stats.min
+            rot_max = stats.max
+
+    with profile_phase("write"), open(path, mode='a') as writer:
+        writer = csv.writer(writer)
+        writer.writerow(ROT_CSV_HEADER)
+        writer.writerows(profile_iter("format", iter_rot_csv_rows(
+            bake.frames, bake.fps, bake.names, rotations, rot_min, rot_max
+        )))
+
+
+def iter_rot_csv_rows(frames, fps, names, rotations, rot_min, rot_max):
+    """
+    Yields the CSV rows of rotations shaped (frames, bones, 3) one frame at a time.
+    
+    rot_min and rot_max are either per bone (bones, 3) or per row (frames, bones, 3).
+    
+    """
+    rot_min = np.broadcast_to(rot_min, rotations.shape)
+    rot_max = np.broadcast_to(rot_max, rotations.shape)
+    for i, frame in enumerate(frames):
+        timecode = format_timecode(frame, fps)
+        formatted = np.char.mod("%.3f", rotations[i]).tolist()
+        frame_min = rot_min[i].tolist()
+        frame_max = rot_max[i].tolist()
+        for j, name in enumerate(names):
+            yield (frame.item(), timecode, name, *formatted[j], tuple(frame_min[j]), tuple(frame_max[j]))
 
 
 def write_pb_rot_csv(scene, path):
-    with open(path, mode='a') as writer:
+    with profile_phase("write"), open(path, mode='a') as writer:
         writer = csv.DictWriter(writer, ['frame', 'timecode', 'name', 'X', 'Y', 'Z']) 
         writer.writeheader()
         
@@ -126,6 +137,358 @@ def write_pb_rot_csv(scene, path):
             writer.writerow(row)
 
 
+def bake_columns(bake, settings=None, start=0, stop=None, previous=None):
+    """
+    Returns the rotation, location and quaternion columns of bake frame indices start up to stop.
+    
+    Each column is shaped (frames, bones, components). Locations are in
+    armature space, rotations follow the angle settings. previous holds the
+    columns of the frames before start, to keep continuous angles across chunks.
+    
+    """
+    if settings is None:
+        settings = angle_settings()
+    rotation_matrices = bake_rotation_matrices(bake, settings.space, start, stop)
+    return matrix_columns(
+        bake.matrices[start:stop], rotation_matrices, settings.order, settings.continuous, previous
+    )
+
+
+def matrix_columns(matrices, rotation_matrices=None, order='XYZ', continuous=False, previous=None):
+    """
+    Returns rotation, location and quaternion columns for matrices shaped (frames, bones, 4, 4).
+    
+    Rotations come from rotation_matrices if given, e.g. parent-relative
+    joint matrices. With continuous, angles are unwrapped and quaternion signs
+    kept consistent, continuing from the last frame of previous columns.
+    
+    """
+    if rotation_matrices is None:
+        rotation_matrices = matrices
+    with profile_phase("convert"):
+        if continuous:
+            has_previous = previous is not None and len(previous["rotation"])
+            rotation = continuous_euler(
+                rotation_matrices, order, np.radians(previous["rotation"][-1]) if has_previous else None
+            )
+            quaternion = continuous_quaternions(
+                matrix_to_quaternion(rotation_matrices), previous["quaternion"][-1] if has_previous else None
+            )
+        else:
+            rotation = matrix_to_euler(rotation_matrices, order)
+            quaternion = matrix_to_quaternion(rotation_matrices)
+        return {
+            "rotation": np.degrees(rotation).astype(np.float32),
+            "location": np.asarray(matrices)[..., :3, 3].astype(np.float32),
+            "quaternion": quaternion.astype(np.float32)
+        }
+
+
+def columnar_arrays(frames, fps, columns):
+    """
+    Returns typed arrays with one row per frame and bone, ordered by frame.
+    
+    Besides the given columns there is a frame, time and bone column, where
+    bone is an index into the list of bone names.
+    
+    """
+    frames = np.asarray(frames)
+    frame_count = len(frames)
+    bone_count = next(iter(columns.values())).shape[1] if columns else 0
+    
+    arrays = {
+        "frame": np.repeat(frames, bone_count),
+        "time": np.repeat(frames / fps, bone_count),
+        "bone": np.tile(np.arange(bone_count, dtype=np.int32), frame_count)
+    }
+    for key, values in columns.items():
+        arrays[key] = np.ascontiguousarray(values).reshape(frame_count * bone_count, -1)
+    
+    return arrays
+
+
+def write_columns_csv(path, frames, fps, names, columns, float_format="%.3f"):
+    """
+    Writes columns shaped (frames, bones, components) as CSV, one row per frame and name.
+    
+    Columns with one component get a single CSV column, others one per
+    component suffixed _x, _y, _z (or _w, _x, _y, _z for four components).
+    
+    """
+    header = ['frame', 'timecode', 'name']
+    for key, values in columns.items():
+        size = values.shape[2] if values.ndim > 2 else 1
+        if size == 1:
+            header.append(key)
+        else:
+            suffixes = "wxyz" if size == 4 else "xyz"[:size] if size <= 3 else [str(i) for i in range(size)]
+            header.extend(key + "_" + suffix for suffix in suffixes)
+    
+    with profile_phase("write"), open(path, mode='w', newline='') as writer:
+        writer = csv.writer(writer)
+        writer.writerow(header)
+        writer.writerows(profile_iter("format", iter_column_csv_rows(frames, fps, names, columns, float_format)))
+
+
+def iter_column_csv_rows(frames, fps, names, columns, float_format="%.3f"):
+    """
+    Yields the CSV rows of columns shaped (frames, bones, components) one frame at a time.
+    
+    """
+    frames = np.asarray(frames)
+    frame_count = len(frames)
+    values = np.concatenate(
+        [np.asarray(column).reshape(frame_count, len(names), -1) for column in columns.values()], axis=2
+    ) if columns else np.zeros((frame_count, len(names), 0))
+    for i, frame in enumerate(frames):
+        timecode = format_timecode(frame, fps)
+        formatted = np.char.mod(float_format, values[i]).tolist()
+        for j, name in enumerate(names):
+            yield [frame.item(), timecode, name] + formatted[j]
+
+
+def write_columns_npz(path, frames, fps, names, columns):
+    """
+    Writes columns shaped (frames, bones, components) to a single .npz archive.
+    
+    """
+    with profile_phase("convert"):
+        arrays = columnar_arrays(frames, fps, columns)
+    with profile_phase("write"):
+        np.savez(path, names=np.array(names, dtype=str), fps=np.array(fps), **arrays)
+
+
+def write_columns_npy(directory, frames, fps, names, columns):
+    """
+    Writes columns shaped (frames, bones, components) to a folder of .npy files.
+    
+    A manifest.json next to the arrays lists the bone names, fps and the file,
+    dtype and shape of every column so each one can be memory-mapped directly.
+    
+    """
+    os.makedirs(directory, exist_ok=True)
+    with profile_phase("convert"):
+        arrays = columnar_arrays(frames, fps, columns)
+    manifest = {
+        "format": "tetrapod-toolkit-columns",
+        "version": 1,
+        "fps": fps,
+        "names": list(names),
+        "rows": len(arrays["frame"]),
+        "columns": {}
+    }
+    for key, values in arrays.items():
+        filename = key + ".npy"
+        with profile_phase("write"):
+            np.save(os.path.join(directory, filename), values)
+        manifest["columns"][key] = {
+            "file": filename,
+            "dtype": values.dtype.str,
+            "shape": list(values.shape)
+        }
+    with open(os.path.join(directory, "manifest.json"), mode='w') as writer:
+        json.dump(manifest, writer, indent=2)
+
+
+def load_columns(path):
+    """
+    Returns the names, fps and column arrays of an .npz archive or .npy folder.
+    
+    Arrays of an .npy folder are memory-mapped read only.
+    
+    """
+    data = Object()
+    if os.path.isdir(path):
+        with open(os.path.join(path, "manifest.json")) as reader:
+            manifest = json.load(reader)
+        data.names = manifest["names"]
+        data.fps = manifest["fps"]
+        # Exports that were cancelled hold fewer valid rows than allocated.
+        data.columns = {
+            key: np.load(os.path.join(path, column["file"]), mmap_mode='r')[:manifest["rows"]]
+            for key, column in manifest["columns"].items()
+        }
+    else:
+        with np.load(path) as archive:
+            data.names = archive["names"].tolist()
+            data.fps = archive["fps"].item()
+            data.columns = {
+                key: archive[key] for key in archive.files if key not in ("names", "fps")
+            }
+    
+    return data
+
+
+def write_bake_columns(bake, path, file_format):
+    """
+    Writes the rotations, locations and quaternions of a bake in a columnar format.
+    
+    """
+    if file_format == 'NPZ':
+        write_columns_npz(path, bake.frames, bake.fps, bake.names, bake_columns(bake))
+    elif file_format == 'NPY':
+        write_columns_npy(path, bake.frames, bake.fps, bake.names, bake_columns(bake))
+    else:
+        raise ValueError("Unknown columnar format: " + str(file_format))
+
+
+def begin_rot_export(bake, path, file_format):
+    """
+    Opens a rotation export that is written while the bake is being filled.
+    
+    Call write_rot_export() whenever more frames of the bake are sampled and
+    end_rot_export() when done or cancelled. The output is valid after every
+    write: CSV rows are flushed, the .npy manifest records how many rows are
+    valid, and an .npz archive is written from the sampled frames at the end.
+    As rows are written before the range is complete, the min and max columns
+    of a streamed CSV hold each bone's extremes up to that frame until the
+    export completes, when they are rewritten with the extremes of the whole
+    range. A cancelled export keeps the running extremes.
+    
+    """
+    export = Object()
+    export.bake = bake
+    export.path = path
+    export.file_format = file_format
+    export.written = 0
+    export.settings = angle_settings()
+    # Columns of the last written frame, continuous angles carry on from them.
+    export.previous = None
+    
+    if file_format == 'CSV':
+        export.file = open(path, mode='a')
+        export.writer = csv.writer(export.file)
+        export.writer.writerow(ROT_CSV_HEADER)
+        export.file.flush()
+        # Byte offset of the first row, rows are rewritten from here once complete.
+        export.offset = export.file.tell()
+        export.rot_min = None
+        export.rot_max = None
+    elif file_format == 'NPY':
+        os.makedirs(path, exist_ok=True)
+        rows = len(bake.frames) * len(bake.names)
+        template = columnar_arrays(bake.frames[:1], bake.fps, bake_columns(bake, export.settings, 0, 1))
+        export.arrays = {}
+        export.manifest = {
+            "format": "tetrapod-toolkit-columns",
+            "version": 1,
+            "fps": bake.fps,
+            "names": list(bake.names),
+            "rows": 0,
+            "columns": {}
+        }
+        for key, values in template.items():
+            filename = key + ".npy"
+            shape = (rows,) + values.shape[1:]
+            export.arrays[key] = np.lib.format.open_memmap(
+                os.path.join(path, filename), mode='w+', dtype=values.dtype, shape=shape
+            )
+            export.manifest["columns"][key] = {
+                "file": filename,
+                "dtype": values.dtype.str,
+                "shape": list(shape)
+            }
+        write_export_manifest(export)
+    elif file_format != 'NPZ':
+        raise ValueError("Unknown export format: " + str(file_format))
+    
+    return export
+
+
+def write_rot_export(export, stop):
+    """
+    Writes the bake frames from the last written frame up to frame index stop.
+    
+    """
+    bake = export.bake
+    start = export.written
+    if stop <= start:
+        return
+    
+    if export.file_format == 'CSV':
+        with profile_phase("convert"):
+            matrices = bake_rotation_matrices(bake, export.settings.space, start, stop)
+            if export.settings.continuous:
+                previous = None if export.previous is None else np.radians(export.previous["rotation"][-1])
+                rotations = np.degrees(continuous_euler(matrices, export.settings.order, previous))
+            else:
+                rotations = np.degrees(matrix_to_euler(matrices, export.settings.order))
+            export.previous = {"rotation": rotations[-1:]}
+            running = [rotations] if export.rot_min is None else [export.rot_min[None], rotations]
+            rot_min = np.minimum.accumulate(np.concatenate(running), axis=0)[-len(rotations):]
+            running = [rotations] if export.rot_max is None else [export.rot_max[None], rotations]
+            rot_max = np.maximum.accumulate(np.concatenate(running), axis=0)[-len(rotations):]
+            export.rot_min = rot_min[-1]
+            export.rot_max = rot_max[-1]
+        with profile_phase("write"):
+            export.writer.writerows(profile_iter("format", iter_rot_csv_rows(
+                bake.frames[start:stop], bake.fps, bake.names, rotations, rot_min, rot_max
+            )))
+            export.file.flush()
+    elif export.file_format == 'NPY':
+        bone_count = len(bake.names)
+        with profile_phase("convert"):
+            columns = bake_columns(bake, export.settings, start, stop, export.previous)
+            export.previous = {key: values[-1:] for key, values in columns.items()}
+            arrays = columnar_arrays(bake.frames[start:stop], bake.fps, columns)
+        with profile_phase("write"):
+            for key, values in arrays.items():
+                export.arrays[key][start * bone_count:stop * bone_count] = values
+                export.arrays[key].flush()
+            export.manifest["rows"] = stop * bone_count
+            write_export_manifest(export)
+    
+    export.written = stop
+
+
+def end_rot_export(export):
+    """
+    Finishes an export with all frames written so far.
+    
+    """
+    bake = export.bake
+    if export.file_format == 'CSV':
+        export.file.close()
+        if bake.names and export.written == len(bake.frames):
+            with profile_phase("write"):
+                rewrite_rot_csv_extremes(export)
+    elif export.file_format == 'NPY':
+        for values in export.arrays.values():
+            values.flush()
+        export.arrays.clear()
+    elif export.file_format == 'NPZ':
+        columns = bake_columns(bake, export.settings, 0, export.written)
+        write_columns_npz(export.path, bake.frames[:export.written], bake.fps, bake.names, columns)
+
+
+def rewrite_rot_csv_extremes(export):
+    """
+    Replaces the running min and max columns of a completed streamed CSV with each bone's extremes.
+    
+    The rows are copied to a temporary file next to the export, which then
+    replaces it, so the CSV stays valid if Blender quits halfway.
+    
+    """
+    rot_min = [tuple(values) for values in export.rot_min.tolist()]
+    rot_max = [tuple(values) for values in export.rot_max.tolist()]
+    bone_count = len(rot_min)
+    temp_path = export.path + ".tmp"
+    with open(export.path, mode='rb') as reader, open(temp_path, mode='wb') as writer:
+        writer.write(reader.read(export.offset))
+        writer.flush()
+        with io.TextIOWrapper(reader, newline='') as rows, io.TextIOWrapper(writer) as output:
+            output = csv.writer(output)
+            for index, row in enumerate(csv.reader(rows)):
+                row[6:8] = rot_min[index % bone_count], rot_max[index % bone_count]
+                output.writerow(row)
+    os.replace(temp_path, export.path)
+
+
+def write_export_manifest(export):
+    with open(os.path.join(export.path, "manifest.json"), mode='w') as writer:
+        json.dump(export.manifest, writer, indent=2)
+
+
 def current_pb_transforms():
     """
     Returns location and rotation of the selected bone's head and tail.
@@ -151,260 +514,3846 @@ def current_pb_transforms():
     return bones
 
 
-def current_bone_location(scene, frame):
-    scene.frame_set(frame)
-    location, rotation, scale = bpy.context.active_pose_bone.matrix.decompose()
+# Panel readouts, cleared by the handlers below whenever the pose may have changed.
+panel_cache = {}
+
+
+@persistent
+def clear_panel_cache(*args):
+    panel_cache.clear()
+
+
+def panel_timecode(scene):
+    """
+    Returns the timecode of the current frame, cached until the frame changes.
     
-    return location
+    """
+    key = ("timecode", scene.frame_current, scene.render.fps)
+    if key not in panel_cache:
+        panel_cache[key] = get_timecode(scene)
+    return panel_cache[key]
 
 
-def current_bone_rot(scene, frame):
-    scene.frame_set(frame)
-    location, rotation, scale = bpy.context.active_pose_bone.matrix.decompose()
+def panel_bone_transforms(context):
+    """
+    Returns location and rotation of the bone shown in the panel.
+    
+    This is the active pose bone, or the first selected one. Only that bone is
+    evaluated and the result is cached until the next frame change or
+    depsgraph update, so redraws cost the same for any selection size.
     
-    return rotation
+    """
+    pb = context.active_pose_bone or context.selected_pose_bones[0]
+    key = ("bone", pb.id_data.name, pb.name)
+    if key not in panel_cache:
+        rotation = pb.matrix.to_euler()
+        pb_d = Object()
+        pb_d.pb = pb
+        pb_d.name = pb.name
+        pb_d.rotation = mathutils.Vector((
+            degrees(rotation.x),
+            degrees(rotation.y),
+            degrees(rotation.z)
+        ))
+        pb_d.location_head = pb.head.copy()
+        pb_d.location_tail = pb.tail.copy()
+        panel_cache[key] = pb_d
+    return panel_cache[key]
 
 
-def current_bone_location_change(scene, frame_start, frame_end):
-    initial_frame = scene.frame_current
-    bone_start = current_bone_location(bpy.context.scene, frame_start)
-    bone_end = current_bone_location(bpy.context.scene, frame_end)
-    scene.frame_set(initial_frame)
+def pose_bones_to_bake(context):
+    """
+    Returns the selected pose bones of the active armature, including the active bone.
     
-    return bone_end - bone_start
+    """
+    pose_bones = list(context.selected_pose_bones_from_active_object or [])
+    active_pose_bone = context.active_pose_bone
+    if active_pose_bone is not None and active_pose_bone not in pose_bones:
+        pose_bones.append(active_pose_bone)
+    return pose_bones
 
 
-def current_bone_rot_change(scene):
-    initial_frame = scene.frame_current
-    bone_start = current_bone_rot(bpy.context.scene, scene.measure_start_frame)
-    bone_end = current_bone_rot(bpy.context.scene, scene.measure_end_frame)
-    scene.frame_set(initial_frame)
+def armature_pose_bones(armature, names=None):
+    """
+    Returns pose bones of an armature by name, or its selected pose bones if names is None.
+    
+    Used where there is no interactive selection, such as in background mode.
+    
+    """
+    if names is not None:
+        missing = [name for name in names if name not in armature.pose.bones]
+        if missing:
+            raise KeyError("Bones not found in {}: {}".format(armature.name, ", ".join(missing)))
+        return [armature.pose.bones[name] for name in names]
     
-    x1, y1, z1 = map(degrees, (bone_start.to_euler()[0], bone_start.to_euler()[1], bone_start.to_euler()[2]))
-    x2, y2, z2 = map(degrees, (bone_end.to_euler()[0], bone_end.to_euler()[1], bone_end.to_euler()[2]))
-    x = x2 - x1
-    y = y2 - y1
-    z = z2 - z1
+    return [pb for pb in armature.pose.bones if pb.bone.select]
 
-    return (x, y, z)
+
+def armature_dependencies(armature):
+    """
+    Returns the objects the pose of the armature depends on.
+    
+    """
+    return object_dependencies([armature])
 
 
-def current_bone_rot_min_max(scene):
-    min_x = None
-    max_x = None
-    min_y = None
-    max_y = None
-    min_z = None
-    max_z = None
-    frame_count = scene.measure_end_frame - scene.measure_start_frame
+def object_dependencies(objects):
+    """
+    Returns the objects the given objects depend on, including themselves.
     
-    for frame in range(frame_count + 1):
-        rot = current_bone_rot(bpy.context.scene, frame)
+    These are their parents, constraint targets of the objects and their pose
+    bones, objects used by modifiers, such as the armature of a muscle's
+    Weights modifier, and the objects drivers read from, followed recursively.
+    
+    """
+    needed = set()
+    stack = list(objects)
+    while stack:
+        obj = stack.pop()
+        if obj is None or obj in needed:
+            continue
+        needed.add(obj)
+        stack.append(obj.parent)
         
-        # X axis
-        if max_x == None or rot.to_euler().x >= max_x:
-            max_x = rot.to_euler().x
-        if min_x == None or rot.to_euler().x <= min_x:
-            min_x = rot.to_euler().x
+        constraints = list(obj.constraints)
+        if obj.pose is not None:
+            for pb in obj.pose.bones:
+                constraints.extend(pb.constraints)
+        for constraint in constraints:
+            stack.append(getattr(constraint, "target", None))
+            stack.append(getattr(constraint, "pole_target", None))
+            # Armature constraints have a list of targets.
+            for target in getattr(constraint, "targets", ()):
+                stack.append(target.target)
+        for modifier in obj.modifiers:
+            stack.append(getattr(modifier, "object", None))
         
-        # Y axis
-        if max_y == None or rot.to_euler().y >= max_y:
-            max_y = rot.to_euler().y
-        if min_y == None or rot.to_euler().z <= min_z:
-            min_y = rot.to_euler().y
-            
-        # Z axis
-        if max_z == None or rot.to_euler().z >= max_z:
-            max_z = rot.to_euler().z
-        if min_z == None or rot.to_euler().z <= min_z:
-            min_z = rot.to_euler().z
-            
-    bonedata = Object()
-    bonedata.min = degrees(min_x), degrees(min_y), degrees(min_z)
-    bonedata.max = degrees(max_x), degrees(max_y), degrees(max_z)
+        if obj.animation_data is not None:
+            for fcurve in obj.animation_data.drivers:
+                for variable in fcurve.driver.variables:
+                    for target in variable.targets:
+                        if target.id_type == 'OBJECT':
+                            stack.append(target.id)
     
-    return(bonedata)
+    return needed
 
 
-def bmesh_copy_from_object(obj, transform=True, triangulate=True, apply_modifiers=False):
+def armature_only_evaluation(scene, armature):
     """
-    Returns a transformed, triangulated copy of the mesh
+    Disables every object the armature does not depend on while in use.
+    
+    Frame changes then only evaluate the pose instead of the muscle meshes and
+    their modifiers.
     
     """
-    assert(obj.type == 'MESH')
-    if apply_modifiers and obj.modifiers:
-        depsgraph = bpy.context.evaluated_depsgraph_get()
-        obj_eval = obj.evaluated_get(depsgraph)
-        me = obj_eval.to_mesh()
-        bm = bmesh.new()
-        bm.from_mesh(me)
-        obj_eval.to_mesh_clear()
-    else:
-        me = obj.data
-        if obj.mode == 'EDIT':
-            bm_orig = bmesh.from_edit_mesh(me)
-            bm = bm_orig.copy()
-        else:
-            bm = bmesh.new()
-            bm.from_mesh(me)
+    return dependencies_only_evaluation(scene, [armature])
 
-    if transform:
-        bm.transform(obj.matrix_world)
 
-    if triangulate:
-        bmesh.ops.triangulate(bm, faces=bm.faces)
+# Scenes and the objects dependencies_only_evaluation() disabled in them, while in use.
+evaluation_disabled = []
+# Scene property naming the disabled objects, so a file saved meanwhile can be repaired on load.
+EVALUATION_DISABLED_PROP = "tetrapod_evaluation_disabled"
 
-    return bm
+
+def record_evaluation_disabled(scene):
+    """
+    Stores the names of the objects disabled for evaluation in the scene, or removes the record.
+    
+    """
+    names = [obj.name for entry_scene, objects in evaluation_disabled if entry_scene == scene for obj in objects]
+    if names:
+        scene[EVALUATION_DISABLED_PROP] = names
+    elif EVALUATION_DISABLED_PROP in scene:
+        del scene[EVALUATION_DISABLED_PROP]
 
 
-def current_obj_volume():
+@contextmanager
+def dependencies_only_evaluation(scene, objects):
     """
-    Returns final volume of the selected mesh object.
+    Disables every object the given objects do not depend on while in use.
+    
+    Objects disabled in viewports are left out of the depsgraph, so frame
+    changes skip them. The objects are enabled again on exit, before the file
+    is saved and, should Blender quit meanwhile, when the file is next loaded.
     
     """
-    scene = bpy.context.scene
-    unit = scene.unit_settings
-    obj = bpy.context.active_object
-    bm = bmesh_copy_from_object(obj, apply_modifiers=True)
-    vol = bm.calc_volume()
-    bm.free()
+    needed = object_dependencies(objects)
+    disabled = [
+        obj for obj in scene.objects
+        if obj not in needed and not obj.hide_viewport and obj.mode != 'EDIT'
+    ]
+    entry = (scene, disabled)
+    evaluation_disabled.append(entry)
+    record_evaluation_disabled(scene)
+    for obj in disabled:
+        obj.hide_viewport = True
+    try:
+        yield disabled
+    finally:
+        evaluation_disabled.remove(entry)
+        for obj in disabled:
+            obj.hide_viewport = False
+        record_evaluation_disabled(scene)
 
-    return vol
+
+@persistent
+def enable_evaluation_disabled(*args):
+    """
+    Save handler enabling the objects disabled for evaluation, so they are not saved disabled.
+    
+    """
+    for scene, objects in evaluation_disabled:
+        for obj in objects:
+            obj.hide_viewport = False
+        if EVALUATION_DISABLED_PROP in scene:
+            del scene[EVALUATION_DISABLED_PROP]
 
 
-def add_mesh(name, verts, edges=None, faces=None, col_name="Collection"):
+@persistent
+def disable_evaluation_disabled(*args):
     """
-    Adds new mesh object from vertices, edges, and faces.
+    Save handler disabling the objects of evaluations still in use again after saving.
     
     """
-    if edges is None:
-        edges = []
-    if faces is None:
-        faces = []
-    mesh = bpy.data.meshes.new(name)
-    obj = bpy.data.objects.new(mesh.name, mesh)
-    col = bpy.data.collections[col_name]
-    col.objects.link(obj)
-    bpy.context.view_layer.objects.active = obj
-    mesh.from_pydata(verts, edges, faces)
+    for scene, objects in evaluation_disabled:
+        for obj in objects:
+            obj.hide_viewport = True
+        record_evaluation_disabled(scene)
+
+
+@persistent
+def restore_evaluation_disabled(*args):
+    """
+    Load handler enabling objects a file recorded as disabled for evaluation.
     
-    return obj
+    """
+    evaluation_disabled.clear()
+    for scene in bpy.data.scenes:
+        names = scene.get(EVALUATION_DISABLED_PROP)
+        if names is None:
+            continue
+        for name in names:
+            obj = bpy.data.objects.get(name)
+            if obj is not None:
+                obj.hide_viewport = False
+        del scene[EVALUATION_DISABLED_PROP]
 
 
-def add_muscle(name="Muscle"):
+def bake_pose_bones(scene, pose_bones, frame_start, frame_end, armature_only=None, use_cache=None, samples_per_frame=1):
     """
-    Adds a new muscle from the head and tail of the selected bone.
+    Returns the matrix, head and tail of each pose bone for every frame in a range.
+    
+    Every frame is evaluated once and all bones are read in bulk with foreach_get.
+    The results are stored as arrays shaped (frames, bones, ...) so travel, min/max
+    and exports can be computed without scrubbing the timeline again.
+    Unless disabled, bones without constraints or drivers are computed from
+    their F-curves directly, only the armature is evaluated while sampling,
+    and bones whose animation is unchanged are read from the bake cache.
+    With more than one sample per frame, sub-frames are sampled too.
     
     """
-    pb_first = current_pb_transforms()[0]
-    pb_last = current_pb_transforms()[-1]
-    verts = [pb_first.location_head, pb_last.location_tail]
-    obj = add_mesh(name, verts, [[0,1]])
+    frames = sample_frames(frame_start, frame_end, samples_per_frame)
+    if use_cache is None:
+        use_cache = scene.measure_use_cache and samples_per_frame <= 1
+    if not use_cache:
+        return bake_pose_bone_frames(scene, pose_bones, frames, armature_only)
     
-    # Weights
-    weight_group_head = obj.vertex_groups.new(name=pb_first.name)
-    if pb_last.name in obj.vertex_groups:
-        weight_group_tail = weight_group_head
-    else:
-        weight_group_tail = obj.vertex_groups.new(name=pb_last.name)
-    weight_group_head.add([0], 1, 'REPLACE')
-    weight_group_tail.add([1], 1, 'REPLACE')
+    with profile_phase("cache"):
+        bake = new_cached_bake(scene, pose_bones, frames)
+    fill_bake(scene, bake, armature_only)
+    with profile_phase("cache"):
+        store_cached_bake(scene, bake)
     
-    # Weight Modifier
-    weight_modifier = obj.modifiers.new("Weights", "ARMATURE")
-    armature = pb_first.pb.id_data
-    weight_modifier.object = armature
-    obj.parent = armature
+    return bake
+
+
+def bake_pose_bone_frames(scene, pose_bones, frames, armature_only=None):
+    """
+    Returns the matrix, head and tail of each pose bone for the given frames.
     
-    # Geo Nodes Modifier
-    modifier_name = "Bone_Gen"
-    modifier = obj.modifiers.new(modifier_name, "NODES")
-    replacement = bpy.data.node_groups["muscle_setup"]
-    modifier.node_group = replacement
-    obj.select_set(True)
-    armature.select_set(False)
-    bpy.context.view_layer.objects.active = obj
+    """
+    bake = new_bake(scene, pose_bones, frames)
+    fill_bake(scene, bake, armature_only)
     
-    #bpy.ops.object.modifier_apply(modifier=modifier_name)
-    #bm = bmesh_copy_from_object(obj)
-    #weight_idx = [v.index for v in bm.verts]
-    #weight_group_head = obj.vertex_groups.new(name=pb_first.name)
-    #weight_group_head.add(weight_idx, 1, 'REPLACE')
+    return bake
+
+
+def fill_bake(scene, bake, armature_only=None):
+    """
+    Samples every frame of a bake, then returns to the current frame.
     
-def modify_muscle(radius, u_res=None, r_res=None):
-    active_object = bpy.context.active_object
-    if active_object is not None:
-        if active_object.type == 'MESH' and active_object.modifiers.get("Bone_Gen"):
-            bpy.context.active_object.modifiers["Bone_Gen"]["Socket_2"] = radius
-            if u_res:
-                bpy.context.active_object.modifiers["Bone_Gen"]["Socket_4"] = u_res
-            if r_res:
-                bpy.context.active_object.modifiers["Bone_Gen"]["Socket_5"] = r_res
-            bpy.context.object.data.update()
+    """
+    if scene.measure_direct_sampling:
+        sample_direct_bones(scene, bake)
+    if len(bake.sampled) == 0 or len(bake.frames) == 0:
+        return
+    if armature_only is None:
+        armature_only = scene.measure_armature_only
     
+    initial_frame = scene.frame_current
+    with armature_only_evaluation(scene, bake.armature) if armature_only else nullcontext():
+        bake_frames(scene, bake, 0, len(bake.frames))
+    scene.frame_set(initial_frame)
+
+
+def bake_current_pose(scene, pose_bones):
+    """
+    Returns a bake of the pose bones holding only the current frame.
     
-def convert_to_mesh(obj, armature):
-    armature_obj = armature
-    armature = armature.data
-    muscle_name = obj.name
-    v1 = obj.data.vertices[0]
-    v1 = obj.matrix_world @ v1.co
-    v2 = obj.data.vertices[1]
-    v2 = obj.matrix_world @ v2.co
+    """
+    bake = new_bake(scene, pose_bones, np.array([scene.frame_current], dtype=np.int32))
+    if bake.names:
+        sample_pose(bake, 0)
     
-    # Bone creation
-    bpy.context.view_layer.objects.active = armature_obj
-    bpy.ops.object.mode_set(mode='EDIT', toggle=False)
-    bone = armature.edit_bones.new(name=muscle_name)
-    bone.head = v1
-    bone.tail = v2
-    bone_t = armature.edit_bones.new(name=muscle_name + "_target")
-    bone_t.head = v2
-    tail_offset = mathutils.Vector((0.0, 0.0, 1.0))
-    bone_t.tail = v2 + tail_offset
-    bone_name = bone.name
-    bone_t_name = bone_t.name
+    return bake
+
+
+def new_bake(scene, pose_bones, frames):
+    """
+    Returns an empty bake with arrays allocated for the pose bones and frames.
     
-    # Bone constraints
-    bpy.ops.object.mode_set(mode='POSE')
-    objbone = armature_obj.pose.bones[bone_name]
+    """
+    pose_bones = list(pose_bones)
+    bone_count = len(pose_bones)
+    
+    bake = Object()
+    bake.names = [pb.name for pb in pose_bones]
+    bake.frames = frames
+    bake.fps = scene.render.fps
+    bake.matrices = np.zeros((len(frames), bone_count, 4, 4), dtype=np.float32)
+    bake.heads = np.zeros((len(frames), bone_count, 3), dtype=np.float32)
+    bake.tails = np.zeros((len(frames), bone_count, 3), dtype=np.float32)
+    # Parent pose matrices, the identity for root bones, and rest matrices for joint angles.
+    bake.parent_matrices = np.zeros((len(frames), bone_count, 4, 4), dtype=np.float32)
+    bake.parent_matrices[...] = np.eye(4, dtype=np.float32)
+    bake.rest = np.array([pb.bone.matrix_local for pb in pose_bones], dtype=np.float32).reshape(-1, 4, 4)
+    bake.parent_rest = np.array([
+        pb.parent.bone.matrix_local if pb.parent else mathutils.Matrix.Identity(4) for pb in pose_bones
+    ], dtype=np.float32).reshape(-1, 4, 4)
+    bake.armature = pose_bones[0].id_data if pose_bones else None
+    # Columns of the bake that are read from the pose, the others come from the cache.
+    bake.sampled = np.arange(bone_count)
+    if bake.armature is not None:
+        all_pose_bones = bake.armature.pose.bones
+        bake.indices = np.array([all_pose_bones.find(name) for name in bake.names])
+        bake.parent_indices = np.array([all_pose_bones.find(pb.parent.name) if pb.parent else -1 for pb in pose_bones])
+        bake.matrix_buffer = np.empty(len(all_pose_bones) * 16, dtype=np.float32)
+        bake.vector_buffer = np.empty(len(all_pose_bones) * 3, dtype=np.float32)
+    
+    return bake
+
+
+def bake_frames(scene, bake, start, stop):
+    """
+    Evaluates and samples the bake frames with index start up to stop.
+    
+    """
+    if len(bake.sampled) == 0:
+        return
+    profile_frames(stop - start)
+    with profile_phase("evaluate"):
+        for i in range(start, stop):
+            frame = int(np.floor(bake.frames[i]))
+            scene.frame_set(frame, subframe=float(bake.frames[i] - frame))
+            sample_pose(bake, i)
+
+
+def sample_pose(bake, i):
+    """
+    Reads the current pose of the baked bones into frame index i of the bake.
+    
+    """
+    all_pose_bones = bake.armature.pose.bones
+    columns = bake.sampled
+    indices = bake.indices[columns]
+    # foreach_get returns matrices column-major, transpose to row-major.
+    all_pose_bones.foreach_get("matrix", bake.matrix_buffer)
+    all_matrices = bake.matrix_buffer.reshape(-1, 4, 4)
+    bake.matrices[i, columns] = all_matrices[indices].transpose(0, 2, 1)
+    parents = bake.parent_indices[columns]
+    child = parents >= 0
+    bake.parent_matrices[i, columns[child]] = all_matrices[parents[child]].transpose(0, 2, 1)
+    all_pose_bones.foreach_get("head", bake.vector_buffer)
+    bake.heads[i, columns] = bake.vector_buffer.reshape(-1, 3)[indices]
+    all_pose_bones.foreach_get("tail", bake.vector_buffer)
+    bake.tails[i, columns] = bake.vector_buffer.reshape(-1, 3)[indices]
+
+
+def sample_frames(frame_start, frame_end, samples_per_frame=1):
+    """
+    Returns the frames sampled in an inclusive range, with sub-frames above one sample per frame.
+    
+    """
+    if samples_per_frame <= 1:
+        return np.arange(frame_start, frame_end + 1, dtype=np.int32)
+    return np.arange(frame_start * samples_per_frame, frame_end * samples_per_frame + 1) / samples_per_frame
+
+
+FCURVE_INTERPOLATIONS = {'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2}
+
+
+def evaluate_fcurve(fcurve, frames):
+    """
+    Returns the values of an F-curve at an array of frames.
+    
+    Constant, linear and Bezier keyframes with constant extrapolation are
+    evaluated in NumPy from keyframe points read with foreach_get. Curves with
+    modifiers, other interpolations or linear extrapolation fall back to
+    FCurve.evaluate() per frame.
+    
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    points = fcurve.keyframe_points
+    count = len(points)
+    interpolations = [FCURVE_INTERPOLATIONS.get(point.interpolation, -1) for point in points]
+    if count == 0 or len(fcurve.modifiers) or fcurve.extrapolation != 'CONSTANT' or -1 in interpolations[:-1]:
+        return np.array([fcurve.evaluate(frame) for frame in frames.tolist()], dtype=np.float64)
+    
+    co = np.empty(count * 2, dtype=np.float32)
+    points.foreach_get("co", co)
+    x = co[0::2].astype(np.float64)
+    y = co[1::2].astype(np.float64)
+    values = np.where(frames <= x[0], y[0], y[-1])
+    inside = (frames > x[0]) & (frames < x[-1])
+    if not np.any(inside):
+        return values
+    
+    f = frames[inside]
+    i = np.searchsorted(x, f, side='right') - 1
+    kinds = np.array(interpolations, dtype=np.int8)[i]
+    x0, y0, x1, y1 = x[i], y[i], x[i + 1], y[i + 1]
+    result = y0.copy()
+    linear = kinds == FCURVE_INTERPOLATIONS['LINEAR']
+    result[linear] = y0[linear] + (y1[linear] - y0[linear]) * (f[linear] - x0[linear]) / (x1[linear] - x0[linear])
+    bezier = kinds == FCURVE_INTERPOLATIONS['BEZIER']
+    if np.any(bezier):
+        right = np.empty(count * 2, dtype=np.float32)
+        left = np.empty(count * 2, dtype=np.float32)
+        points.foreach_get("handle_right", right)
+        points.foreach_get("handle_left", left)
+        j = i[bezier]
+        result[bezier] = evaluate_bezier(
+            f[bezier], x[j], y[j], right[0::2][j], right[1::2][j], left[0::2][j + 1], left[1::2][j + 1], x[j + 1], y[j + 1]
+        )
+    values[inside] = result
+    
+    return values
+
+
+def evaluate_bezier(f, x0, y0, x1, y1, x2, y2, x3, y3, iterations=40):
+    """
+    Returns the value of Bezier segments at frames f, all arguments being arrays.
+    
+    Handles are scaled down like Blender does when they overlap along the
+    frame axis, so x is monotonic and the curve parameter is found by bisection.
+    
+    """
+    h1x, h1y = x0 - x1, y0 - y1
+    h2x, h2y = x3 - x2, y3 - y2
+    overlap = np.abs(h1x) + np.abs(h2x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.where(overlap > x3 - x0, (x3 - x0) / overlap, 1.0)
+    x1, y1 = x0 - scale * h1x, y0 - scale * h1y
+    x2, y2 = x3 - scale * h2x, y3 - scale * h2y
+    
+    def cubic(t, p0, p1, p2, p3):
+        s = 1.0 - t
+        return s * s * s * p0 + 3.0 * s * s * t * p1 + 3.0 * s * t * t * p2 + t * t * t * p3
+    
+    low = np.zeros_like(f)
+    high = np.ones_like(f)
+    for _ in range(iterations):
+        t = 0.5 * (low + high)
+        below = cubic(t, x0, x1, x2, x3) < f
+        low = np.where(below, t, low)
+        high = np.where(below, high, t)
+    
+    return cubic(0.5 * (low + high), y0, y1, y2, y3)
+
+
+def euler_to_matrix(angles, order='XYZ'):
+    """
+    Returns rotation matrices shaped (..., 3, 3) for Euler angles in radians in a Blender rotation order.
+    
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    matrix = np.broadcast_to(np.eye(3), angles.shape[:-1] + (3, 3)).copy()
+    for axis in order:
+        index = "XYZ".index(axis)
+        c = np.cos(angles[..., index])
+        s = np.sin(angles[..., index])
+        rotation = np.zeros(angles.shape[:-1] + (3, 3))
+        a, b = [k for k in range(3) if k != index]
+        rotation[..., index, index] = 1.0
+        rotation[..., a, a] = c
+        rotation[..., b, b] = c
+        # Right-handed rotation about the axis: Y rotates Z towards X.
+        sign = -1.0 if index == 1 else 1.0
+        rotation[..., a, b] = -s * sign
+        rotation[..., b, a] = s * sign
+        matrix = rotation @ matrix
+    
+    return matrix
+
+
+def quaternion_to_matrix(quaternions):
+    """
+    Returns rotation matrices shaped (..., 3, 3) for WXYZ quaternions, normalized first.
+    
+    """
+    q = np.asarray(quaternions, dtype=np.float64)
+    norm = np.linalg.norm(q, axis=-1, keepdims=True)
+    q = np.where(norm > 0.0, q / np.where(norm > 0.0, norm, 1.0), np.array([1.0, 0.0, 0.0, 0.0]))
+    w, x, y, z = np.moveaxis(q, -1, 0)
+    
+    return np.stack((
+        np.stack((1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)), axis=-1),
+        np.stack((2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)), axis=-1),
+        np.stack((2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)), axis=-1)
+    ), axis=-2)
+
+
+def ik_chain_bones(armature):
+    """
+    Returns the names of bones moved by the IK and Spline IK constraints of bones below them.
+    
+    Each active constraint's chain is walked up from its bone, or from the
+    parent for IK not using the tail, over chain_count bones or to the root
+    when the count is 0.
+    
+    """
+    chains = set()
+    for pb in armature.pose.bones:
+        for constraint in pb.constraints:
+            if constraint.type not in ('IK', 'SPLINE_IK') or constraint.mute or constraint.influence <= 0.0:
+                continue
+            bone = pb if getattr(constraint, "use_tail", True) else pb.parent
+            # A chain count of 0 never runs out, so the walk goes on to the root.
+            remaining = constraint.chain_count or -1
+            while bone is not None and remaining != 0:
+                chains.add(bone.name)
+                bone = bone.parent
+                remaining -= 1
+    
+    return chains
+
+
+def direct_sampling_bones(armature):
+    """
+    Returns the names of bones whose pose follows from the action's F-curves alone.
+    
+    Bones qualify if neither they nor any parent has constraints or drivers,
+    is part of an IK chain or uses partial rotation or scale inheritance. None
+    qualify if the armature uses NLA, blends its action or shows the rest
+    pose, or the scene remaps time.
+    
+    """
+    animation = armature.animation_data
+    if armature.data.pose_position == 'REST':
+        return set()
+    scene = bpy.context.scene
+    if scene.render.frame_map_old != scene.render.frame_map_new:
+        return set()
+    driven = set()
+    if animation is not None:
+        if any(not track.mute for track in animation.nla_tracks):
+            return set()
+        if getattr(animation, "action_influence", 1.0) < 1.0 or getattr(animation, "action_blend_type", 'REPLACE') != 'REPLACE':
+            return set()
+        driven = {pose_bone_name_from_path(fcurve.data_path) for fcurve in animation.drivers}
+    chains = ik_chain_bones(armature)
+    
+    eligible = {}
+    def is_direct(pb):
+        if pb.name not in eligible:
+            bone = pb.bone
+            eligible[pb.name] = (
+                pb.name not in driven and pb.name not in chains
+                and not any(not constraint.mute and constraint.influence > 0.0 for constraint in pb.constraints)
+                and bone.use_inherit_rotation and bone.inherit_scale == 'FULL' and bone.use_local_location
+                and (pb.parent is None or is_direct(pb.parent))
+            )
+        return eligible[pb.name]
+    
+    return {pb.name for pb in armature.pose.bones if is_direct(pb)}
+
+
+def direct_pose_matrices(armature, names, frames):
+    """
+    Returns armature space pose matrices shaped (frames, 4, 4) for the named bones, keyed by name.
+    
+    Channels are evaluated from the action's F-curves and composed down the
+    hierarchy as parent pose @ parent rest^-1 @ rest @ basis, the way Blender
+    poses bones without constraints. Like Blender, the location of connected
+    bones is ignored.
+    
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    animation = armature.animation_data
+    bone_fcurves = {}
+    if animation is not None and animation.action is not None:
+        for fcurve in animation.action.fcurves:
+            name = pose_bone_name_from_path(fcurve.data_path)
+            if name is not None and not fcurve.mute:
+                bone_fcurves.setdefault(name, []).append(fcurve)
+    
+    matrices = {}
+    def pose_matrix(pb):
+        if pb.name in matrices:
+            return matrices[pb.name]
+        fcurves = bone_fcurves.get(pb.name, [])
+        def channel(path):
+            values = np.tile(np.array(getattr(pb, path), dtype=np.float64), (len(frames), 1))
+            for fcurve in fcurves:
+                if fcurve.data_path.endswith("." + path) and fcurve.array_index < values.shape[1]:
+                    values[:, fcurve.array_index] = evaluate_fcurve(fcurve, frames)
+            return values
+        
+        if pb.rotation_mode == 'QUATERNION':
+            rotation = quaternion_to_matrix(channel("rotation_quaternion"))
+        elif pb.rotation_mode == 'AXIS_ANGLE':
+            axis_angle = channel("rotation_axis_angle")
+            axis = axis_angle[:, 1:]
+            length = np.linalg.norm(axis, axis=-1, keepdims=True)
+            axis = np.where(length > 0.0, axis / np.where(length > 0.0, length, 1.0), np.array([0.0, 1.0, 0.0]))
+            half = 0.5 * axis_angle[:, :1]
+            rotation = quaternion_to_matrix(np.concatenate((np.cos(half), np.sin(half) * axis), axis=-1))
+        else:
+            rotation = euler_to_matrix(channel("rotation_euler"), pb.rotation_mode)
+        basis = np.broadcast_to(np.eye(4), (len(frames), 4, 4)).copy()
+        basis[:, :3, :3] = rotation * channel("scale")[:, None, :]
+        if not pb.bone.use_connect:
+            basis[:, :3, 3] = channel("location")
+        
+        rest = np.array(pb.bone.matrix_local, dtype=np.float64)
+        if pb.parent is None:
+            matrix = rest @ basis
+        else:
+            parent_rest = np.array(pb.parent.bone.matrix_local, dtype=np.float64)
+            matrix = pose_matrix(pb.parent) @ (np.linalg.inv(parent_rest) @ rest) @ basis
+        matrices[pb.name] = matrix
+        return matrix
+    
+    return {name: pose_matrix(armature.pose.bones[name]) for name in names}
+
+
+def sample_direct_bones(scene, bake):
+    """
+    Fills the bake columns of bones that qualify for direct F-curve sampling.
+    
+    These columns are removed from bake.sampled, so only constrained or driven
+    bones are left to be sampled through the depsgraph.
+    
+    """
+    if bake.armature is None or len(bake.sampled) == 0 or len(bake.frames) == 0:
+        return
+    eligible = direct_sampling_bones(bake.armature)
+    columns = [i for i in bake.sampled if bake.names[i] in eligible]
+    if not columns:
+        return
+    
+    with profile_phase("direct"):
+        pose_bones = bake.armature.pose.bones
+        parents = {bake.names[i]: pose_bones[bake.names[i]].parent for i in columns}
+        names = [bake.names[i] for i in columns] + [parent.name for parent in parents.values() if parent is not None]
+        matrices = direct_pose_matrices(bake.armature, list(dict.fromkeys(names)), bake.frames)
+        for i in columns:
+            matrix = matrices[bake.names[i]]
+            length = pose_bones[bake.names[i]].bone.length
+            bake.matrices[:, i] = matrix
+            if parents[bake.names[i]] is not None:
+                bake.parent_matrices[:, i] = matrices[parents[bake.names[i]].name]
+            bake.heads[:, i] = matrix[:, :3, 3]
+            bake.tails[:, i] = matrix[:, :3, 3] + matrix[:, :3, 1] * length
+    bake.sampled = np.setdiff1d(bake.sampled, columns)
+
+
+def save_bake(bake, path):
+    """
+    Writes the raw arrays of a bake to an .npz archive.
+    
+    """
+    np.savez(
+        path,
+        names=np.array(bake.names, dtype=str),
+        frames=bake.frames,
+        fps=np.array(bake.fps),
+        matrices=bake.matrices,
+        heads=bake.heads,
+        tails=bake.tails,
+        parent_matrices=bake.parent_matrices,
+        rest=bake.rest,
+        parent_rest=bake.parent_rest
+    )
+
+
+def load_bake(path):
+    """
+    Returns a bake read from an archive written by save_bake().
+    
+    """
+    bake = Object()
+    with np.load(path) as archive:
+        bake.names = archive["names"].tolist()
+        bake.frames = archive["frames"]
+        bake.fps = archive["fps"].item()
+        bake.matrices = archive["matrices"]
+        bake.heads = archive["heads"]
+        bake.tails = archive["tails"]
+        bake.parent_matrices = archive["parent_matrices"]
+        bake.rest = archive["rest"]
+        bake.parent_rest = archive["parent_rest"]
+    bake.armature = None
+    
+    return bake
+
+
+def merge_bakes(bakes):
+    """
+    Returns one bake from bakes of consecutive frame ranges of the same bones.
+    
+    """
+    bakes = sorted(bakes, key=lambda bake: int(bake.frames[0]) if len(bake.frames) else 0)
+    for bake in bakes[1:]:
+        if bake.names != bakes[0].names:
+            raise ValueError("Cannot merge bakes of different bones")
+    
+    merged = Object()
+    merged.names = list(bakes[0].names)
+    merged.fps = bakes[0].fps
+    merged.armature = getattr(bakes[0], "armature", None)
+    merged.frames = np.concatenate([bake.frames for bake in bakes])
+    merged.matrices = np.concatenate([bake.matrices for bake in bakes])
+    merged.heads = np.concatenate([bake.heads for bake in bakes])
+    merged.tails = np.concatenate([bake.tails for bake in bakes])
+    merged.parent_matrices = np.concatenate([bake.parent_matrices for bake in bakes])
+    merged.rest = bakes[0].rest
+    merged.parent_rest = bakes[0].parent_rest
+    if np.any(np.diff(merged.frames) <= 0):
+        raise ValueError("Merged bakes have overlapping frames")
+    
+    return merged
+
+
+EULER_AXES = {
+    'XYZ': ((0, 1, 2), False),
+    'XZY': ((0, 2, 1), True),
+    'YXZ': ((1, 0, 2), True),
+    'YZX': ((1, 2, 0), False),
+    'ZXY': ((2, 0, 1), False),
+    'ZYX': ((2, 1, 0), True),
+}
+
+
+def matrix_to_euler_pair(matrices, order='XYZ'):
+    """
+    Returns both Euler solutions in radians for matrices shaped (..., 4, 4) in a Blender rotation order.
+    
+    """
+    (i, j, k), parity = EULER_AXES[order]
+    mat = np.asarray(matrices, dtype=np.float64)[..., :3, :3]
+    mat = mat / np.linalg.norm(mat, axis=-2, keepdims=True)
+    cy = np.hypot(mat[..., i, i], mat[..., j, i])
+    
+    eul1 = np.empty(mat.shape[:-2] + (3,))
+    eul1[..., i] = np.arctan2(mat[..., k, j], mat[..., k, k])
+    eul1[..., j] = np.arctan2(-mat[..., k, i], cy)
+    eul1[..., k] = np.arctan2(mat[..., j, i], mat[..., i, i])
+    eul2 = np.empty_like(eul1)
+    eul2[..., i] = np.arctan2(-mat[..., k, j], -mat[..., k, k])
+    eul2[..., j] = np.arctan2(-mat[..., k, i], -cy)
+    eul2[..., k] = np.arctan2(-mat[..., j, i], -mat[..., i, i])
+    
+    # Gimbal lock
+    gimbal = cy <= 16.0 * np.finfo(np.float32).eps
+    if np.any(gimbal):
+        eul1[gimbal, i] = np.arctan2(-mat[gimbal][:, j, k], mat[gimbal][:, j, j])
+        eul1[gimbal, j] = np.arctan2(-mat[gimbal][:, k, i], cy[gimbal])
+        eul1[gimbal, k] = 0.0
+        eul2[gimbal] = eul1[gimbal]
+    if parity:
+        eul1 = -eul1
+        eul2 = -eul2
+    
+    return eul1, eul2
+
+
+def matrix_to_euler(matrices, order='XYZ'):
+    """
+    Returns Euler angles in radians for an array of matrices shaped (..., 4, 4).
+    
+    Matches mathutils.Matrix.to_euler(): the rotation part is normalized and, of
+    the two possible solutions, the one with the smallest angles is returned.
+    
+    """
+    eul1, eul2 = matrix_to_euler_pair(matrices, order)
+    
+    return np.where(
+        (np.abs(eul1).sum(axis=-1) > np.abs(eul2).sum(axis=-1))[..., None],
+        eul2,
+        eul1
+    )
+
+
+def continuous_euler(matrices, order='XYZ', previous=None):
+    """
+    Returns Euler angles in radians shaped (frames, ...) without jumps between frames.
+    
+    Of the two solutions of each frame, shifted by whole turns, the one
+    closest to the previous frame is kept, so angles may pass 180 degrees
+    instead of wrapping or flipping. previous holds the angles of the frame
+    before the first, to continue a sequence across chunks.
+    
+    """
+    eul1, eul2 = matrix_to_euler_pair(matrices, order)
+    if len(eul1) == 0:
+        return eul1
+    angles = np.empty_like(eul1)
+    if previous is None:
+        previous = np.where(
+            (np.abs(eul1[0]).sum(axis=-1) > np.abs(eul2[0]).sum(axis=-1))[..., None], eul2[0], eul1[0]
+        )
+    turn = 2.0 * np.pi
+    for t in range(len(eul1)):
+        candidate1 = eul1[t] + turn * np.round((previous - eul1[t]) / turn)
+        candidate2 = eul2[t] + turn * np.round((previous - eul2[t]) / turn)
+        closer = np.abs(candidate2 - previous).sum(axis=-1) < np.abs(candidate1 - previous).sum(axis=-1)
+        previous = angles[t] = np.where(closer[..., None], candidate2, candidate1)
+    
+    return angles
+
+
+def continuous_quaternions(quaternions, previous=None):
+    """
+    Returns quaternions shaped (frames, ..., 4) with signs flipped so consecutive frames never point apart.
+    
+    """
+    quaternions = np.array(quaternions, dtype=np.float64)
+    if len(quaternions) == 0:
+        return quaternions
+    if previous is not None:
+        quaternions = np.concatenate((np.asarray(previous, dtype=np.float64)[None], quaternions))
+    flips = (quaternions[1:] * quaternions[:-1]).sum(axis=-1) < 0.0
+    odd = np.cumsum(flips, axis=0) % 2 == 1
+    quaternions[1:][odd] *= -1.0
+    
+    return quaternions[1:] if previous is not None else quaternions
+
+
+def matrix_to_quaternion(matrices):
+    """
+    Returns WXYZ quaternions for an array of matrices shaped (..., 4, 4).
+    
+    The rotation part is normalized first and, like Blender's
+    mat3_normalized_to_quat(), the quaternion is computed from the largest of
+    W, X, Y and Z, judged by the diagonal, so half turns keep their axis. The
+    result has a non-negative W, matching mathutils.Matrix.to_quaternion().
+    
+    """
+    mat = np.asarray(matrices, dtype=np.float64)[..., :3, :3]
+    mat = mat / np.linalg.norm(mat, axis=-2, keepdims=True)
+    m00, m01, m02 = mat[..., 0, 0], mat[..., 0, 1], mat[..., 0, 2]
+    m10, m11, m12 = mat[..., 1, 0], mat[..., 1, 1], mat[..., 1, 2]
+    m20, m21, m22 = mat[..., 2, 0], mat[..., 2, 1], mat[..., 2, 2]
+    
+    def branch(trace, sign, largest, others):
+        # s is four times the largest component, signed so that W is not negative.
+        s = 2.0 * np.sqrt(np.maximum(trace, 1e-30)) * np.where(sign, -1.0, 1.0)
+        quat = np.empty(trace.shape + (4,))
+        quat[..., largest] = 0.25 * s
+        for index, value in others.items():
+            quat[..., index] = value / s
+        return quat
+    
+    quat_x = branch(1.0 + m00 - m11 - m22, m21 < m12, 1, {0: m21 - m12, 2: m10 + m01, 3: m02 + m20})
+    quat_y = branch(1.0 - m00 + m11 - m22, m02 < m20, 2, {0: m02 - m20, 1: m10 + m01, 3: m21 + m12})
+    quat_z = branch(1.0 - m00 - m11 + m22, m10 < m01, 3, {0: m10 - m01, 1: m02 + m20, 2: m21 + m12})
+    quat_w = branch(1.0 + m00 + m11 + m22, np.zeros(m00.shape, dtype=bool), 0, {1: m21 - m12, 2: m02 - m20, 3: m10 - m01})
+    quat = np.where(
+        (m22 < 0.0)[..., None],
+        np.where((m00 > m11)[..., None], quat_x, quat_y),
+        np.where((m00 < -m11)[..., None], quat_z, quat_w)
+    )
+    
+    return quat / np.linalg.norm(quat, axis=-1, keepdims=True)
+
+
+ANGLE_SPACES = [
+    ('ARMATURE', "Armature", "Rotation of each bone in armature space"),
+    ('PARENT', "Parent", "Joint angle of each bone relative to its parent bone"),
+    ('REST', "Rest Relative", "Joint angle relative to the bone's rest pose on its parent, zero at rest"),
+]
+ROTATION_ORDERS = [(order, order, "Euler rotation order " + order) for order in EULER_AXES]
+
+
+def angle_settings(scene=None, **overrides):
+    """
+    Returns the angle space, rotation order and continuity used for rotations.
+    
+    """
+    if scene is None:
+        scene = bpy.context.scene
+    settings = Object()
+    settings.space = getattr(scene, "measure_angle_space", 'ARMATURE')
+    settings.order = getattr(scene, "measure_rotation_order", 'XYZ')
+    settings.continuous = getattr(scene, "measure_continuous_angles", True)
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    
+    return settings
+
+
+def joint_matrices(matrices, parent_matrices, rest=None, parent_rest=None):
+    """
+    Returns child matrices relative to their parents, all shaped (frames, bones, 4, 4).
+    
+    With the rest matrices (bones, 4, 4) of both, the result is relative to
+    the child's rest pose on its parent, so it is the identity at rest.
+    
+    """
+    relative = np.linalg.inv(np.asarray(parent_matrices, dtype=np.float64)) @ np.asarray(matrices, dtype=np.float64)
+    if rest is not None:
+        rest_relative = np.linalg.inv(np.asarray(parent_rest, dtype=np.float64)) @ np.asarray(rest, dtype=np.float64)
+        relative = np.linalg.inv(rest_relative) @ relative
+    
+    return relative
+
+
+def bake_rotation_matrices(bake, space='ARMATURE', start=0, stop=None):
+    """
+    Returns the matrices of frame indices start up to stop whose rotation is reported for the angle space.
+    
+    """
+    matrices = bake.matrices[start:stop]
+    if space == 'PARENT':
+        return joint_matrices(matrices, bake.parent_matrices[start:stop])
+    if space == 'REST':
+        return joint_matrices(matrices, bake.parent_matrices[start:stop], bake.rest, bake.parent_rest)
+    return matrices
+
+
+def bake_rotations(bake, settings=None):
+    """
+    Returns rotations in degrees shaped (frames, bones, 3).
+    
+    The angle space, rotation order and continuity default to the scene's
+    settings. Continuous angles are unwrapped across the frames of the bake.
+    
+    """
+    if settings is None:
+        settings = angle_settings()
+    matrices = bake_rotation_matrices(bake, settings.space)
+    if settings.continuous:
+        return np.degrees(continuous_euler(matrices, settings.order))
+    return np.degrees(matrix_to_euler(matrices, settings.order))
+
+
+def bake_locations(bake):
+    """
+    Returns bone locations shaped (frames, bones, 3).
+    
+    """
+    return bake.matrices[..., :3, 3].astype(np.float64)
+
+
+def bake_quaternions(bake, settings=None):
+    """
+    Returns WXYZ bone rotations as quaternions shaped (frames, bones, 4).
+    
+    """
+    if settings is None:
+        settings = angle_settings()
+    quaternions = matrix_to_quaternion(bake_rotation_matrices(bake, settings.space))
+    if settings.continuous:
+        return continuous_quaternions(quaternions)
+    return quaternions
+
+
+LIMIT_LABELS = {
+    "extreme +50%": "extreme_max",
+    "average": "average",
+    "extreme -50%": "extreme_min",
+    "max angle": "max",
+    "min angle": "min",
+}
+
+
+def normalize_label(text):
+    """
+    Returns a sheet cell with line breaks and repeated spaces collapsed.
+    
+    """
+    return " ".join(text.replace("-\r\n", "-").replace("-\n", "-").split())
+
+
+def read_limit_sheet(source):
+    """
+    Returns joint limits read from a reference data sheet, keyed by joint name.
+    
+    The sheet holds blocks starting with an "Angle Type" row naming the axis
+    and the joints, followed by rows labelled Extreme +50%, Average,
+    Extreme -50%, Max Angle or Min Angle. The lower and upper limits are the
+    Min and Max Angle where given, otherwise the -50% and +50% extremes.
+    
+    """
+    limits = {}
+    joints = []
+    axis = 'Z'
+    for row in csv.reader(io.StringIO(read_table_text(source))):
+        cells = [normalize_label(cell) for cell in row]
+        if len(cells) < 2:
+            continue
+        if cells[1].lower().startswith("angle type"):
+            axis = cells[1].split()[-1].upper() if len(cells[1].split()) > 2 else 'Z'
+            joints = cells[2:]
+            for joint in joints:
+                if joint:
+                    limit = limits.setdefault(joint, Object())
+                    limit.name = joint
+                    limit.axis = axis
+                    limit.values = {}
+            continue
+        key = LIMIT_LABELS.get(cells[1].lower())
+        if key is None:
+            continue
+        for joint, cell in zip(joints, cells[2:]):
+            try:
+                limits[joint].values[key] = float(cell)
+            except (KeyError, ValueError):
+                pass
+    
+    for limit in limits.values():
+        values = limit.values
+        limit.lower = values.get("min", values.get("extreme_min", -np.inf))
+        limit.upper = values.get("max", values.get("extreme_max", np.inf))
+        limit.average = values.get("average", np.nan)
+    
+    return {name: limit for name, limit in limits.items() if np.isfinite(limit.lower) or np.isfinite(limit.upper)}
+
+
+def name_key(name):
+    return "".join(character for character in name.lower() if character.isalnum())
+
+
+def read_joint_map(source):
+    """
+    Returns joint to bone mappings from a table with columns joint, parent and child.
+    
+    Optional columns are axis (X, Y or Z, defaulting to the sheet's axis) and
+    offset, in degrees added to the measured angle so it matches the sheet's
+    convention. An empty parent measures the child in armature space.
+    
+    """
+    mapping = []
+    for row in csv.DictReader(io.StringIO(read_table_text(source))):
+        row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+        joint = Object()
+        joint.name = row["joint"]
+        joint.parent = row.get("parent") or None
+        joint.child = row["child"]
+        joint.axis = row.get("axis", "").upper() or None
+        joint.offset = float(row["offset"]) if row.get("offset") else 0.0
+        mapping.append(joint)
+    
+    return mapping
+
+
+def guess_joint_map(joint_names, armature):
+    """
+    Returns joint to bone mappings guessed from joint names and the armature's bone names.
+    
+    "Parent-Child" joints map to the two bones, "Bone: Description" joints to
+    the bone and its parent. Names are compared ignoring case, spaces and
+    punctuation. Joints without matching bones are left out.
+    
+    """
+    bones = {name_key(bone.name): bone for bone in armature.data.bones}
+    mapping = []
+    for name in joint_names:
+        parts = [part for part in name.split(":")[0].split("-") if part.strip()]
+        found = [bones.get(name_key(part)) for part in parts]
+        joint = Object()
+        joint.name = name
+        joint.axis = None
+        joint.offset = 0.0
+        if len(found) == 2 and all(found):
+            joint.parent, joint.child = found[0].name, found[1].name
+        elif len(found) == 1 and found[0] is not None:
+            joint.child = found[0].name
+            joint.parent = found[0].parent.name if found[0].parent else None
+        else:
+            continue
+        mapping.append(joint)
+    
+    return mapping
+
+
+def bake_joint_angles(bake, mapping, axes, order='XYZ', continuous=True):
+    """
+    Returns the angle in degrees of each mapped joint shaped (frames, joints).
+    
+    The child bone's pose is taken relative to the parent bone's pose and the
+    Euler angle about the joint's axis is kept, plus the joint's offset.
+    
+    """
+    identity = np.broadcast_to(np.eye(4), (len(bake.frames), len(mapping), 4, 4))
+    children = bake.matrices[:, [bake.names.index(joint.child) for joint in mapping]]
+    parents = identity.copy()
+    for j, joint in enumerate(mapping):
+        if joint.parent:
+            parents[:, j] = bake.matrices[:, bake.names.index(joint.parent)]
+    matrices = joint_matrices(children, parents)
+    if continuous:
+        angles = continuous_euler(matrices, order)
+    else:
+        angles = matrix_to_euler(matrices, order)
+    columns = np.array(["XYZ".index(axis) for axis in axes], dtype=np.intp)
+    
+    return np.degrees(np.take_along_axis(angles, columns[None, :, None], axis=2)[..., 0]) + np.array(
+        [joint.offset for joint in mapping]
+    )
+
+
+def check_joint_limits(frames, angles, lower, upper):
+    """
+    Returns where joint angles shaped (frames, joints) leave their lower and upper limits.
+    
+    The result holds the out of range mask, the signed excess beyond the
+    nearest limit (zero inside), and per joint the count and percentage of
+    frames out of range, the largest excess above and below, and the frame of
+    the largest excess.
+    
+    """
+    frames = np.asarray(frames)
+    angles = np.asarray(angles, dtype=np.float64)
+    lower = np.asarray(lower, dtype=np.float64)
+    upper = np.asarray(upper, dtype=np.float64)
+    
+    check = Object()
+    above = np.maximum(angles - upper, 0.0)
+    below = np.minimum(angles - lower, 0.0)
+    check.excess = above + below
+    check.out = check.excess != 0.0
+    check.out_count = check.out.sum(axis=0)
+    check.percent_out = 100.0 * check.out_count / max(len(frames), 1)
+    check.max_over = above.max(axis=0) if len(frames) else np.zeros(angles.shape[1])
+    check.max_under = below.min(axis=0) if len(frames) else np.zeros(angles.shape[1])
+    check.worst_frame = frames[np.abs(check.excess).argmax(axis=0)] if len(frames) else np.zeros(angles.shape[1])
+    
+    return check
+
+
+LIMIT_REPORT_HEADER = [
+    'trial', 'joint', 'parent', 'child', 'axis', 'lower', 'upper', 'frames',
+    'frames_out', 'percent_out', 'max_over', 'max_under', 'worst_frame', 'angle_min', 'angle_max'
+]
+
+
+def limit_report_rows(trial, mapping, axes, limits, frames, angles, check):
+    """
+    Yields one summary row per joint of a limit check.
+    
+    """
+    angle_min = angles.min(axis=0) if len(frames) else np.full(len(mapping), np.nan)
+    angle_max = angles.max(axis=0) if len(frames) else np.full(len(mapping), np.nan)
+    for j, joint in enumerate(mapping):
+        limit = limits[joint.name]
+        yield [
+            trial, joint.name, joint.parent or "", joint.child, axes[j], limit.lower, limit.upper, len(frames),
+            int(check.out_count[j]), "{:.2f}".format(check.percent_out[j]),
+            "{:.3f}".format(check.max_over[j]), "{:.3f}".format(check.max_under[j]),
+            check.worst_frame[j].item() if check.out_count[j] else "",
+            "{:.3f}".format(angle_min[j]), "{:.3f}".format(angle_max[j])
+        ]
+
+
+def limit_frame_rows(trial, mapping, frames, angles, check):
+    """
+    Yields one row per joint and frame out of range, with the angle and signed excess.
+    
+    """
+    frame_indices, joint_indices = np.nonzero(check.out)
+    for i, j in zip(frame_indices.tolist(), joint_indices.tolist()):
+        yield [trial, mapping[j].name, frames[i].item(), "{:.3f}".format(angles[i, j]), "{:.3f}".format(check.excess[i, j])]
+
+
+def run_limit_check(scene, armature, limits, mapping, frame_start, frame_end, trial=""):
+    """
+    Bakes the mapped bones over a frame range and checks their joint angles against the limits.
+    
+    Returns the mapped joints, their axes, the frames, the angles and the check.
+    
+    """
+    mapping = [joint for joint in mapping if joint.name in limits]
+    axes = [joint.axis or limits[joint.name].axis for joint in mapping]
+    names = list(dict.fromkeys(
+        [joint.child for joint in mapping] + [joint.parent for joint in mapping if joint.parent]
+    ))
+    bake = bake_pose_bones(scene, armature_pose_bones(armature, names), frame_start, frame_end)
+    settings = angle_settings(scene)
+    angles = bake_joint_angles(bake, mapping, axes, settings.order, settings.continuous)
+    check = check_joint_limits(
+        bake.frames, angles,
+        [limits[joint.name].lower for joint in mapping],
+        [limits[joint.name].upper for joint in mapping]
+    )
+    
+    result = Object()
+    result.trial = trial
+    result.mapping = mapping
+    result.axes = axes
+    result.frames = bake.frames
+    result.angles = angles
+    result.check = check
+    
+    return result
+
+
+def armature_limit_mapping(armature, limits, map_source=None):
+    """
+    Returns the mapped joints of the sheet, from a table or guessed from the bone names without one.
+    
+    Raises a KeyError if a mapped joint names bones the armature does not have.
+    
+    """
+    if map_source:
+        mapping = read_joint_map(map_source)
+    else:
+        mapping = guess_joint_map(limits.keys(), armature)
+    mapping = [joint for joint in mapping if joint.name in limits]
+    missing = list(dict.fromkeys(
+        name for joint in mapping for name in (joint.child, joint.parent)
+        if name and name not in armature.pose.bones
+    ))
+    if missing:
+        raise KeyError("Bones of the joint map not found in {}: {}".format(armature.name, ", ".join(missing)))
+    
+    return mapping
+
+
+def check_action_limits(scene, armature, limits, mapping, actions, frame_start=None, frame_end=None):
+    """
+    Checks every action as a trial of the armature and returns the results.
+    
+    Without a frame range, each action is checked over its own frame range.
+    The armature's action is restored afterwards.
+    
+    """
+    animation = armature.animation_data_create()
+    initial_action = animation.action
+    results = []
+    try:
+        for action in actions:
+            animation.action = action
+            start, end = (int(frame) for frame in action.frame_range)
+            results.append(run_limit_check(
+                scene, armature, limits, mapping,
+                start if frame_start is None else frame_start, end if frame_end is None else frame_end, action.name
+            ))
+    finally:
+        animation.action = initial_action
+    
+    return results
+
+
+def write_limit_report(path, results, limits, frames_path=None):
+    """
+    Writes the summary of limit checks of one or more trials, and optionally every frame out of range.
+    
+    """
+    with open(path, mode='w', newline='') as writer:
+        writer = csv.writer(writer)
+        writer.writerow(LIMIT_REPORT_HEADER)
+        for result in results:
+            writer.writerows(limit_report_rows(
+                result.trial, result.mapping, result.axes, limits, result.frames, result.angles, result.check
+            ))
+    if frames_path:
+        with open(frames_path, mode='w', newline='') as writer:
+            writer = csv.writer(writer)
+            writer.writerow(['trial', 'joint', 'frame', 'angle', 'excess'])
+            for result in results:
+                writer.writerows(limit_frame_rows(result.trial, result.mapping, result.frames, result.angles, result.check))
+
+
+def true_runs(mask):
+    """
+    Returns the start and end (exclusive) indices of the runs of True in a boolean array.
+    
+    """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def clean_contacts(contact, min_samples=2):
+    """
+    Returns contacts without stance or swing phases shorter than min_samples.
+    
+    Short swings are filled first, then short stances removed, so a foot
+    briefly lifted by noise during stance stays in contact.
+    
+    """
+    contact = contact.copy()
+    starts, ends = true_runs(~contact)
+    short = (ends - starts < min_samples) & (starts > 0) & (ends < len(contact))
+    for start, end in zip(starts[short].tolist(), ends[short].tolist()):
+        contact[start:end] = True
+    starts, ends = true_runs(contact)
+    for start, end in zip(starts[ends - starts < min_samples].tolist(), ends[ends - starts < min_samples].tolist()):
+        contact[start:end] = False
+    
+    return contact
+
+
+def detect_contacts(positions, times, height_fraction=0.1, speed_fraction=0.2, min_samples=2):
+    """
+    Returns which feet touch the ground each sample, from foot positions shaped (samples, feet, 3).
+    
+    A foot is in contact while its height is within height_fraction of its
+    height range above its lowest point and its speed is below speed_fraction
+    of its fast (95th percentile) speed. Heights are world Z.
+    
+    """
+    heights = positions[..., 2]
+    lowest = heights.min(axis=0)
+    height_range = heights.max(axis=0) - lowest
+    if len(times) > 1:
+        speeds = np.linalg.norm(np.gradient(positions, times, axis=0), axis=-1)
+    else:
+        speeds = np.zeros(heights.shape)
+    fast = np.percentile(speeds, 95, axis=0) if len(times) else np.zeros(heights.shape[1:])
+    contact = (heights - lowest <= height_fraction * height_range) & (speeds <= speed_fraction * fast)
+    
+    return np.stack([clean_contacts(contact[:, j], min_samples) for j in range(contact.shape[1])], axis=1)
+
+
+def segment_strides(contact, positions, times):
+    """
+    Returns the strides of one foot, from touchdown to the next touchdown.
+    
+    Strides hold start and end sample indices, duration, frequency, length
+    (horizontal distance between touchdown positions), speed and duty factor
+    (fraction of the stride in contact), as arrays over strides.
+    
+    """
+    touchdowns = np.flatnonzero(contact[1:] & ~contact[:-1]) + 1
+    strides = Object()
+    strides.start = touchdowns[:-1]
+    strides.end = touchdowns[1:]
+    strides.duration = times[strides.end] - times[strides.start]
+    strides.frequency = 1.0 / strides.duration
+    strides.length = np.linalg.norm(positions[strides.end, :2] - positions[strides.start, :2], axis=-1)
+    strides.speed = strides.length / strides.duration
+    in_contact = np.concatenate(([0], np.cumsum(contact)))
+    strides.duty_factor = (in_contact[strides.end] - in_contact[strides.start]) / (strides.end - strides.start)
+    
+    return strides
+
+
+def normalize_cycles(values, starts, ends, points=101):
+    """
+    Returns values shaped (samples, ...) resampled to points from 0 to 100% of every cycle.
+    
+    The result is shaped (cycles, points, ...), linearly interpolated
+    between samples for all cycles at once.
+    
+    """
+    phase = np.linspace(0.0, 1.0, points)
+    position = starts[:, None] + phase[None] * (ends - starts)[:, None]
+    lower = np.minimum(np.floor(position).astype(np.int64), len(values) - 2)
+    fraction = (position - lower).reshape(position.shape + (1,) * (values.ndim - 1))
+    
+    return values[lower] * (1.0 - fraction) + values[lower + 1] * fraction
+
+
+def gait_analysis(bake, feet, settings=None, reference=None, height_fraction=0.1, speed_fraction=0.2,
+                  min_samples=2, points=101):
+    """
+    Returns foot contacts, strides and cycle normalized joint angles of a bake.
+    
+    feet are bake bone names whose tails touch the ground. Strides are
+    segmented per foot; joint angles of all bones, following the angle
+    settings, are normalized over the strides of the reference foot (the
+    first by default) and averaged.
+    
+    """
+    feet = list(feet)
+    columns = [bake.names.index(name) for name in feet]
+    times = np.asarray(bake.frames, dtype=np.float64) / bake.fps
+    positions = bake.tails[:, columns].astype(np.float64)
+    if bake.armature is not None:
+        world = np.array(bake.armature.matrix_world, dtype=np.float64)
+        positions = positions @ world[:3, :3].T + world[:3, 3]
+    
+    gait = Object()
+    gait.names = list(bake.names)
+    gait.feet = feet
+    gait.frames = bake.frames
+    gait.fps = bake.fps
+    gait.points = np.linspace(0.0, 100.0, points)
+    with profile_phase("convert"):
+        gait.contact = detect_contacts(positions, times, height_fraction, speed_fraction, min_samples)
+        gait.strides = [segment_strides(gait.contact[:, j], positions[:, j], times) for j in range(len(feet))]
+        reference = gait.strides[feet.index(reference) if reference else 0]
+        gait.cycles = normalize_cycles(bake_rotations(bake, settings), reference.start, reference.end, points)
+    gait.mean = gait.cycles.mean(axis=0) if len(gait.cycles) else np.full((points, len(bake.names), 3), np.nan)
+    gait.std = gait.cycles.std(axis=0) if len(gait.cycles) else np.full((points, len(bake.names), 3), np.nan)
+    
+    return gait
+
+
+def bake_gait(scene, armature, pose_bones, feet, frame_start, frame_end, samples_per_frame=1, **options):
+    """
+    Bakes the pose bones and feet over a frame range and returns their gait analysis.
+    
+    feet are comma separated bone name patterns; options are passed to gait_analysis().
+    Raises a KeyError if no bone matches or the reference is not a matched foot.
+    
+    """
+    feet = match_names([pb.name for pb in armature.pose.bones], feet)
+    if not feet:
+        raise KeyError("No foot bones match in " + armature.name)
+    reference = options.get("reference")
+    if reference and reference not in feet:
+        raise KeyError("Reference foot {} is not one of the feet: {}".format(reference, ", ".join(feet)))
+    names = list(dict.fromkeys([pb.name for pb in pose_bones] + feet))
+    bake = bake_pose_bones(
+        scene, armature_pose_bones(armature, names), frame_start, frame_end, samples_per_frame=samples_per_frame
+    )
+    
+    return gait_analysis(bake, feet, angle_settings(scene), **options)
+
+
+def gait_message(gait):
+    """
+    Returns a one line summary of the strides of every foot.
+    
+    """
+    return ", ".join(
+        "{}: {} strides, {:.2f} Hz, duty factor {:.2f}".format(
+            foot, len(strides.start), np.mean(strides.frequency), np.mean(strides.duty_factor)
+        ) if len(strides.start) else foot + ": no strides"
+        for foot, strides in zip(gait.feet, gait.strides)
+    )
+
+
+STRIDE_CSV_HEADER = [
+    'foot', 'stride', 'start_frame', 'end_frame', 'duration', 'frequency', 'length', 'speed', 'duty_factor'
+]
+
+
+def write_gait_report(gait, path, cycles_path=None):
+    """
+    Writes one row per stride of every foot, and optionally the mean and standard deviation cycle.
+    
+    Cycles are written as CSV with one row per percent and bone, or as an
+    .npz archive that also holds every normalized cycle.
+    
+    """
+    frames = np.asarray(gait.frames)
+    with profile_phase("write"), open(path, mode='w', newline='') as writer:
+        writer = csv.writer(writer)
+        writer.writerow(STRIDE_CSV_HEADER)
+        for foot, strides in zip(gait.feet, gait.strides):
+            for k in range(len(strides.start)):
+                writer.writerow([
+                    foot, k + 1, frames[strides.start[k]].item(), frames[strides.end[k]].item(),
+                    *("%.6f" % value for value in (
+                        strides.duration[k], strides.frequency[k], strides.length[k],
+                        strides.speed[k], strides.duty_factor[k]
+                    ))
+                ])
+    if not cycles_path:
+        return
+    if cycles_path.lower().endswith(".npz"):
+        with profile_phase("write"):
+            np.savez(
+                cycles_path, names=np.array(gait.names, dtype=str), percent=gait.points,
+                cycles=gait.cycles.astype(np.float32), mean=gait.mean, std=gait.std
+            )
+        return
+    with profile_phase("write"), open(cycles_path, mode='w', newline='') as writer:
+        writer = csv.writer(writer)
+        writer.writerow(['percent', 'name', 'X', 'Y', 'Z', 'X_std', 'Y_std', 'Z_std'])
+        values = np.char.mod("%.3f", np.concatenate((gait.mean, gait.std), axis=-1)).tolist()
+        for i, percent in enumerate(gait.points.tolist()):
+            for j, name in enumerate(gait.names):
+                writer.writerow(["%g" % percent, name] + values[i][j])
+
+
+def current_bone_location_change(bake, index=0):
+    locations = bake_locations(bake)
+    
+    return mathutils.Vector(locations[-1, index] - locations[0, index])
+
+
+def rotation_stats(rotations, frames):
+    """
+    Returns per-bone statistics of rotations shaped (frames, bones, 3).
+    
+    Every statistic is shaped (bones, 3). min_frame and max_frame hold the frame
+    numbers where the extremes occur and travel is the change from the first to
+    the last frame.
+    
+    """
+    rotations = np.asarray(rotations, dtype=np.float64)
+    frames = np.asarray(frames)
+    
+    stats = Object()
+    stats.min = rotations.min(axis=0)
+    stats.max = rotations.max(axis=0)
+    stats.mean = rotations.mean(axis=0)
+    stats.range = stats.max - stats.min
+    stats.min_frame = frames[rotations.argmin(axis=0)]
+    stats.max_frame = frames[rotations.argmax(axis=0)]
+    stats.travel = rotations[-1] - rotations[0]
+    
+    return stats
+
+
+def current_bone_rot_change(bake, index=0, stats=None):
+    if stats is None:
+        stats = rotation_stats(bake_rotations(bake)[:, [index]], bake.frames)
+        index = 0
+    x, y, z = stats.travel[index].tolist()
+
+    return (x, y, z)
+
+
+def current_bone_rot_min_max(bake, index=0, stats=None):
+    if stats is None:
+        stats = rotation_stats(bake_rotations(bake)[:, [index]], bake.frames)
+        index = 0
+            
+    bonedata = Object()
+    bonedata.min = tuple(stats.min[index].tolist())
+    bonedata.max = tuple(stats.max[index].tolist())
+    bonedata.mean = tuple(stats.mean[index].tolist())
+    bonedata.range = tuple(stats.range[index].tolist())
+    bonedata.min_frame = tuple(stats.min_frame[index].tolist())
+    bonedata.max_frame = tuple(stats.max_frame[index].tolist())
+    
+    return(bonedata)
+
+
+# Per-bone rotations and locations of the measure range, recorded as frames are played or scrubbed.
+range_recorder = Object()
+range_recorder.active = False
+
+
+def start_range_recording(scene, pose_bones):
+    """
+    Starts recording the rotations and locations of the pose bones from frame changes.
+    
+    Arrays are allocated once for the measure range and the scene's angle
+    settings are kept with them. A bitmap marks the frames that have been
+    seen, so each frame counts once however often it is played or scrubbed.
+    
+    """
+    pose_bones = list(pose_bones)
+    frame_count = max(scene.measure_end_frame - scene.measure_start_frame + 1, 0)
+    bone_count = len(pose_bones)
+    
+    recorder = range_recorder
+    recorder.active = bone_count > 0
+    recorder.scene_name = scene.name
+    recorder.armature_name = pose_bones[0].id_data.name if pose_bones else ""
+    recorder.names = [pb.name for pb in pose_bones]
+    recorder.frame_start = scene.measure_start_frame
+    recorder.frame_end = scene.measure_end_frame
+    recorder.settings = angle_settings(scene)
+    recorder.sample = new_bake(scene, pose_bones, np.zeros(1, dtype=np.int32))
+    recorder.seen = np.zeros(frame_count, dtype=bool)
+    recorder.matrices = np.zeros((frame_count, bone_count, 3, 3), dtype=np.float32)
+    recorder.locations = np.zeros((frame_count, bone_count, 3))
+    if recorder.active:
+        record_current_frame(scene)
+
+
+def stop_range_recording():
+    range_recorder.active = False
+    range_recorder.sample = None
+
+
+def record_samples(frames, matrices, locations):
+    """
+    Adds rotation matrices shaped (frames, bones, 3, 3) and locations shaped (frames, bones, 3) to the recording.
+    
+    The matrices are in the recorder's angle space. Frames outside the range
+    or already seen are ignored.
+    
+    """
+    recorder = range_recorder
+    frames = np.asarray(frames)
+    indices = frames - recorder.frame_start
+    keep = (indices >= 0) & (indices < len(recorder.seen))
+    keep[keep] = ~recorder.seen[indices[keep]]
+    if not np.any(keep):
+        return
+    indices = indices[keep]
+    recorder.seen[indices] = True
+    recorder.matrices[indices] = np.asarray(matrices)[keep][..., :3, :3]
+    recorder.locations[indices] = np.asarray(locations, dtype=np.float64)[keep]
+
+
+def record_bake(bake):
+    """
+    Adds the frames of a bake of the recorded bones to the recording.
+    
+    """
+    indices = [bake.names.index(name) for name in range_recorder.names]
+    matrices = bake_rotation_matrices(bake, range_recorder.settings.space)
+    record_samples(bake.frames, matrices[:, indices], bake_locations(bake)[:, indices])
+
+
+def record_current_frame(scene):
+    recorder = range_recorder
+    i = scene.frame_current - recorder.frame_start
+    if i < 0 or i >= len(recorder.seen) or recorder.seen[i]:
+        return
+    # Resolve the armature by name, references do not survive undo.
+    armature = bpy.data.objects.get(recorder.armature_name)
+    if armature is None or armature.pose is None:
+        stop_range_recording()
+        return
+    recorder.sample.armature = armature
+    recorder.sample.frames[0] = scene.frame_current
+    sample_pose(recorder.sample, 0)
+    record_samples(
+        recorder.sample.frames, bake_rotation_matrices(recorder.sample, recorder.settings.space),
+        bake_locations(recorder.sample)
+    )
+
+
+def recording_settings_match(scene):
+    """
+    Returns whether the recording covers the scene's measure range with its current angle settings.
+    
+    """
+    recorder = range_recorder
+    return (
+        (recorder.frame_start, recorder.frame_end) == (scene.measure_start_frame, scene.measure_end_frame)
+        and vars(recorder.settings) == vars(angle_settings(scene))
+    )
+
+
+@persistent
+def record_range_frame(scene, *args):
+    recorder = range_recorder
+    if not recorder.active or scene.name != recorder.scene_name:
+        return
+    if not recording_settings_match(scene):
+        # A new range or angle settings start the recording over.
+        armature = bpy.data.objects.get(recorder.armature_name)
+        if armature is None:
+            stop_range_recording()
+            return
+        pose_bones = [armature.pose.bones[name] for name in recorder.names if name in armature.pose.bones]
+        start_range_recording(scene, pose_bones)
+        return
+    record_current_frame(scene)
+
+
+def recording_covers(scene, name):
+    """
+    Returns whether the recorder tracks the bone over the scene's measure range and angle settings.
+    
+    """
+    recorder = range_recorder
+    return (
+        recorder.active
+        and recorder.scene_name == scene.name
+        and recording_settings_match(scene)
+        and name in recorder.names
+    )
+
+
+def missing_recorded_frames():
+    """
+    Returns the frames of the measure range that have not been recorded yet.
+    
+    """
+    return (np.flatnonzero(~range_recorder.seen) + range_recorder.frame_start).astype(np.int32)
+
+
+def recorded_stats():
+    """
+    Returns the recorded statistics with the same attributes as rotation_stats().
+    
+    The recorded frames are converted in frame order with the recorder's
+    angle settings, so continuous angles are unwrapped as in a bake of the
+    range. Travel and loc_change, the location travel of each bone, are NaN
+    until the first and last frames of the range are recorded.
+    
+    """
+    recorder = range_recorder
+    seen = recorder.seen
+    bone_count = len(recorder.names)
+    if not np.any(seen):
+        stats = Object()
+        for key in ("min", "max", "mean", "range", "travel"):
+            setattr(stats, key, np.full((bone_count, 3), np.nan))
+        stats.min_frame = stats.max_frame = np.zeros((bone_count, 3), dtype=np.int32)
+        stats.loc_change = np.full((bone_count, 3), np.nan)
+        return stats
+    
+    settings = recorder.settings
+    matrices = recorder.matrices[seen]
+    if settings.continuous:
+        rotations = np.degrees(continuous_euler(matrices, settings.order))
+    else:
+        rotations = np.degrees(matrix_to_euler(matrices, settings.order))
+    stats = rotation_stats(rotations, np.flatnonzero(seen) + recorder.frame_start)
+    locations = recorder.locations[seen]
+    stats.loc_change = locations[-1] - locations[0]
+    if not (seen[0] and seen[-1]):
+        stats.travel = np.full_like(stats.travel, np.nan)
+        stats.loc_change = np.full_like(stats.loc_change, np.nan)
+    
+    return stats
+
+
+def toggle_range_recording(self, context):
+    if self.record_range_stats:
+        start_range_recording(context.scene, pose_bones_to_bake(context))
+    else:
+        stop_range_recording()
+
+
+def bmesh_copy_from_object(obj, transform=True, triangulate=True, apply_modifiers=False):
+    """
+    Returns a transformed, triangulated copy of the mesh
+    
+    """
+    assert(obj.type == 'MESH')
+    if apply_modifiers and obj.modifiers:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        obj_eval = obj.evaluated_get(depsgraph)
+        me = obj_eval.to_mesh()
+        bm = bmesh.new()
+        bm.from_mesh(me)
+        obj_eval.to_mesh_clear()
+    else:
+        me = obj.data
+        if obj.mode == 'EDIT':
+            bm_orig = bmesh.from_edit_mesh(me)
+            bm = bm_orig.copy()
+        else:
+            bm = bmesh.new()
+            bm.from_mesh(me)
+
+    if transform:
+        bm.transform(obj.matrix_world)
+
+    if triangulate:
+        bmesh.ops.triangulate(bm, faces=bm.faces)
+
+    return bm
+
+
+def current_obj_volume(obj=None):
+    """
+    Returns final volume of a mesh object, the active object by default.
+    
+    """
+    if obj is None:
+        obj = bpy.context.active_object
+    volume, area = mesh_volume_area(obj)
+
+    return abs(volume)
+
+
+def mesh_triangles(obj, depsgraph):
+    """
+    Returns the evaluated world space vertex coordinates and triangle vertex indices of a mesh.
+    
+    Both are read with foreach_get, coordinates shaped (vertices, 3) and
+    triangles shaped (triangles, 3).
+    
+    """
+    if obj.mode == 'EDIT':
+        obj.update_from_editmode()
+    mesh = obj.evaluated_get(depsgraph).data
+    triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", triangles)
+    
+    return mesh_world_coords(obj, depsgraph), triangles.reshape(-1, 3)
+
+
+def mesh_world_coords(obj, depsgraph, buffer=None):
+    """
+    Returns the evaluated vertex coordinates of a mesh in world space, shaped (vertices, 3).
+    
+    An existing float32 buffer of the right size can be passed to avoid allocations.
+    
+    """
+    obj_eval = obj.evaluated_get(depsgraph)
+    vertices = obj_eval.data.vertices
+    if buffer is None or buffer.size != len(vertices) * 3:
+        buffer = np.empty(len(vertices) * 3, dtype=np.float32)
+    vertices.foreach_get("co", buffer)
+    world = np.array(obj_eval.matrix_world, dtype=np.float64)
+    
+    return buffer.reshape(-1, 3) @ world[:3, :3].T + world[:3, 3]
+
+
+def triangles_volume_area(coords, triangles):
+    """
+    Returns the signed volume and surface area enclosed by triangles.
+    
+    The volume is positive for closed meshes with outward facing normals.
+    
+    """
+    v0 = coords[triangles[:, 0]]
+    v1 = coords[triangles[:, 1]]
+    v2 = coords[triangles[:, 2]]
+    volume = np.einsum("ij,ij->", v0, np.cross(v1, v2)) / 6.0
+    area = 0.5 * np.linalg.norm(np.cross(v1 - v0, v2 - v0), axis=1).sum()
+    
+    return float(volume), float(area)
+
+
+def mesh_volume_area(obj, depsgraph=None):
+    """
+    Returns the signed volume and surface area of the evaluated mesh in world space.
+    
+    """
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    coords, triangles = mesh_triangles(obj, depsgraph)
+    
+    return triangles_volume_area(coords, triangles)
+
+
+def meshes_volume_area(objects):
+    """
+    Returns the volume and area of every mesh object, as arrays in object order.
+    
+    """
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    results = np.array([mesh_volume_area(obj, depsgraph) for obj in objects], dtype=np.float64)
+    if len(results) == 0:
+        return np.zeros(0), np.zeros(0)
+    
+    return np.abs(results[:, 0]), results[:, 1]
+
+
+def bake_mesh_volume_area(scene, objects, frame_start, frame_end, dependencies_only=None):
+    """
+    Returns the volume and area of each mesh object for every frame in a range.
+    
+    Triangles are read once per object and every frame only re-reads the
+    deformed vertex coordinates into reused buffers. Unless disabled, only the
+    meshes and the objects they depend on are evaluated. The result holds
+    names, frames, fps and volume and area arrays shaped (frames, objects).
+    
+    """
+    objects = list(objects)
+    frames = np.arange(frame_start, frame_end + 1, dtype=np.int32)
+    
+    series = Object()
+    series.names = [obj.name for obj in objects]
+    series.frames = frames
+    series.fps = scene.render.fps
+    series.volume = np.zeros((len(frames), len(objects)))
+    series.area = np.zeros((len(frames), len(objects)))
+    if not objects or len(frames) == 0:
+        return series
+    if dependencies_only is None:
+        dependencies_only = scene.measure_armature_only
+    
+    triangles = [None] * len(objects)
+    buffers = [None] * len(objects)
+    coords = [None] * len(objects)
+    initial_frame = scene.frame_current
+    profile_frames(len(frames))
+    with dependencies_only_evaluation(scene, objects) if dependencies_only else nullcontext(), profile_phase("evaluate"):
+        for i, frame in enumerate(frames):
+            scene.frame_set(int(frame))
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+            for j, obj in enumerate(objects):
+                obj_eval = obj.evaluated_get(depsgraph)
+                vertices = obj_eval.data.vertices
+                if triangles[j] is None or buffers[j].size != len(vertices) * 3:
+                    # Topology is read again only if the vertex count changes.
+                    coords[j], triangles[j] = mesh_triangles(obj, depsgraph)
+                    buffers[j] = np.empty(len(vertices) * 3, dtype=np.float32)
+                else:
+                    vertices.foreach_get("co", buffers[j])
+                    world = np.array(obj_eval.matrix_world, dtype=np.float64)
+                    np.matmul(buffers[j].reshape(-1, 3), world[:3, :3].T, out=coords[j])
+                    coords[j] += world[:3, 3]
+                with profile_phase("convert"):
+                    series.volume[i, j], series.area[i, j] = triangles_volume_area(coords[j], triangles[j])
+    scene.frame_set(initial_frame)
+    
+    series.volume = np.abs(series.volume)
+    
+    return series
+
+
+def write_mesh_series(series, path, file_format):
+    """
+    Writes per-frame mesh volumes and areas in the given export format.
+    
+    """
+    columns = {
+        "volume": series.volume[..., None],
+        "area": series.area[..., None]
+    }
+    write_columns(path, series.frames, series.fps, series.names, columns, file_format, "%.6f")
+
+
+def write_columns(path, frames, fps, names, columns, file_format, float_format="%.3f"):
+    """
+    Writes columns shaped (frames, names, components) in the given export format.
+    
+    """
+    if file_format == 'CSV':
+        write_columns_csv(path, frames, fps, names, columns, float_format)
+    elif file_format == 'NPZ':
+        write_columns_npz(path, frames, fps, names, columns)
+    elif file_format == 'NPY':
+        write_columns_npy(path, frames, fps, names, columns)
+    else:
+        raise ValueError("Unknown export format: " + str(file_format))
+
+
+def overlapping_pairs(lower, upper, muscles):
+    """
+    Returns the index pairs of objects whose bounding boxes overlap, at least one of them a muscle.
+    
+    lower and upper are the box corners shaped (objects, 3), muscles a
+    boolean mask of the objects that are muscles.
+    
+    """
+    overlap = np.all((lower[:, None] <= upper[None]) & (lower[None] <= upper[:, None]), axis=2)
+    overlap &= muscles[:, None] | muscles[None]
+    
+    return np.argwhere(np.triu(overlap, k=1))
+
+
+def penetration_depth(coords, vertices, other_tree):
+    """
+    Returns the deepest distance of the given vertices inside the other mesh, and how many are inside.
+    
+    A vertex is inside if it lies behind the face of the other mesh nearest
+    to it, so meshes need consistent outward facing normals.
+    
+    """
+    depth = 0.0
+    inside = 0
+    for co in coords[vertices].tolist():
+        location, normal, index, distance = other_tree.find_nearest(co)
+        if location is None:
+            continue
+        if (co[0] - location[0]) * normal[0] + (co[1] - location[1]) * normal[1] + (co[2] - location[2]) * normal[2] < 0.0:
+            inside += 1
+            depth = max(depth, distance)
+    
+    return depth, inside
+
+
+def bake_collisions(scene, muscles, obstacles, frame_start, frame_end, min_depth=0.0, dependencies_only=None):
+    """
+    Returns the muscle-muscle and muscle-obstacle interpenetrations for every frame in a range.
+    
+    Each frame the world space bounding boxes of all meshes are compared at
+    once and BVH trees are only built for meshes in an overlapping pair. A
+    mesh's tree is reused while its coordinates do not change, as BVHTree
+    cannot be refit. Triangle pairs reported by BVHTree.overlap() are then
+    measured by how deep the vertices of each mesh lie inside the other. The
+    result holds names, frames, fps and one row per penetrating pair and
+    frame with the frame index, both object indices, the number of
+    intersecting triangle pairs, vertices inside and the depth.
+    
+    """
+    objects = list(muscles) + list(obstacles)
+    is_muscle = np.arange(len(objects)) < len(muscles)
+    frames = np.arange(frame_start, frame_end + 1, dtype=np.int32)
+    
+    report = Object()
+    report.names = [obj.name for obj in objects]
+    report.frames = frames
+    report.fps = scene.render.fps
+    report.rows = []
+    if len(objects) < 2 or len(frames) == 0:
+        return report
+    if dependencies_only is None:
+        dependencies_only = scene.measure_armature_only
+    
+    triangles = [None] * len(objects)
+    polygons = [None] * len(objects)
+    buffers = [None] * len(objects)
+    coords = [None] * len(objects)
+    trees = [None] * len(objects)
+    tree_coords = [None] * len(objects)
+    lower = np.zeros((len(objects), 3))
+    upper = np.zeros((len(objects), 3))
+    initial_frame = scene.frame_current
+    profile_frames(len(frames))
+    with dependencies_only_evaluation(scene, objects) if dependencies_only else nullcontext():
+        for i, frame in enumerate(frames):
+            with profile_phase("evaluate"):
+                scene.frame_set(int(frame))
+                depsgraph = bpy.context.evaluated_depsgraph_get()
+                for j, obj in enumerate(objects):
+                    obj_eval = obj.evaluated_get(depsgraph)
+                    vertices = obj_eval.data.vertices
+                    if triangles[j] is None or buffers[j].size != len(vertices) * 3:
+                        # Topology is read again only if the vertex count changes.
+                        coords[j], triangles[j] = mesh_triangles(obj, depsgraph)
+                        polygons[j] = triangles[j].tolist()
+                        buffers[j] = np.empty(len(vertices) * 3, dtype=np.float32)
+                        trees[j] = None
+                    else:
+                        vertices.foreach_get("co", buffers[j])
+                        world = np.array(obj_eval.matrix_world, dtype=np.float64)
+                        coords[j] = buffers[j].reshape(-1, 3) @ world[:3, :3].T + world[:3, 3]
+                    if len(coords[j]):
+                        lower[j] = coords[j].min(axis=0)
+                        upper[j] = coords[j].max(axis=0)
+                    else:
+                        lower[j], upper[j] = np.inf, -np.inf
+            
+            with profile_phase("collide"):
+                pairs = overlapping_pairs(lower, upper, is_muscle)
+                for j in np.unique(pairs):
+                    if trees[j] is None or not np.array_equal(tree_coords[j], coords[j]):
+                        trees[j] = BVHTree.FromPolygons(coords[j].tolist(), polygons[j], all_triangles=True)
+                        tree_coords[j] = coords[j]
+                for a, b in pairs.tolist():
+                    overlap = trees[a].overlap(trees[b])
+                    if not overlap:
+                        continue
+                    overlap = np.array(overlap, dtype=np.int64)
+                    depth_a, inside_a = penetration_depth(
+                        coords[a], np.unique(triangles[a][overlap[:, 0]]), trees[b]
+                    )
+                    depth_b, inside_b = penetration_depth(
+                        coords[b], np.unique(triangles[b][overlap[:, 1]]), trees[a]
+                    )
+                    depth = max(depth_a, depth_b)
+                    if depth >= min_depth:
+                        report.rows.append((i, a, b, len(overlap), inside_a + inside_b, depth))
+    scene.frame_set(initial_frame)
+    
+    return report
+
+
+def collision_summary(report):
+    """
+    Returns one row per colliding pair with the frames in contact, the maximum depth and its frame.
+    
+    Pairs are sorted by maximum depth, deepest first.
+    
+    """
+    pairs = {}
+    for i, a, b, triangle_count, inside, depth in report.rows:
+        pair = pairs.setdefault((a, b), [0, 0.0, None])
+        pair[0] += 1
+        if pair[2] is None or depth > pair[1]:
+            pair[1] = depth
+            pair[2] = report.frames[i].item()
+    
+    return sorted(
+        ([report.names[a], report.names[b], count, depth, frame] for (a, b), (count, depth, frame) in pairs.items()),
+        key=lambda row: -row[3]
+    )
+
+
+COLLISION_CSV_HEADER = ['frame', 'timecode', 'object_a', 'object_b', 'triangle_pairs', 'vertices_inside', 'depth']
+COLLISION_SUMMARY_HEADER = ['object_a', 'object_b', 'frames', 'max_depth', 'max_depth_frame']
+
+
+def write_collision_report(report, path, summary_path=None):
+    """
+    Writes the penetrating pairs of every frame as CSV, and optionally the per pair summary.
+    
+    """
+    with profile_phase("write"), open(path, mode='w', newline='') as writer:
+        writer = csv.writer(writer)
+        writer.writerow(COLLISION_CSV_HEADER)
+        for i, a, b, triangle_count, inside, depth in report.rows:
+            frame = report.frames[i].item()
+            writer.writerow([
+                frame, format_timecode(frame, report.fps), report.names[a], report.names[b],
+                triangle_count, inside, "%.6f" % depth
+            ])
+    if summary_path:
+        with profile_phase("write"), open(summary_path, mode='w', newline='') as writer:
+            writer = csv.writer(writer)
+            writer.writerow(COLLISION_SUMMARY_HEADER)
+            for row in collision_summary(report):
+                writer.writerow(row[:3] + ["%.6f" % row[3], row[4]])
+
+
+def add_mesh(name, verts, edges=None, faces=None, col_name="Collection"):
+    """
+    Adds new mesh object from vertices, edges, and faces.
+    
+    """
+    if edges is None:
+        edges = []
+    if faces is None:
+        faces = []
+    mesh = bpy.data.meshes.new(name)
+    obj = bpy.data.objects.new(mesh.name, mesh)
+    col = bpy.data.collections[col_name]
+    col.objects.link(obj)
+    bpy.context.view_layer.objects.active = obj
+    mesh.from_pydata(verts, edges, faces)
+    
+    return obj
+
+
+def add_muscle(name="Muscle"):
+    """
+    Adds a new muscle from the head and tail of the selected bone.
+    
+    """
+    pb_first = current_pb_transforms()[0]
+    pb_last = current_pb_transforms()[-1]
+    armature = pb_first.pb.id_data
+    obj = new_muscle_object(
+        name, pb_first.location_head, pb_last.location_tail,
+        pb_first.name, pb_last.name, armature, bpy.data.collections["Collection"]
+    )
+    obj.select_set(True)
+    armature.select_set(False)
+    bpy.context.view_layer.objects.active = obj
+    
+    #bpy.ops.object.modifier_apply(modifier=modifier_name)
+    #bm = bmesh_copy_from_object(obj)
+    #weight_idx = [v.index for v in bm.verts]
+    #weight_group_head = obj.vertex_groups.new(name=pb_first.name)
+    #weight_group_head.add(weight_idx, 1, 'REPLACE')
+    
+def modify_muscle(radius, u_res=None, r_res=None):
+    active_object = bpy.context.active_object
+    if active_object is not None:
+        if active_object.type == 'MESH' and active_object.modifiers.get("Bone_Gen"):
+            modify_muscles([active_object], radius, u_res, r_res)
+    
+    
+MUSCLE_SOCKETS = {"radius": "Socket_2", "u_res": "Socket_4", "r_res": "Socket_5"}
+
+
+def muscle_objects(objects, pattern=None):
+    """
+    Returns the objects with a Bone_Gen modifier, optionally filtered by a name pattern.
+    
+    """
+    return [
+        obj for obj in objects
+        if obj.type == 'MESH' and obj.modifiers.get("Bone_Gen")
+        and (not pattern or fnmatch.fnmatchcase(obj.name, pattern))
+    ]
+
+
+def modify_muscles(objects, radius=None, u_res=None, r_res=None, scale=False):
+    """
+    Sets or scales the radius and resolutions of many muscles with one update.
+    
+    Values left as None are kept. With scale, the values multiply the current
+    ones. Resolutions of muscles in preview mode are stored as their full
+    resolution and shown once the preview is turned off. Every muscle is only
+    tagged, and the view layer is updated once at the end.
+    
+    """
+    values = {"radius": radius, "u_res": u_res, "r_res": r_res}
+    for obj in objects:
+        modifier = obj.modifiers["Bone_Gen"]
+        full = obj.get("muscle_full_res")
+        for key, value in values.items():
+            if value is None:
+                continue
+            socket = MUSCLE_SOCKETS[key]
+            if full is not None and key in full:
+                target, name = full, key
+            else:
+                target, name = modifier, socket
+            if scale:
+                value = target[name] * value
+            if key != "radius":
+                value = max(int(round(value)), 1)
+            target[name] = value
+        obj.update_tag()
+    if objects:
+        bpy.context.view_layer.update()
+
+
+def set_muscle_preview(objects, enabled, u_res=8, r_res=4):
+    """
+    Switches muscles between a low resolution viewport preview and full resolution.
+    
+    The full U and R resolution is kept in the object's "muscle_full_res"
+    property while the preview is on and written back when it is turned off.
+    
+    """
+    for obj in objects:
+        modifier = obj.modifiers["Bone_Gen"]
+        full = obj.get("muscle_full_res")
+        if enabled:
+            if full is None:
+                obj["muscle_full_res"] = {
+                    "u_res": modifier[MUSCLE_SOCKETS["u_res"]],
+                    "r_res": modifier[MUSCLE_SOCKETS["r_res"]],
+                }
+            modifier[MUSCLE_SOCKETS["u_res"]] = min(u_res, obj["muscle_full_res"]["u_res"])
+            modifier[MUSCLE_SOCKETS["r_res"]] = min(r_res, obj["muscle_full_res"]["r_res"])
+        elif full is not None:
+            modifier[MUSCLE_SOCKETS["u_res"]] = full["u_res"]
+            modifier[MUSCLE_SOCKETS["r_res"]] = full["r_res"]
+            del obj["muscle_full_res"]
+        obj.update_tag()
+    if objects:
+        bpy.context.view_layer.update()
+
+
+@contextmanager
+def full_resolution_muscles(objects):
+    """
+    Context manager restoring the full resolution of previewed muscles for measurement and export.
+    
+    Muscles whose modifier was applied inside the block are left as they are.
+    
+    """
+    previewed = [obj for obj in muscle_objects(objects) if obj.get("muscle_full_res") is not None]
+    preview_res = []
+    for obj in previewed:
+        modifier = obj.modifiers["Bone_Gen"]
+        preview_res.append((modifier[MUSCLE_SOCKETS["u_res"]], modifier[MUSCLE_SOCKETS["r_res"]]))
+        modifier[MUSCLE_SOCKETS["u_res"]] = obj["muscle_full_res"]["u_res"]
+        modifier[MUSCLE_SOCKETS["r_res"]] = obj["muscle_full_res"]["r_res"]
+        obj.update_tag()
+    if previewed:
+        bpy.context.view_layer.update()
+    try:
+        yield
+    finally:
+        for obj, (u_res, r_res) in zip(previewed, preview_res):
+            modifier = obj.modifiers.get("Bone_Gen")
+            if modifier is None:
+                continue
+            modifier[MUSCLE_SOCKETS["u_res"]] = u_res
+            modifier[MUSCLE_SOCKETS["r_res"]] = r_res
+            obj.update_tag()
+        if previewed:
+            bpy.context.view_layer.update()
+
+
+def toggle_muscle_preview(self, context):
+    """
+    Update callback of the muscle preview property.
+    
+    """
+    set_muscle_preview(
+        muscle_objects(context.scene.objects), context.scene.muscle_preview,
+        context.scene.muscle_preview_u_res, context.scene.muscle_preview_r_res
+    )
+
+
+def convert_to_mesh(obj, armature, weighting='SINGLE', bone_count=4, falloff=2.0):
+    armature_obj = armature
+    armature = armature.data
+    muscle_name = obj.name
+    v1 = obj.data.vertices[0]
+    v1 = obj.matrix_world @ v1.co
+    v2 = obj.data.vertices[1]
+    v2 = obj.matrix_world @ v2.co
+    
+    # Bone creation
+    bpy.context.view_layer.objects.active = armature_obj
+    bpy.ops.object.mode_set(mode='EDIT', toggle=False)
+    bone = armature.edit_bones.new(name=muscle_name)
+    bone.head = v1
+    bone.tail = v2
+    bone_t = armature.edit_bones.new(name=muscle_name + "_target")
+    bone_t.head = v2
+    tail_offset = mathutils.Vector((0.0, 0.0, 1.0))
+    bone_t.tail = v2 + tail_offset
+    bone_name = bone.name
+    bone_t_name = bone_t.name
+    
+    # Bone constraints
+    bpy.ops.object.mode_set(mode='POSE')
+    objbone = armature_obj.pose.bones[bone_name]
     objbone.constraints.new('STRETCH_TO')
     objbone.constraints["Stretch To"].target = armature_obj
     objbonetarget = armature_obj.pose.bones[bone_t_name]
     objbone.constraints["Stretch To"].subtarget = objbonetarget.name
     
-    # Apply geomentry nodes
-    bpy.ops.object.mode_set(mode='OBJECT')
-    bpy.context.view_layer.objects.active = obj
-    bpy.ops.object.modifier_apply(modifier="Bone_Gen")
+    # Apply geomentry nodes at full resolution, also while the preview is on
+    bpy.ops.object.mode_set(mode='OBJECT')
+    bpy.context.view_layer.objects.active = obj
+    with full_resolution_muscles([obj]):
+        bpy.ops.object.modifier_apply(modifier="Bone_Gen")
+    if "muscle_full_res" in obj:
+        del obj["muscle_full_res"]
+    
+    # Weights
+    if weighting == 'AUTO':
+        weight_muscles([obj], armature_obj, [objbone.name], bone_count, falloff)
+    else:
+        bm = bmesh_copy_from_object(obj)
+        weight_idx = [v.index for v in bm.verts]
+        weight_group = obj.vertex_groups.new(name=objbone.name)
+        weight_group.add(weight_idx, 1, 'REPLACE')
+    if not obj.modifiers['Weights']:
+        weight_modifier = obj.modifiers.new("Weights", "ARMATURE")
+        weight_modifier.object = armature_obj
+    obj.parent = armature_obj
+    
+    
+MUSCLE_WEIGHTING = [
+    ('SINGLE', "Muscle Bone", "Weight every vertex fully to the muscle's stretch bone"),
+    ('AUTO', "Nearest Bones", "Blend the nearest bones by distance, so muscles bend with their joints"),
+]
+
+
+def segment_distances(points, heads, tails):
+    """
+    Returns the distances of points (points, 3) to bone segments (bones, 3), shaped (points, bones).
+    
+    """
+    axis = tails - heads
+    length_squared = np.einsum("ij,ij->i", axis, axis)
+    offset = points[:, None, :] - heads[None]
+    t = np.einsum("pbi,bi->pb", offset, axis) / np.where(length_squared > 0.0, length_squared, 1.0)
+    np.clip(t, 0.0, 1.0, out=t)
+    offset -= t[..., None] * axis[None]
+    
+    return np.sqrt(np.einsum("pbi,pbi->pb", offset, offset))
+
+
+def candidate_bones(lower, upper, heads, tails, bone_count):
+    """
+    Returns the indices of bones that can be among the nearest bone_count to any point in a box.
+    
+    Distances over a box are bounded below by the distance between the box
+    and a bone's bounding box and above by the farthest box corner, so bones
+    whose lower bound exceeds the bone_count-th smallest upper bound are
+    never nearest and are skipped.
+    
+    """
+    if len(heads) <= bone_count:
+        return np.arange(len(heads))
+    corners = np.array([[(lower, upper)[k >> axis & 1][axis] for axis in range(3)] for k in range(8)])
+    farthest = segment_distances(corners, heads, tails).max(axis=0)
+    gap = np.maximum(0.0, np.maximum(np.minimum(heads, tails) - upper, lower - np.maximum(heads, tails)))
+    nearest = np.linalg.norm(gap, axis=1)
+    
+    return np.flatnonzero(nearest <= np.partition(farthest, bone_count - 1)[bone_count - 1])
+
+
+def distance_weights(points, heads, tails, bone_count=4, power=2.0, chunk_size=16384):
+    """
+    Returns the nearest bones of every point and their weights, both shaped (points, bone_count).
+    
+    Weights fall off with the inverse distance to the bone segment raised to
+    power and sum to one per point. Points are processed in chunks to bound
+    memory.
+    
+    """
+    bone_count = min(bone_count, len(heads))
+    indices = np.zeros((len(points), bone_count), dtype=np.int64)
+    weights = np.zeros((len(points), bone_count))
+    if len(points) == 0 or bone_count == 0:
+        return indices, weights
+    candidates = candidate_bones(points.min(axis=0), points.max(axis=0), heads, tails, bone_count)
+    heads = heads[candidates]
+    tails = tails[candidates]
+    for start in range(0, len(points), chunk_size):
+        distances = segment_distances(points[start:start + chunk_size], heads, tails)
+        nearest = np.argpartition(distances, bone_count - 1, axis=1)[:, :bone_count]
+        falloff = 1.0 / np.maximum(np.take_along_axis(distances, nearest, axis=1), 1e-6) ** power
+        indices[start:start + chunk_size] = candidates[nearest]
+        weights[start:start + chunk_size] = falloff / falloff.sum(axis=1, keepdims=True)
+    
+    return indices, weights
+
+
+def assign_vertex_weights(obj, names, indices, weights, levels=256):
+    """
+    Replaces the vertex groups of a mesh with the weights of the named bones.
+    
+    vertex_group.add() sets one weight for many vertices, so weights are
+    quantized to levels steps and each group gets one call per distinct
+    weight instead of one per vertex.
+    
+    """
+    obj.vertex_groups.clear()
+    quantized = np.round(weights * (levels - 1)).astype(np.int64)
+    vertices = np.repeat(np.arange(len(indices)), indices.shape[1])
+    bones = indices.ravel()
+    quantized = quantized.ravel()
+    keep = quantized > 0
+    vertices, bones, quantized = vertices[keep], bones[keep], quantized[keep]
+    order = np.lexsort((quantized, bones))
+    vertices, bones, quantized = vertices[order], bones[order], quantized[order]
+    starts = np.flatnonzero(np.r_[True, (np.diff(bones) != 0) | (np.diff(quantized) != 0)])
+    ends = np.r_[starts[1:], len(vertices)]
+    groups = {}
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        bone = bones[start]
+        if bone not in groups:
+            groups[bone] = obj.vertex_groups.new(name=names[bone])
+        groups[bone].add(vertices[start:end].tolist(), quantized[start] / (levels - 1), 'REPLACE')
+
+
+def skeletal_bone_names(armature):
+    """
+    Returns the deforming bones of an armature that are not muscle stretch bones or their targets.
+    
+    """
+    muscle_bones = set()
+    for pb in armature.pose.bones:
+        for constraint in pb.constraints:
+            if constraint.type == 'STRETCH_TO' and constraint.target == armature:
+                muscle_bones.update((pb.name, constraint.subtarget))
+    
+    return [bone.name for bone in armature.data.bones if bone.use_deform and bone.name not in muscle_bones]
+
+
+def weight_muscles(objects, armature, muscle_bones=None, bone_count=4, power=2.0):
+    """
+    Weights muscle meshes to their nearest skeletal bones and their own stretch bone.
+    
+    Vertices and bones are compared at rest in armature space. muscle_bones
+    lists the stretch bone of each object; by default it is the bone named
+    like the object, if there is one.
+    
+    """
+    names = skeletal_bone_names(armature)
+    bones = armature.data.bones
+    inverse = np.linalg.inv(np.array(armature.matrix_world, dtype=np.float64))
+    if muscle_bones is None:
+        muscle_bones = [obj.name if obj.name in bones else None for obj in objects]
+    for obj, muscle_bone in zip(objects, muscle_bones):
+        with profile_phase("convert"):
+            own = names + [muscle_bone] if muscle_bone else names
+            heads = np.array([bones[name].head_local for name in own], dtype=np.float64).reshape(-1, 3)
+            tails = np.array([bones[name].tail_local for name in own], dtype=np.float64).reshape(-1, 3)
+            coords = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+            obj.data.vertices.foreach_get("co", coords)
+            matrix = inverse @ np.array(obj.matrix_world, dtype=np.float64)
+            points = coords.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+            indices, weights = distance_weights(points, heads, tails, bone_count, power)
+        with profile_phase("write"):
+            assign_vertex_weights(obj, own, indices, weights)
+
+
+def read_table_text(source):
+    """
+    Returns the text of a table given as a text datablock name or a file path.
+    
+    """
+    if source in bpy.data.texts:
+        return bpy.data.texts[source].as_string()
+    with open(bpy.path.abspath(source), newline='') as reader:
+        return reader.read()
+
+
+def read_muscle_table(source):
+    """
+    Returns the rows of a muscle table from a CSV file path or a text datablock name.
+    
+    The table has the columns name, origin and insertion (bone names) and
+    optionally radius, u_res and r_res.
+    
+    """
+    muscles = []
+    for row in csv.DictReader(io.StringIO(read_table_text(source))):
+        row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+        muscle = Object()
+        muscle.name = row.get("name") or "Muscle"
+        muscle.origin = row["origin"]
+        muscle.insertion = row["insertion"]
+        muscle.radius = float(row["radius"]) if row.get("radius") else None
+        muscle.u_res = int(row["u_res"]) if row.get("u_res") else None
+        muscle.r_res = int(row["r_res"]) if row.get("r_res") else None
+        muscles.append(muscle)
+    
+    return muscles
+
+
+def new_muscle_object(name, head, tail, origin_name, insertion_name, armature, collection):
+    """
+    Returns a new two-vertex muscle object with its vertex groups and modifiers.
+    
+    The object is built directly in bpy.data without operators, weighted to the
+    origin and insertion bones, deformed by the armature's Weights modifier and
+    given the Bone_Gen geometry nodes modifier.
+    
+    """
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata([head, tail], [[0, 1]], [])
+    obj = bpy.data.objects.new(mesh.name, mesh)
+    collection.objects.link(obj)
+    
+    # Weights
+    weight_group_head = obj.vertex_groups.new(name=origin_name)
+    if insertion_name in obj.vertex_groups:
+        weight_group_tail = weight_group_head
+    else:
+        weight_group_tail = obj.vertex_groups.new(name=insertion_name)
+    weight_group_head.add([0], 1, 'REPLACE')
+    weight_group_tail.add([1], 1, 'REPLACE')
+    
+    weight_modifier = obj.modifiers.new("Weights", "ARMATURE")
+    weight_modifier.object = armature
+    obj.parent = armature
+    
+    modifier = obj.modifiers.new("Bone_Gen", "NODES")
+    modifier.node_group = bpy.data.node_groups["muscle_setup"]
+    
+    return obj
+
+
+def add_muscles(muscles, armature, collection=None, apply=True, weighting='SINGLE', bone_count=4, falloff=2.0):
+    """
+    Creates many muscles from table rows in one batch and returns their objects.
+    
+    Unlike add_muscle() and convert_to_mesh(), which switch modes and apply a
+    modifier per muscle, all meshes are created directly, all stretch bones in
+    a single edit mode session, and the Bone_Gen geometry is applied for every
+    muscle from one depsgraph evaluation. With AUTO weighting the muscles are
+    weighted to their nearest bones by weight_muscles().
+    
+    """
+    if collection is None:
+        collection = bpy.context.scene.collection
+    missing = {
+        name for muscle in muscles for name in (muscle.origin, muscle.insertion)
+        if name not in armature.pose.bones
+    }
+    if missing:
+        raise KeyError("Bones not found in {}: {}".format(armature.name, ", ".join(sorted(missing))))
+    
+    # Meshes
+    objects = []
+    for muscle in muscles:
+        origin = armature.pose.bones[muscle.origin]
+        insertion = armature.pose.bones[muscle.insertion]
+        obj = new_muscle_object(
+            muscle.name, origin.head, insertion.tail, origin.name, insertion.name, armature, collection
+        )
+        modifier = obj.modifiers["Bone_Gen"]
+        if muscle.radius is not None:
+            modifier["Socket_2"] = muscle.radius
+        if muscle.u_res:
+            modifier["Socket_4"] = muscle.u_res
+        if muscle.r_res:
+            modifier["Socket_5"] = muscle.r_res
+        objects.append(obj)
+    if not apply:
+        return objects
+    
+    # Bones, all in one edit mode session. Muscle vertices are in armature space.
+    view_layer = bpy.context.view_layer
+    if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    view_layer.objects.active = armature
+    bpy.ops.object.mode_set(mode='EDIT', toggle=False)
+    tail_offset = mathutils.Vector((0.0, 0.0, 1.0))
+    bone_names = []
+    for obj in objects:
+        v1 = obj.data.vertices[0].co
+        v2 = obj.data.vertices[1].co
+        bone = armature.data.edit_bones.new(name=obj.name)
+        bone.head = v1
+        bone.tail = v2
+        bone_t = armature.data.edit_bones.new(name=obj.name + "_target")
+        bone_t.head = v2
+        bone_t.tail = v2 + tail_offset
+        bone_names.append((bone.name, bone_t.name))
+    bpy.ops.object.mode_set(mode='OBJECT')
+    
+    # Bone constraints
+    for bone_name, bone_t_name in bone_names:
+        constraint = armature.pose.bones[bone_name].constraints.new('STRETCH_TO')
+        constraint.target = armature
+        constraint.subtarget = bone_t_name
+    
+    # Apply geometry nodes, evaluated once for all muscles without deformation.
+    for obj in objects:
+        obj.modifiers["Weights"].show_viewport = False
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    for obj, (bone_name, bone_t_name) in zip(objects, bone_names):
+        old_mesh = obj.data
+        obj.data = bpy.data.meshes.new_from_object(
+            obj.evaluated_get(depsgraph), preserve_all_data_layers=True, depsgraph=depsgraph
+        )
+        obj.modifiers.remove(obj.modifiers["Bone_Gen"])
+        bpy.data.meshes.remove(old_mesh)
+        obj.modifiers["Weights"].show_viewport = True
+        
+        # Weights
+        if weighting != 'AUTO':
+            weight_group = obj.vertex_groups.new(name=bone_name)
+            weight_group.add(range(len(obj.data.vertices)), 1, 'REPLACE')
+    if weighting == 'AUTO':
+        weight_muscles(objects, armature, [bone_name for bone_name, bone_t_name in bone_names], bone_count, falloff)
+    
+    return objects
+
+
+def armature_muscles(armature, names=None):
+    """
+    Returns the origin and insertion anchors of the muscles of an armature.
+    
+    Muscles applied with convert_to_mesh() are bones with a Stretch To
+    constraint targeting another bone of the armature; they run from the head
+    of the muscle bone to the head of its target. Muscle objects not applied
+    yet run from the head of their first vertex group bone to the tail of the
+    last, like add_muscle() builds them.
+    
+    """
+    muscles = []
+    for pb in armature.pose.bones:
+        for constraint in pb.constraints:
+            if (constraint.type == 'STRETCH_TO' and constraint.target == armature
+                    and constraint.subtarget in armature.pose.bones):
+                muscle = Object()
+                muscle.name = pb.name
+                muscle.origin, muscle.origin_end = pb.name, "head"
+                muscle.insertion, muscle.insertion_end = constraint.subtarget, "head"
+                muscles.append(muscle)
+                break
+    applied = {muscle.name for muscle in muscles}
+    for obj in muscle_objects(armature.children):
+        if obj.name in applied or len(obj.vertex_groups) == 0:
+            continue
+        origin = obj.vertex_groups[0].name
+        insertion = obj.vertex_groups[-1].name
+        if origin in armature.pose.bones and insertion in armature.pose.bones:
+            muscle = Object()
+            muscle.name = obj.name
+            muscle.origin, muscle.origin_end = origin, "head"
+            muscle.insertion, muscle.insertion_end = insertion, "tail"
+            muscles.append(muscle)
+    if names is not None:
+        muscles = [muscle for muscle in muscles if muscle.name in names]
+    
+    return muscles
+
+
+def rest_anchor_positions(armature, bones, ends):
+    """
+    Returns the rest positions of bone heads or tails in armature space, shaped (bones, 3).
+    
+    """
+    return np.array([
+        armature.data.bones[bone].head_local if end == "head" else armature.data.bones[bone].tail_local
+        for bone, end in zip(bones, ends)
+    ], dtype=np.float64).reshape(-1, 3)
+
+
+def bake_anchor_positions(bake, bones, ends):
+    """
+    Returns the baked positions of bone heads or tails, shaped (frames, bones, 3).
+    
+    """
+    columns = np.array([bake.names.index(bone) for bone in bones], dtype=np.intp)
+    is_head = np.array([end == "head" for end in ends], dtype=bool)
+    
+    return np.where(is_head[:, None], bake.heads[:, columns], bake.tails[:, columns]).astype(np.float64)
+
+
+def muscle_kinematics(frames, fps, origins, insertions, rest_lengths, joint_centers=None, joint_axes=None):
+    """
+    Returns length, strain, velocity and moment arm of muscles shaped (frames, muscles).
+    
+    Origins and insertions are shaped (frames, muscles, 3). Strain is relative
+    to the rest lengths and velocity is the change of length per second,
+    negative while shortening. The moment arm is the distance from the joint
+    centers (frames, 3) to each line of action, or, with joint axes
+    (frames, 3), the signed moment arm about that axis. Without a joint it is NaN.
+    
+    """
+    frames = np.asarray(frames)
+    vectors = insertions - origins
+    
+    kinematics = Object()
+    kinematics.length = np.linalg.norm(vectors, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kinematics.strain = kinematics.length / rest_lengths - 1.0
+        directions = vectors / kinematics.length[..., None]
+    if len(frames) > 1:
+        kinematics.velocity = np.gradient(kinematics.length, frames / fps, axis=0)
+    else:
+        kinematics.velocity = np.zeros_like(kinematics.length)
+    
+    if joint_centers is None:
+        kinematics.moment_arm = np.full_like(kinematics.length, np.nan)
+    else:
+        moments = np.cross(origins - joint_centers[:, None, :], directions)
+        if joint_axes is None:
+            kinematics.moment_arm = np.linalg.norm(moments, axis=-1)
+        else:
+            axes = joint_axes / np.linalg.norm(joint_axes, axis=-1, keepdims=True)
+            kinematics.moment_arm = np.einsum('fmk,fk->fm', moments, axes)
+    
+    return kinematics
+
+
+def bake_muscle_kinematics(scene, armature, muscles, frame_start, frame_end, joint=None, axis=None):
+    """
+    Returns the kinematics of muscles for every frame in a range.
+    
+    All anchor bones and the joint bone are baked together in one pass. The
+    axis is 'X', 'Y' or 'Z' of the joint bone, or None for the unsigned
+    moment arm. The result holds names, frames and fps besides the arrays of
+    muscle_kinematics().
+    
+    """
+    origins = ([muscle.origin for muscle in muscles], [muscle.origin_end for muscle in muscles])
+    insertions = ([muscle.insertion for muscle in muscles], [muscle.insertion_end for muscle in muscles])
+    bones = list(dict.fromkeys(origins[0] + insertions[0] + ([joint] if joint else [])))
+    bake = bake_pose_bones(scene, armature_pose_bones(armature, bones), frame_start, frame_end)
+    
+    rest_lengths = np.linalg.norm(
+        rest_anchor_positions(armature, *insertions) - rest_anchor_positions(armature, *origins), axis=-1
+    )
+    joint_centers = joint_axes = None
+    if joint:
+        index = bake.names.index(joint)
+        joint_centers = bake.heads[:, index].astype(np.float64)
+        if axis:
+            joint_axes = bake.matrices[:, index, :3, "XYZ".index(axis)].astype(np.float64)
+    
+    kinematics = muscle_kinematics(
+        bake.frames, bake.fps,
+        bake_anchor_positions(bake, *origins), bake_anchor_positions(bake, *insertions),
+        rest_lengths, joint_centers, joint_axes
+    )
+    kinematics.names = [muscle.name for muscle in muscles]
+    kinematics.frames = bake.frames
+    kinematics.fps = bake.fps
+    
+    return kinematics
+
+
+def write_muscle_kinematics(kinematics, path, file_format):
+    """
+    Writes per-frame muscle length, strain, velocity and moment arm in the given export format.
+    
+    """
+    columns = {
+        "length": kinematics.length[..., None],
+        "strain": kinematics.strain[..., None],
+        "velocity": kinematics.velocity[..., None],
+        "moment_arm": kinematics.moment_arm[..., None]
+    }
+    write_columns(path, kinematics.frames, kinematics.fps, kinematics.names, columns, file_format, "%.6f")
+
+
+def armature_poll(self, object):
+        return object.type == 'ARMATURE'
+        
+EXPORT_FORMATS = [
+    ('CSV', "CSV", "One text row per bone and frame"),
+    ('NPZ', "NPZ", "Typed columns in a single NumPy archive"),
+    ('NPY', "NPY Folder", "Typed columns as memory-mappable .npy files with a JSON manifest")
+]
+
+
+### Import ###
+IMPORT_CHUNK_ROWS = 65536
+# Channel columns of motion tables, by preference. Plain X, Y, Z are the rotation export's columns.
+MOTION_COLUMNS = [
+    ("quaternion", ("quaternion_w", "quaternion_x", "quaternion_y", "quaternion_z")),
+    ("rotation", ("rotation_x", "rotation_y", "rotation_z")),
+    ("rotation", ("X", "Y", "Z")),
+    ("location", ("location_x", "location_y", "location_z")),
+]
+
+
+def motion_csv_layout(header):
+    """
+    Returns the columns of the frame, time, name and channel values in a motion CSV header.
+    
+    Long tables, like the add-on's exports, have a name column and one row
+    per frame and bone. Wide tables have one row per frame and columns named
+    <source>_<channel>, e.g. Femur.L_rotation_x or Femur.L_X. Channels map
+    each source (None for long tables) to the columns of its complete channels.
+    
+    """
+    index = {column.strip(): i for i, column in enumerate(header)}
+    layout = Object()
+    layout.frame = index.get("frame")
+    layout.time = index.get("time")
+    layout.name = index.get("name")
+    
+    found = {}
+    for column, i in index.items():
+        for key, suffixes in MOTION_COLUMNS:
+            for k, suffix in enumerate(suffixes):
+                if layout.name is not None and column == suffix:
+                    source = None
+                elif layout.name is None and column.endswith("_" + suffix):
+                    source = column[:-len(suffix) - 1]
+                else:
+                    continue
+                found.setdefault(source, {}).setdefault(suffixes, [None] * len(suffixes))[k] = i
+    layout.channels = {}
+    for source, columns in found.items():
+        channels = {}
+        for key, suffixes in MOTION_COLUMNS:
+            if key not in channels and None not in columns.get(suffixes, [None]):
+                channels[key] = columns[suffixes]
+        if channels:
+            layout.channels[source] = channels
+    
+    return layout
+
+
+def add_motion_samples(pieces, name, key, frames, values):
+    """
+    Adds the samples of a channel that have values to the pieces of a motion.
+    
+    """
+    valid = ~np.isnan(values).any(axis=1)
+    pieces.setdefault(name, {}).setdefault(key, []).append((frames[valid], values[valid]))
+
+
+def join_motion_pieces(pieces):
+    """
+    Returns motion tracks from the pieces read in chunks, sorted by frame without duplicate frames.
+    
+    """
+    tracks = {}
+    for name, channels in pieces.items():
+        track = tracks[name] = {}
+        for key, parts in channels.items():
+            frames = np.concatenate([part[0] for part in parts])
+            values = np.concatenate([part[1] for part in parts])
+            frames, first = np.unique(frames, return_index=True)
+            track[key] = (frames, values[first])
+    
+    return tracks
+
+
+def table_floats(table, columns):
+    """
+    Returns columns of a table of strings as floats, with NaN for empty cells.
+    
+    """
+    cells = table[:, columns]
+    empty = np.char.strip(cells) == ""
+    values = np.where(empty, "0", cells).astype(np.float64)
+    values[empty] = np.nan
+    
+    return values
+
+
+def read_motion_csv(path, fps, chunk_rows=IMPORT_CHUNK_ROWS):
+    """
+    Returns the motion tracks of a long or wide CSV table, read in chunks of rows.
+    
+    Each chunk is converted to arrays in one go. Frames come from a frame
+    column, else a time column in seconds, else rows are numbered from frame 1.
+    Empty cells, e.g. frames where tracking was lost, leave out the sample.
+    
+    """
+    pieces = {}
+    with profile_phase("read"), open(bpy.path.abspath(path), newline='') as reader:
+        rows = csv.reader(reader)
+        layout = motion_csv_layout(next(rows))
+        if not layout.channels:
+            raise ValueError("No rotation, quaternion or location columns in " + path)
+        row_count = 0
+        while True:
+            chunk = list(itertools.islice(rows, chunk_rows))
+            if not chunk:
+                break
+            with profile_phase("convert"):
+                table = np.array(chunk, dtype=str)
+                if layout.frame is not None:
+                    frames = table_floats(table, layout.frame)
+                elif layout.time is not None:
+                    frames = table_floats(table, layout.time) * fps
+                else:
+                    frames = np.arange(row_count + 1, row_count + len(table) + 1, dtype=np.float64)
+                row_count += len(table)
+                
+                if layout.name is None:
+                    for source, channels in layout.channels.items():
+                        for key, columns in channels.items():
+                            add_motion_samples(pieces, source, key, frames, table_floats(table, columns))
+                    continue
+                names, inverse = np.unique(table[:, layout.name], return_inverse=True)
+                order = np.argsort(inverse, kind='stable')
+                bounds = np.searchsorted(inverse[order], np.arange(len(names) + 1))
+                for key, columns in layout.channels[None].items():
+                    values = table_floats(table, columns)
+                    for n, name in enumerate(names.tolist()):
+                        rows_of_name = order[bounds[n]:bounds[n + 1]]
+                        add_motion_samples(pieces, name, key, frames[rows_of_name], values[rows_of_name])
+    
+    return join_motion_pieces(pieces)
+
+
+def read_motion_columns(path):
+    """
+    Returns the motion tracks of an .npz archive or .npy folder written by the columnar export.
+    
+    """
+    with profile_phase("read"):
+        data = load_columns(path)
+    bone_count = len(data.names)
+    rows = len(data.columns["frame"]) // max(bone_count, 1) * bone_count
+    pieces = {}
+    with profile_phase("convert"):
+        frames = np.asarray(data.columns["frame"][:rows:max(bone_count, 1)], dtype=np.float64)
+        for key in dict.fromkeys(key for key, suffixes in MOTION_COLUMNS):
+            if key not in data.columns:
+                continue
+            values = np.asarray(data.columns[key][:rows], dtype=np.float64).reshape(len(frames), bone_count, -1)
+            for j, name in enumerate(data.names):
+                add_motion_samples(pieces, name, key, frames, values[:, j])
+    
+    return join_motion_pieces(pieces)
+
+
+def motion_path(path):
+    """
+    Returns the absolute path of a motion file, or of the .npy folder for its manifest.
+    
+    """
+    path = os.path.normpath(bpy.path.abspath(path))
+    if os.path.basename(path) == "manifest.json":
+        path = os.path.dirname(path)
+    
+    return path
+
+
+def read_motion(path, fps):
+    """
+    Returns the motion tracks of a CSV table or a columnar export, keyed by source name.
+    
+    Each track maps its channels (rotation in degrees, quaternion, location)
+    to the frames and values shaped (samples, components) where they are known.
+    
+    """
+    path = motion_path(path)
+    if os.path.isdir(path) or path.lower().endswith(".npz"):
+        return read_motion_columns(path)
+    return read_motion_csv(path, fps)
+
+
+def read_bone_map(source):
+    """
+    Returns the bone of each motion source from a table with source and bone columns.
+    
+    """
+    bone_map = {}
+    for row in csv.DictReader(io.StringIO(read_table_text(source))):
+        row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+        if row.get("source") and row.get("bone"):
+            bone_map[row["source"]] = row["bone"]
+    
+    return bone_map
+
+
+def decimate_keys(frames, values, step=1, tolerance=0.0):
+    """
+    Returns the indices of the samples kept as keyframes of one channel.
+    
+    Every step-th sample is kept, plus the last. With a tolerance, samples
+    are then removed for as long as linear interpolation between the kept
+    neighbours stays within the tolerance of every sample in between. Each
+    pass tests every other kept sample at once, so spans never overlap.
+    
+    """
+    kept = np.arange(0, len(frames), max(step, 1))
+    if len(frames) and kept[-1] != len(frames) - 1:
+        kept = np.append(kept, len(frames) - 1)
+    if tolerance <= 0.0:
+        return kept
+    frames = frames[kept]
+    values = values[kept]
+    kept_local = np.arange(len(kept))
+    idle = 0
+    for parity in itertools.cycle((1, 2)):
+        if len(kept_local) < 3 or idle == 2:
+            break
+        candidates = np.zeros(len(kept_local), dtype=bool)
+        candidates[parity:-1:2] = True
+        anchors = kept_local[~candidates]
+        # Linear interpolation between the anchors around every sample.
+        right = np.clip(np.searchsorted(anchors, np.arange(len(frames)), side='right'), 1, len(anchors) - 1)
+        left = right - 1
+        a, b = anchors[left], anchors[right]
+        t = (frames - frames[a]) / np.where(frames[b] > frames[a], frames[b] - frames[a], 1.0)
+        error = np.abs(values[a] + t * (values[b] - values[a]) - values)
+        span_error = np.maximum.reduceat(error, anchors[:-1])
+        removable = np.zeros(len(kept_local), dtype=bool)
+        span = np.searchsorted(anchors, kept_local[candidates], side='right') - 1
+        removable[candidates] = span_error[span] <= tolerance
+        idle = 0 if removable.any() else idle + 1
+        kept_local = kept_local[~removable]
+    
+    return kept[kept_local]
+
+
+KEY_INTERPOLATIONS = [
+    ('LINEAR', "Linear", "Straight lines between keyframes, matching decimation tolerances"),
+    ('BEZIER', "Bezier", "Smooth curves with automatic handles"),
+    ('CONSTANT', "Constant", "Hold each keyframe until the next"),
+]
+
+
+def write_fcurve_keys(action, data_path, index, group, frames, values, interpolation='BEZIER'):
+    """
+    Replaces an F-curve of the action with keyframes at frames, written in bulk with foreach_set.
+    
+    """
+    fcurve = action.fcurves.find(data_path, index=index)
+    if fcurve is not None:
+        action.fcurves.remove(fcurve)
+    fcurve = action.fcurves.new(data_path, index=index, action_group=group)
+    fcurve.keyframe_points.add(len(frames))
+    fcurve.keyframe_points.foreach_set("co", np.column_stack((frames, values)).astype(np.float32).ravel())
+    if interpolation != 'BEZIER':
+        fcurve.keyframe_points.foreach_set(
+            "interpolation", np.full(len(frames), FCURVE_INTERPOLATIONS[interpolation], dtype=np.int32)
+        )
+    fcurve.update()
+    
+    return fcurve
+
+
+def track_rotation_matrices(track, order='XYZ'):
+    """
+    Returns the frames and rotation matrices of a track, or None without rotations.
+    
+    """
+    if "quaternion" in track:
+        frames, quaternions = track["quaternion"]
+        return frames, quaternion_to_matrix(quaternions)
+    if "rotation" in track:
+        frames, angles = track["rotation"]
+        return frames, euler_to_matrix(np.radians(angles), order)
+    return None
+
+
+def frame_rotations(frames, source_frames, source_matrices, fallback):
+    """
+    Returns the source rotations at frames shaped (frames, 3, 3), or fallback at frames without a sample.
+    
+    """
+    rotations = np.broadcast_to(fallback, (len(frames), 3, 3)).copy()
+    if source_frames is not None and len(source_frames):
+        index = np.clip(np.searchsorted(source_frames, frames), 0, len(source_frames) - 1)
+        found = source_frames[index] == frames
+        rotations[found] = source_matrices[index[found]]
+    
+    return rotations
+
+
+def basis_rotations(armature, tracks, space='REST', order='XYZ'):
+    """
+    Returns the frames and basis rotation matrices of each bone with a rotation track.
+    
+    Rotations are given in an angle space of the export. Armature space
+    rotations are made relative to the parent's rotation from its own track
+    at the same frame, else to the parent's current pose.
+    
+    """
+    pose_bones = armature.pose.bones
+    rotations = {name: track_rotation_matrices(track, order) for name, track in tracks.items()}
+    basis = {}
+    for name, rotation in rotations.items():
+        if rotation is None:
+            continue
+        frames, matrices = rotation
+        pb = pose_bones[name]
+        if space != 'REST':
+            rest = np.array(pb.bone.matrix_local, dtype=np.float64)[:3, :3]
+            parent_rest = np.eye(3) if pb.parent is None else np.array(pb.parent.bone.matrix_local, dtype=np.float64)[:3, :3]
+            if space == 'ARMATURE' and pb.parent is not None:
+                parent = rotations.get(pb.parent.name) or (None, None)
+                parent_matrices = frame_rotations(
+                    frames, parent[0], parent[1], np.array(pb.parent.matrix, dtype=np.float64)[:3, :3]
+                )
+                matrices = np.linalg.inv(parent_matrices) @ matrices
+            matrices = np.linalg.inv(np.linalg.inv(parent_rest) @ rest) @ matrices
+        basis[name] = (frames, matrices)
+    
+    return basis
+
+
+def bone_rotation_channels(pose_bones, tracks, basis, space='REST', order='XYZ'):
+    """
+    Returns the frames and values of the rotation channel of each bone in its rotation mode.
+    
+    Bones sharing frames and a rotation mode are converted together. Euler
+    angles are continuous, so they may pass 180 degrees instead of flipping.
+    Rest relative Euler angles in the bone's order are keyed as given.
+    
+    """
+    channels = {}
+    groups = {}
+    for name, (frames, matrices) in basis.items():
+        mode = pose_bones[name].rotation_mode
+        track = tracks[name]
+        if space == 'REST' and mode == order and "quaternion" not in track:
+            channels[name] = ("rotation_euler", frames, np.radians(track["rotation"][1]))
+            continue
+        groups.setdefault((mode, len(frames), hashlib.sha1(frames.tobytes()).digest()), []).append(name)
+    
+    for (mode, count, digest), names in groups.items():
+        frames = basis[names[0]][0]
+        matrices = np.stack([basis[name][1] for name in names], axis=1)
+        if mode in EULER_AXES:
+            path, values = "rotation_euler", continuous_euler(matrices, mode)
+        else:
+            quaternions = continuous_quaternions(matrix_to_quaternion(matrices))
+            path, values = "rotation_quaternion", quaternions
+            if mode == 'AXIS_ANGLE':
+                half = np.arccos(np.clip(quaternions[..., :1], -1.0, 1.0))
+                sine = np.sin(half)
+                axis = np.where(sine > 1e-8, quaternions[..., 1:] / np.where(sine > 1e-8, sine, 1.0), np.array([0.0, 1.0, 0.0]))
+                path, values = "rotation_axis_angle", np.concatenate((2.0 * half, axis), axis=-1)
+        for j, name in enumerate(names):
+            channels[name] = (path, frames, values[:, j])
+    
+    return channels
+
+
+def import_motion(armature, tracks, space='REST', order='XYZ', action=None, bone_map=None, frame_offset=0.0,
+                  step=1, angle_tolerance=0.0, location_tolerance=0.0, interpolation='LINEAR'):
+    """
+    Keyframes motion tracks on the pose bones of an armature and returns a summary of the import.
+    
+    Tracks are mapped to bones by bone_map, else by name. Rotations are
+    converted from the angle space and rotation order they were exported in
+    to each bone's rotation mode; locations, in armature space, are keyed on
+    bones without a parent only, as child bones follow from their joints.
+    Keyframes are written per F-curve with keyframe_points.add and
+    foreach_set, optionally decimated by step and tolerances (degrees for
+    angles, scene units for locations). The action is created if not given
+    and assigned to the armature. If no track maps to a bone, nothing is
+    created or assigned and the summary has no action.
+    
+    """
+    pose_bones = armature.pose.bones
+    mapped = {}
+    skipped = []
+    for source, track in tracks.items():
+        name = bone_map.get(source, source) if bone_map else source
+        if name in pose_bones:
+            mapped[name] = track
+        else:
+            skipped.append(source)
+    
+    summary = Object()
+    summary.action = None
+    summary.bones = sorted(mapped)
+    summary.skipped = skipped
+    summary.samples = 0
+    summary.keys = 0
+    if not mapped:
+        return summary
+    
+    with profile_phase("convert"):
+        channels = bone_rotation_channels(
+            pose_bones, mapped, basis_rotations(armature, mapped, space, order), space, order
+        )
+        locations = {}
+        for name, track in mapped.items():
+            pb = pose_bones[name]
+            if "location" not in track or pb.parent is not None:
+                continue
+            frames, values = track["location"]
+            rest = np.array(pb.bone.matrix_local, dtype=np.float64)
+            locations[name] = ("location", frames, (values - rest[:3, 3]) @ np.linalg.inv(rest[:3, :3]).T)
+    
+    if action is None:
+        action = bpy.data.actions.new(armature.name + "Import")
+    armature.animation_data_create().action = action
+    summary.action = action
+    
+    for name, (path, frames, values) in list(channels.items()) + list(locations.items()):
+        tolerance = location_tolerance if path == "location" else np.radians(angle_tolerance)
+        if path == "rotation_quaternion":
+            # A rotation by an angle moves quaternion components by up to half its sine.
+            tolerance = np.sin(0.5 * tolerance)
+        for index in range(values.shape[1]):
+            with profile_phase("convert"):
+                component_tolerance = tolerance
+                if path == "rotation_axis_angle" and index > 0:
+                    component_tolerance = np.sin(tolerance)
+                kept = decimate_keys(frames, values[:, index], step, component_tolerance)
+            with profile_phase("write"):
+                write_fcurve_keys(
+                    action, 'pose.bones["{}"].{}'.format(name, path), index, name,
+                    frames[kept] + frame_offset, values[kept, index], interpolation
+                )
+            summary.samples += len(frames)
+            summary.keys += len(kept)
+    
+    return summary
+
+
+### Bake Cache ###
+# Bump when the layout of cached bakes or the content of the keys changes.
+BAKE_CACHE_VERSION = 4
+
+
+def bake_cache_dir():
+    """
+    Returns the sidecar cache folder of the saved .blend file, or None if unsaved.
+    
+    """
+    if not bpy.data.filepath:
+        return None
+    return os.path.splitext(bpy.data.filepath)[0] + ".tetrapod_cache"
+
+
+def pose_bone_name_from_path(data_path):
+    """
+    Returns the bone name of a 'pose.bones["name"]...' data path, or None.
+    
+    """
+    if not data_path.startswith('pose.bones["'):
+        return None
+    end = data_path.find('"]', 12)
+    while end != -1 and data_path[end - 1] == "\\":
+        end = data_path.find('"]', end + 1)
+    if end == -1:
+        return None
+    return bpy.utils.unescape_identifier(data_path[12:end])
+
+
+def hash_fcurves(hasher, fcurves):
+    """
+    Adds the keyframes, handles and settings of F-curves to a hash.
+    
+    """
+    for fcurve in sorted(fcurves, key=lambda fcurve: (fcurve.data_path, fcurve.array_index)):
+        hasher.update(repr((fcurve.data_path, fcurve.array_index, fcurve.extrapolation, fcurve.mute)).encode())
+        for modifier in fcurve.modifiers:
+            if not modifier.mute:
+                hasher.update(modifier.type.encode())
+                hash_rna(hasher, modifier)
+        points = fcurve.keyframe_points
+        for prop, size, dtype in (
+            ("co", 2, np.float32),
+            ("handle_left", 2, np.float32),
+            ("handle_right", 2, np.float32),
+            ("interpolation", 1, np.int32),
+            ("easing", 1, np.int32)
+        ):
+            values = np.empty(len(points) * size, dtype=dtype)
+            points.foreach_get(prop, values)
+            hasher.update(values.tobytes())
+
+
+def hash_rna(hasher, struct, depth=0):
+    """
+    Adds the simple property values of an RNA struct, such as a constraint, to a hash.
+    
+    Pointers are hashed by name and collections are followed one level down.
+    Read only values and interface state are skipped.
+    
+    """
+    for prop in struct.bl_rna.properties:
+        identifier = prop.identifier
+        if identifier in ("rna_type", "show_expanded", "active"):
+            continue
+        if prop.is_readonly and prop.type != 'COLLECTION':
+            continue
+        value = getattr(struct, identifier, None)
+        if prop.type == 'POINTER':
+            hasher.update(repr((identifier, getattr(value, "name", None))).encode())
+        elif prop.type == 'COLLECTION':
+            if depth == 0:
+                for item in value:
+                    hash_rna(hasher, item, depth + 1)
+        elif getattr(prop, "is_array", False):
+            hasher.update(repr((identifier, tuple(value))).encode())
+        else:
+            hasher.update(repr((identifier, value)).encode())
+
+
+def hash_animation_settings(hasher, animation):
+    """
+    Adds how the active action of animation data is blended to a hash.
+    
+    """
+    hasher.update(repr((
+        getattr(animation, "action_influence", 1.0),
+        getattr(animation, "action_blend_type", 'REPLACE'),
+        getattr(animation, "action_extrapolation", 'HOLD')
+    )).encode())
+
+
+def hash_object(hasher, obj):
+    """
+    Adds what determines the transform of an object, such as a constraint target, to a hash.
+    
+    Returns False if the transform cannot be hashed because the object or one
+    of its parents has constraints, drivers or NLA tracks.
+    
+    """
+    if any(not constraint.mute for constraint in obj.constraints):
+        return False
+    animation = obj.animation_data
+    if animation is not None and (len(animation.drivers) or any(not track.mute for track in animation.nla_tracks)):
+        return False
+    hasher.update(repr((
+        obj.name, obj.parent.name if obj.parent else None, obj.parent_type, obj.parent_bone
+    )).encode())
+    action = animation.action if animation else None
+    if action is not None:
+        hash_animation_settings(hasher, animation)
+        hash_fcurves(hasher, action.fcurves)
+    else:
+        hasher.update(np.array(obj.matrix_world, dtype=np.float32).tobytes())
+    if obj.parent is not None:
+        return hash_object(hasher, obj.parent)
+    return True
+
+
+def bone_cache_keys(scene, armature, names, frame_start, frame_end):
+    """
+    Returns a cache key for each named bone, or None for bones that cannot be cached.
+    
+    A key hashes the bone's F-curves, unanimated channel values, constraints,
+    rest pose, frame range, the armature's pose position and the scene's
+    time remapping together with the keys of its parent and of the bones and
+    objects its constraints target, so a change invalidates exactly the bones
+    it can affect. Bones driven by drivers, bones targeting objects
+    with constraints or drivers and armatures using NLA are not cached.
+    
+    """
+    animation = armature.animation_data
+    bone_fcurves = {}
+    shared_fcurves = []
+    driven = set()
+    cacheable = True
+    if animation is not None:
+        if any(not track.mute for track in animation.nla_tracks):
+            cacheable = False
+        if animation.action is not None:
+            for fcurve in animation.action.fcurves:
+                name = pose_bone_name_from_path(fcurve.data_path)
+                if name is None:
+                    shared_fcurves.append(fcurve)
+                else:
+                    bone_fcurves.setdefault(name, []).append(fcurve)
+        for fcurve in animation.drivers:
+            name = pose_bone_name_from_path(fcurve.data_path)
+            if name is None:
+                cacheable = False
+            driven.add(name)
+    if not cacheable:
+        return [None for name in names]
+    
+    shared = hashlib.sha1()
+    render = scene.render
+    shared.update(repr((
+        BAKE_CACHE_VERSION, armature.name, frame_start, frame_end,
+        armature.data.pose_position, render.frame_map_old, render.frame_map_new
+    )).encode())
+    if animation is not None and animation.action is not None:
+        hash_animation_settings(shared, animation)
+    hash_fcurves(shared, shared_fcurves)
+    shared = shared.digest()
+    
+    keys = {}
+    def bone_key(name, visiting):
+        if name in keys:
+            return keys[name]
+        if name in driven or name in visiting:
+            return None
+        visiting = visiting | {name}
+        pb = armature.pose.bones[name]
+        bone = pb.bone
+        
+        hasher = hashlib.sha1(shared)
+        hasher.update(name.encode())
+        hasher.update(np.array(bone.matrix_local, dtype=np.float32).tobytes())
+        hasher.update(repr((
+            tuple(bone.head_local), tuple(bone.tail_local), bone.use_connect,
+            bone.use_inherit_rotation, bone.inherit_scale, bone.use_local_location,
+            pb.rotation_mode
+        )).encode())
+        animated = {fcurve.data_path.rsplit(".", 1)[-1] for fcurve in bone_fcurves.get(name, [])}
+        for channel in ("location", "rotation_quaternion", "rotation_euler", "rotation_axis_angle", "scale"):
+            if channel not in animated:
+                hasher.update(np.array(getattr(pb, channel), dtype=np.float32).tobytes())
+        hash_fcurves(hasher, bone_fcurves.get(name, []))
+        
+        dependencies = [bone.parent.name] if bone.parent else []
+        for constraint in pb.constraints:
+            hash_rna(hasher, constraint)
+            targets = [constraint] + list(getattr(constraint, "targets", ()))
+            for target in targets:
+                target_object = getattr(target, "target", None)
+                subtarget = getattr(target, "subtarget", "")
+                if target_object == armature and subtarget in armature.pose.bones:
+                    dependencies.append(subtarget)
+                elif target_object is not None and target_object != armature:
+                    if not hash_object(hasher, target_object):
+                        return None
+        for dependency in dependencies:
+            key = bone_key(dependency, visiting)
+            if key is None:
+                return None
+            hasher.update(key.encode())
+        
+        keys[name] = hasher.hexdigest()
+        return keys[name]
+    
+    return [bone_key(name, frozenset()) for name in names]
+
+
+def new_cached_bake(scene, pose_bones, frames):
+    """
+    Returns a new bake with the columns of unchanged bones filled from the cache.
+    
+    Only the bones left in bake.sampled need to be sampled.
+    
+    """
+    bake = new_bake(scene, pose_bones, frames)
+    bake.cache_keys = [None] * len(bake.names)
+    directory = bake_cache_dir()
+    if directory is None or bake.armature is None or len(frames) == 0:
+        return bake
+    
+    bake.cache_keys = bone_cache_keys(scene, bake.armature, bake.names, int(frames[0]), int(frames[-1]))
+    sampled = []
+    for i, key in enumerate(bake.cache_keys):
+        path = os.path.join(directory, "{}.npz".format(key))
+        if key is None or not os.path.exists(path):
+            sampled.append(i)
+            continue
+        try:
+            with np.load(path) as entry:
+                bake.matrices[:, i] = entry["matrices"]
+                bake.heads[:, i] = entry["heads"]
+                bake.tails[:, i] = entry["tails"]
+                bake.parent_matrices[:, i] = entry["parent_matrices"]
+            # The modification time orders entries for eviction.
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            sampled.append(i)
+    bake.sampled = np.array(sampled, dtype=int)
+    
+    return bake
+
+
+def store_cached_bake(scene, bake):
+    """
+    Writes the sampled columns of a bake to the cache and evicts old entries.
+    
+    """
+    directory = bake_cache_dir()
+    keys = getattr(bake, "cache_keys", None)
+    if directory is None or keys is None:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for i in bake.sampled:
+        if keys[i] is None:
+            continue
+        path = os.path.join(directory, "{}.npz".format(keys[i]))
+        # Write under a temporary name so parallel workers never read partial entries.
+        temp_path = "{}.{}.tmp.npz".format(path[:-4], os.getpid())
+        np.savez(
+            temp_path, matrices=bake.matrices[:, i], heads=bake.heads[:, i], tails=bake.tails[:, i],
+            parent_matrices=bake.parent_matrices[:, i]
+        )
+        os.replace(temp_path, path)
+    prune_bake_cache(directory, scene.measure_cache_size * 1024 * 1024)
+
+
+def prune_bake_cache(directory, max_bytes):
+    """
+    Deletes the least recently used cache entries until the folder fits in max_bytes.
+    
+    """
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(".npz") or ".tmp." in name:
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(entry[1] for entry in entries)
+    for mtime, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+### Profiling ###
+PROFILE_ENV = "TETRAPOD_PROFILE"
+PROFILE_FORMAT = "tetrapod-toolkit-trace"
+
+# The trace of the operator or command being profiled, None while profiling is off.
+profiler = Object()
+profiler.trace = None
+profiler.phases = []
+# The operator that began the trace, only it ends it. None for command line traces.
+profiler.owner = None
+
+
+def profiling_enabled(scene=None):
+    """
+    Returns whether operators are profiled, by the environment variable or the scene setting.
+    
+    """
+    if os.environ.get(PROFILE_ENV, "") not in ("", "0"):
+        return True
+    return scene is not None and getattr(scene, "profile_operators", False)
+
+
+def profile_directory(scene=None):
+    """
+    Returns the folder traces are written to.
+    
+    The environment variable may name a folder, otherwise the scene's profile
+    folder or a folder in the temporary directory is used.
+    
+    """
+    directory = os.environ.get(PROFILE_ENV, "")
+    if directory in ("", "0", "1"):
+        directory = bpy.path.abspath(scene.profile_directory) if scene is not None and getattr(scene, "profile_directory", "") else ""
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(), "tetrapod_profiles")
+    return directory
+
+
+def begin_trace(name, scene=None):
+    """
+    Starts recording a trace of wall time, frame evaluations, phases and peak memory.
+    
+    """
+    trace = {
+        "format": PROFILE_FORMAT,
+        "version": 1,
+        "name": name,
+        "file": bpy.data.filepath,
+        "blender": bpy.app.version_string,
+        "pid": os.getpid(),
+        "started": time.time(),
+        "wall_seconds": 0.0,
+        "busy_seconds": 0.0,
+        "calls": 0,
+        "frame_evaluations": 0,
+        "phases": {},
+        "status": None,
+        "peak_python_bytes": None,
+        "peak_rss_bytes": None,
+    }
+    profiler.trace = trace
+    profiler.phases = []
+    profiler.start_time = time.perf_counter()
+    profiler.directory = profile_directory(scene)
+    profiler.started_tracemalloc = not tracemalloc.is_tracing()
+    if profiler.started_tracemalloc:
+        tracemalloc.start()
+    else:
+        tracemalloc.reset_peak()
+    
+    return trace
+
+
+def end_trace(status):
+    """
+    Stops the current trace and writes it as JSON, returning the path.
+    
+    """
+    trace = profiler.trace
+    if trace is None:
+        return None
+    profiler.trace = None
+    profiler.owner = None
+    trace["status"] = status
+    trace["wall_seconds"] = time.perf_counter() - profiler.start_time
+    trace["peak_python_bytes"] = tracemalloc.get_traced_memory()[1]
+    if profiler.started_tracemalloc:
+        tracemalloc.stop()
+    try:
+        import resource
+    except ImportError:
+        pass
+    else:
+        # ru_maxrss is the peak of the whole process, in kilobytes except on macOS.
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        trace["peak_rss_bytes"] = peak_rss if sys.platform == "darwin" else peak_rss * 1024
+    
+    os.makedirs(profiler.directory, exist_ok=True)
+    path = os.path.join(profiler.directory, "{}-{}-{}.json".format(
+        trace["name"].replace(".", "_"), time.strftime("%Y%m%d-%H%M%S", time.localtime(trace["started"])), os.getpid()
+    ))
+    with open(path, mode='w') as writer:
+        json.dump(trace, writer, indent=2)
     
-    # Weights
-    bm = bmesh_copy_from_object(obj)
-    weight_idx = [v.index for v in bm.verts]
-    weight_group = obj.vertex_groups.new(name=objbone.name)
-    weight_group.add(weight_idx, 1, 'REPLACE')
-    if not obj.modifiers['Weights']:
-        weight_modifier = obj.modifiers.new("Weights", "ARMATURE")
-        weight_modifier.object = armature_obj
-    obj.parent = armature_obj
+    return path
+
+
+@contextmanager
+def profile_phase(name):
+    """
+    Context manager adding its time to a phase of the current trace.
     
+    Phase times are exclusive: time spent in a nested phase only counts
+    towards the nested one.
     
-def armature_poll(self, object):
-        return object.type == 'ARMATURE'
-        
+    """
+    if profiler.trace is None:
+        yield
+        return
+    profiler.phases.append([name, time.perf_counter(), 0.0])
+    try:
+        yield
+    finally:
+        end_phase()
+
+
+def end_phase():
+    name, start_time, nested = profiler.phases.pop()
+    elapsed = time.perf_counter() - start_time
+    if profiler.trace is None:
+        return
+    phase = profiler.trace["phases"].setdefault(name, {"seconds": 0.0, "calls": 0})
+    phase["seconds"] += elapsed - nested
+    phase["calls"] += 1
+    if profiler.phases:
+        profiler.phases[-1][2] += elapsed
+
+
+def profile_iter(name, iterable):
+    """
+    Returns the iterable, timing every step of it as a phase while a trace is recorded.
+    
+    Used for row generators so formatting is told apart from the writes consuming them.
+    
+    """
+    if profiler.trace is None:
+        return iterable
+    return profiled_iter(name, iter(iterable))
+
+
+def profiled_iter(name, iterator):
+    while True:
+        profiler.phases.append([name, time.perf_counter(), 0.0])
+        try:
+            item = next(iterator)
+        except StopIteration:
+            end_phase()
+            return
+        end_phase()
+        yield item
+
+
+def profile_frames(count=1):
+    """
+    Adds frame evaluations to the current trace.
+    
+    """
+    if profiler.trace is not None:
+        profiler.trace["frame_evaluations"] += int(count)
+
+
+def profiled(method):
+    """
+    Wraps an operator method so it is recorded in a trace while profiling is enabled.
+    
+    A trace starts with the first profiled call and ends once the operator
+    stops running modal, so modal operators are traced as a whole. Operators
+    running while another one's trace is recorded, such as during a modal
+    export, neither count towards nor end it.
+    
+    """
+    @functools.wraps(method)
+    def wrapper(self, context, *args):
+        if profiler.trace is None:
+            if not profiling_enabled(context.scene):
+                return method(self, context, *args)
+            begin_trace(self.bl_idname, context.scene)
+            profiler.owner = self.as_pointer()
+        elif profiler.owner != self.as_pointer():
+            return method(self, context, *args)
+        start_time = time.perf_counter()
+        try:
+            result = method(self, context, *args)
+        except Exception:
+            end_trace("ERROR")
+            raise
+        if profiler.trace is not None:
+            profiler.trace["busy_seconds"] += time.perf_counter() - start_time
+            profiler.trace["calls"] += 1
+            if not {'RUNNING_MODAL', 'PASS_THROUGH'} & set(result):
+                end_trace(sorted(result)[0] if result else None)
+        return result
+    
+    return wrapper
+
+
+def profile_operator(cls):
+    """
+    Class decorator profiling an operator's execute and modal methods.
+    
+    invoke is only profiled if the class sets profile_invoke, as most invoke
+    methods just open a file browser before execute runs.
+    
+    """
+    names = ["execute", "modal"]
+    if getattr(cls, "profile_invoke", False):
+        names.append("invoke")
+    for name in names:
+        method = getattr(cls, name, None)
+        if method is not None:
+            setattr(cls, name, profiled(method))
+    
+    return cls
+
+
 ### Operators ###
+class ModalBakeMixin:
+    """
+    Bakes the measure range in chunks from a window timer.
+    
+    Each timer tick samples scene.measure_chunk_size frames and calls
+    bake_progress(), so Blender stays responsive, progress is shown in the
+    status bar and Esc cancels. Objects are only disabled for armature only
+    evaluation during a tick, never while the interface has control.
+    Subclasses implement bake_progress(), bake_finished() and bake_cancelled().
+    
+    """
+    _timer = None
+
+    def start_bake(self, context, frames=None, pose_bones=None, samples_per_frame=1):
+        scene = context.scene
+        if pose_bones is None:
+            pose_bones = pose_bones_to_bake(context)
+        if frames is None and scene.measure_use_cache and samples_per_frame <= 1:
+            frames = sample_frames(scene.measure_start_frame, scene.measure_end_frame)
+            with profile_phase("cache"):
+                self.bake = new_cached_bake(scene, pose_bones, frames)
+        else:
+            if frames is None:
+                frames = sample_frames(scene.measure_start_frame, scene.measure_end_frame, samples_per_frame)
+            self.bake = new_bake(scene, pose_bones, frames)
+        if not self.bake.names:
+            self.report({'WARNING'}, "No bones selected")
+            return {'CANCELLED'}
+        if scene.measure_direct_sampling:
+            sample_direct_bones(scene, self.bake)
+        self.done = 0
+        self.initial_frame = scene.frame_current
+        self.start_time = time.perf_counter()
+        self.busy_time = 0.0
+        self.armature_only = scene.measure_armature_only and self.bake.armature is not None
+        
+        wm = context.window_manager
+        wm.progress_begin(0, len(frames))
+        self._timer = wm.event_timer_add(0.001, window=context.window)
+        wm.modal_handler_add(self)
+        
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.stop_bake(context)
+            self.bake_cancelled(context)
+            self.report({'WARNING'}, "Cancelled after {} of {} frames".format(self.done, len(self.bake.frames)))
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        
+        tick_start = time.perf_counter()
+        total = len(self.bake.frames)
+        stop = min(self.done + max(context.scene.measure_chunk_size, 1), total)
+        if len(self.bake.sampled) == 0:
+            # Everything came from the cache.
+            stop = total
+        scene = context.scene
+        with armature_only_evaluation(scene, self.bake.armature) if self.armature_only else nullcontext():
+            bake_frames(scene, self.bake, self.done, stop)
+        self.done = stop
+        self.bake_progress(context)
+        self.busy_time += time.perf_counter() - tick_start
+        
+        context.window_manager.progress_update(self.done)
+        context.workspace.status_text_set(
+            "{}: frame {} of {} (Esc to cancel)".format(self.bl_label, self.done, total)
+        )
+        if self.done >= total:
+            self.stop_bake(context)
+            with profile_phase("cache"):
+                store_cached_bake(context.scene, self.bake)
+            self.bake_finished(context)
+            self.report({'INFO'}, throughput_message(
+                self.done, time.perf_counter() - self.start_time, self.busy_time
+            ))
+            return {'FINISHED'}
+        
+        return {'RUNNING_MODAL'}
+
+    def stop_bake(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        context.scene.frame_set(self.initial_frame)
+
+    def bake_progress(self, context):
+        pass
+
+    def bake_finished(self, context):
+        pass
+
+    def bake_cancelled(self, context):
+        pass
+
+
+def throughput_message(frame_count, seconds, busy_seconds=None):
+    """
+    Returns a report of frames per second, used to compare chunk sizes with the blocking path.
+    
+    """
+    message = "{} frames in {:.2f}s ({:.1f} frames/s)".format(
+        frame_count, seconds, frame_count / seconds if seconds > 0 else 0.0
+    )
+    if busy_seconds is not None:
+        message += ", {:.0%} of wall time spent sampling".format(busy_seconds / seconds if seconds > 0 else 1.0)
+    
+    return message
+
+
+@profile_operator
 class ExportGlobalRotOperator(bpy.types.Operator):
     """Export global bone rotations for current frame"""
     bl_idname = "object.export_global_rot"
     bl_label = "Export Selected Bone Rotations"
     filepath: bpy.props.StringProperty(subtype="DIR_PATH")
+    file_format: bpy.props.EnumProperty(name="Format", items=EXPORT_FORMATS, default='CSV')
 
     @classmethod
     def poll(cls, context):
         return context.selected_pose_bones_from_active_object is not None
 
     def execute(self, context):
-        write_pb_rot_csv(bpy.context.scene, self.filepath)
+        if self.file_format == 'CSV':
+            write_pb_rot_csv(bpy.context.scene, self.filepath)
+        else:
+            bake = bake_current_pose(bpy.context.scene, pose_bones_to_bake(context))
+            write_bake_columns(bake, self.filepath, self.file_format)
         return {'FINISHED'}
     
     def invoke(self, context, event):
@@ -412,49 +4361,264 @@ class ExportGlobalRotOperator(bpy.types.Operator):
         return {'RUNNING_MODAL'}
 
 
-class ExportGlobalRotInRangeOperator(bpy.types.Operator):
+@profile_operator
+class ExportGlobalRotInRangeOperator(ModalBakeMixin, bpy.types.Operator):
     """Export global bone rotations for each frame in the current playback range"""
     bl_idname = "object.export_global_rot_in_range"
     bl_label = "Export Selected Bone Rotations in Range"
     
     filepath: bpy.props.StringProperty(subtype="DIR_PATH")
+    file_format: bpy.props.EnumProperty(name="Format", items=EXPORT_FORMATS, default='CSV')
+    use_modal: bpy.props.BoolProperty(name="Run in Background", description="Export in chunks while Blender stays responsive", default=True)
 
     @classmethod
     def poll(cls, context):
         return context.selected_pose_bones_from_active_object is not None
 
     def execute(self, context):
-        print("Path accepted:", self.filepath)
-        write_pb_rot_in_range_csv(bpy.context.scene, self.filepath)
+        if self.use_modal and context.window is not None:
+            return self.start_bake(context)
+        
+        start_time = time.perf_counter()
+        scene = bpy.context.scene
+        bake = bake_pose_bones(
+            scene, pose_bones_to_bake(context), scene.measure_start_frame, scene.measure_end_frame,
+            samples_per_frame=scene.measure_samples_per_frame
+        )
+        if self.file_format == 'CSV':
+            write_pb_rot_in_range_csv(scene, self.filepath, bake)
+        else:
+            write_bake_columns(bake, self.filepath, self.file_format)
+        self.report({'INFO'}, throughput_message(len(bake.frames), time.perf_counter() - start_time))
         return {'FINISHED'}
+
+    def start_bake(self, context):
+        result = super().start_bake(context, samples_per_frame=context.scene.measure_samples_per_frame)
+        if 'RUNNING_MODAL' in result:
+            self.export = begin_rot_export(self.bake, self.filepath, self.file_format)
+        return result
+
+    def bake_progress(self, context):
+        write_rot_export(self.export, self.done)
+
+    def bake_finished(self, context):
+        end_rot_export(self.export)
+
+    def bake_cancelled(self, context):
+        end_rot_export(self.export)
     
     def invoke(self, context, event):
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
 
-class BoneChangeInfoOperator(bpy.types.Operator):
+@profile_operator
+class BoneChangeInfoOperator(ModalBakeMixin, bpy.types.Operator):
     """Calculate location and rotation data for the selected bone."""
     bl_idname = "object.bone_loc_change"
     bl_label = "Calculate Active Bone Travel"
+    profile_invoke = True
 
     @classmethod
     def poll(cls, context):
         return context.selected_pose_bones_from_active_object is not None
 
+    def invoke(self, context, event):
+        if not self.check_range(context):
+            return {'CANCELLED'}
+        self.active_name = context.active_pose_bone.name
+        if recording_covers(context.scene, self.active_name):
+            # Only evaluate the frames playback has not recorded yet.
+            missing = missing_recorded_frames()
+            if len(missing) == 0:
+                self.store_recorded(context, self.active_name)
+                return {'FINISHED'}
+            return self.start_bake(context, missing, self.recorded_pose_bones(context))
+        return self.start_bake(context)
+
     def execute(self, context):
-        loc_data = current_bone_location_change(bpy.context.scene, bpy.context.scene.measure_start_frame, bpy.context.scene.measure_end_frame)
-        rot_data = current_bone_rot_change(bpy.context.scene)
-        rot_min_max_data = current_bone_rot_min_max(bpy.context.scene)
+        scene = bpy.context.scene
+        if not self.check_range(context):
+            return {'CANCELLED'}
+        active_name = context.active_pose_bone.name
+        if recording_covers(scene, active_name):
+            missing = missing_recorded_frames()
+            if len(missing):
+                record_bake(bake_pose_bone_frames(scene, self.recorded_pose_bones(context), missing))
+            self.store_recorded(context, active_name)
+            return {'FINISHED'}
+        bake = bake_pose_bones(scene, pose_bones_to_bake(context), scene.measure_start_frame, scene.measure_end_frame)
+        self.store_results(context, bake, active_name)
+        
+        return {'FINISHED'}
+
+    def bake_finished(self, context):
+        if recording_covers(context.scene, self.active_name) and self.bake.names == range_recorder.names:
+            record_bake(self.bake)
+            self.store_recorded(context, self.active_name)
+        else:
+            self.store_results(context, self.bake, self.active_name)
+
+    def recorded_pose_bones(self, context):
+        return armature_pose_bones(context.active_pose_bone.id_data, range_recorder.names)
+
+    def store_recorded(self, context, active_name):
+        index = range_recorder.names.index(active_name)
+        stats = recorded_stats()
+        self.store_stats(context, stats, index, mathutils.Vector(stats.loc_change[index]))
+
+    def check_range(self, context):
+        scene = context.scene
+        if context.active_pose_bone is None:
+            self.report({'WARNING'}, "No active bone")
+            return False
+        if scene.measure_end_frame < scene.measure_start_frame:
+            self.report({'WARNING'}, "Frame range end is before its start")
+            return False
+        return True
+
+    def store_results(self, context, bake, active_name):
+        index = bake.names.index(active_name)
+        stats = rotation_stats(bake_rotations(bake), bake.frames)
+        self.store_stats(context, stats, index, current_bone_location_change(bake, index))
+
+    def store_stats(self, context, stats, index, loc_data):
+        rot_data = current_bone_rot_change(None, index, stats)
+        rot_min_max_data = current_bone_rot_min_max(None, index, stats)
 
         bpy.context.scene.active_bone_loc_difference = loc_data
         bpy.context.scene.active_bone_rot_difference = rot_data
         bpy.context.scene.active_bone_rot_min = rot_min_max_data.min
         bpy.context.scene.active_bone_rot_max = rot_min_max_data.max
-        
+        bpy.context.scene.active_bone_rot_mean = rot_min_max_data.mean
+        bpy.context.scene.active_bone_rot_range = rot_min_max_data.range
+        bpy.context.scene.active_bone_rot_min_frame = rot_min_max_data.min_frame
+        bpy.context.scene.active_bone_rot_max_frame = rot_min_max_data.max_frame
+
+
+@profile_operator
+class GaitAnalysisOperator(bpy.types.Operator):
+    """Detect foot contacts and strides over the measure range and export stride parameters and cycle normalized angles of the selected bones"""
+    bl_idname = "object.gait_analysis"
+    bl_label = "Gait Analysis in Range"
+    
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+
+    @classmethod
+    def poll(cls, context):
+        return (context.active_object is not None and context.active_object.type == 'ARMATURE'
+                and bool(context.scene.gait_feet))
+
+    def execute(self, context):
+        scene = context.scene
+        start_time = time.perf_counter()
+        try:
+            gait = bake_gait(
+                scene, context.active_object, pose_bones_to_bake(context), scene.gait_feet,
+                scene.measure_start_frame, scene.measure_end_frame, scene.measure_samples_per_frame,
+                height_fraction=scene.gait_height_fraction, speed_fraction=scene.gait_speed_fraction
+            )
+        except KeyError as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+        write_gait_report(gait, self.filepath, os.path.splitext(self.filepath)[0] + "_cycles.csv")
+        self.report({'INFO'}, "{}; {}".format(
+            gait_message(gait), throughput_message(len(gait.frames), time.perf_counter() - start_time)
+        ))
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+@profile_operator
+class CheckJointLimitsOperator(bpy.types.Operator):
+    """Check joint angles over the measure range against the reference data sheet and write a report"""
+    bl_idname = "object.check_joint_limits"
+    bl_label = "Check Joint Limits"
+    
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+
+    @classmethod
+    def poll(cls, context):
+        return (context.active_object is not None and context.active_object.type == 'ARMATURE'
+                and bool(context.scene.limit_sheet))
+
+    def execute(self, context):
+        scene = context.scene
+        armature = context.active_object
+        action = armature.animation_data.action if armature.animation_data else None
+        try:
+            limits = read_limit_sheet(scene.limit_sheet)
+            mapping = armature_limit_mapping(armature, limits, scene.limit_joint_map)
+            if not mapping:
+                self.report({'WARNING'}, "No joints of the sheet map to bones of " + armature.name)
+                return {'CANCELLED'}
+            result = run_limit_check(
+                scene, armature, limits, mapping, scene.measure_start_frame, scene.measure_end_frame,
+                action.name if action else armature.name
+            )
+            frames_path = os.path.splitext(self.filepath)[0] + "_frames.csv"
+            write_limit_report(self.filepath, [result], limits, frames_path)
+        except (OSError, KeyError, ValueError) as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+        out = [joint.name for j, joint in enumerate(result.mapping) if result.check.out_count[j]]
+        self.report({'INFO'}, "{} of {} joints out of range{}".format(
+            len(out), len(result.mapping), ": " + ", ".join(out) if out else ""
+        ))
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+@profile_operator
+class ImportMotionOperator(bpy.types.Operator):
+    """Keyframe the armature's bones from a motion table or a columnar export"""
+    bl_idname = "object.import_motion"
+    bl_label = "Import Motion"
+    
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and context.active_object.type == 'ARMATURE'
+
+    def execute(self, context):
+        scene = context.scene
+        armature = context.active_object
+        settings = angle_settings(scene)
+        start_time = time.perf_counter()
+        try:
+            tracks = read_motion(self.filepath, scene.render.fps)
+            bone_map = read_bone_map(scene.import_bone_map) if scene.import_bone_map else None
+        except (OSError, KeyError, ValueError) as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+        action = bpy.data.actions.new(os.path.splitext(os.path.basename(motion_path(self.filepath)))[0])
+        summary = import_motion(
+            armature, tracks, settings.space, settings.order, action, bone_map, 0.0,
+            scene.import_step, scene.import_angle_tolerance, scene.import_location_tolerance, scene.import_interpolation
+        )
+        if not summary.bones:
+            bpy.data.actions.remove(action)
+            self.report({'WARNING'}, "No tracks match bones of " + armature.name)
+            return {'CANCELLED'}
+        self.report({'INFO'}, "{} bones, {} of {} samples keyed in {:.2f} s{}".format(
+            len(summary.bones), summary.keys, summary.samples, time.perf_counter() - start_time,
+            ", skipped " + ", ".join(summary.skipped) if summary.skipped else ""
+        ))
         return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
 
 
+@profile_operator
 class CreateMuscleOperator(bpy.types.Operator):
     """Create a muscle from the active bones head and tail."""
     bl_idname = "object.create_muscle"
@@ -469,6 +4633,51 @@ class CreateMuscleOperator(bpy.types.Operator):
         return {'FINISHED'}
     
 
+@profile_operator
+class BulkMuscleOperator(bpy.types.Operator):
+    """Create and apply muscles for every row of a table of origin and insertion bones"""
+    bl_idname = "object.create_muscles_from_table"
+    bl_label = "Create Muscles from Table"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    text_name: bpy.props.StringProperty(name="Text", description="Text datablock holding the table, used instead of a file")
+    apply: bpy.props.BoolProperty(name="Apply to Armature", description="Apply the muscle geometry and add stretch bones", default=True)
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.muscle_armature is not None or (
+            context.active_object is not None and context.active_object.type == 'ARMATURE'
+        )
+
+    def execute(self, context):
+        armature = context.scene.muscle_armature
+        if armature is None:
+            armature = context.active_object
+        if "muscle_setup" not in bpy.data.node_groups:
+            self.report({'ERROR'}, "The muscle_setup node group is missing")
+            return {'CANCELLED'}
+        try:
+            muscles = read_muscle_table(self.text_name or self.filepath)
+            start_time = time.perf_counter()
+            objects = add_muscles(
+                muscles, armature, context.collection, self.apply,
+                context.scene.muscle_weighting, context.scene.muscle_weight_bones, context.scene.muscle_weight_falloff
+            )
+        except (OSError, KeyError, ValueError) as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+        self.report({'INFO'}, "Created {} muscles in {:.2f}s".format(len(objects), time.perf_counter() - start_time))
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        if self.text_name:
+            return self.execute(context)
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+@profile_operator
 class ObjectVolInfoOperator(bpy.types.Operator):
     """Calculate volume and area for the selected objects."""
     bl_idname = "object.obj_vol_area_change"
@@ -476,15 +4685,125 @@ class ObjectVolInfoOperator(bpy.types.Operator):
 
     @classmethod
     def poll(cls, context):
-        return context.active_object is not None and context.active_object.type == 'MESH'
+        return any(obj.type == 'MESH' for obj in context.selected_objects)
 
     def execute(self, context):
-        volume = current_obj_volume()
-        bpy.context.scene.selected_object_volume = volume
+        objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        with full_resolution_muscles(objects):
+            volumes, areas = meshes_volume_area(objects)
+        bpy.context.scene.selected_object_volume = volumes.sum()
+        bpy.context.scene.selected_object_area = areas.sum()
+        self.report({'INFO'}, "{} meshes: volume {:.4f}, area {:.4f}".format(len(objects), volumes.sum(), areas.sum()))
         
         return {'FINISHED'}
     
 
+@profile_operator
+class ExportMeshSeriesOperator(bpy.types.Operator):
+    """Export volume and area of the selected meshes for each frame in the measure range"""
+    bl_idname = "object.export_mesh_series"
+    bl_label = "Export Mesh Volume in Range"
+    
+    filepath: bpy.props.StringProperty(subtype="DIR_PATH")
+    file_format: bpy.props.EnumProperty(name="Format", items=EXPORT_FORMATS, default='CSV')
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == 'MESH' for obj in context.selected_objects)
+
+    def execute(self, context):
+        scene = bpy.context.scene
+        objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        start_time = time.perf_counter()
+        with full_resolution_muscles(objects):
+            series = bake_mesh_volume_area(scene, objects, scene.measure_start_frame, scene.measure_end_frame)
+        write_mesh_series(series, self.filepath, self.file_format)
+        self.report({'INFO'}, throughput_message(len(series.frames), time.perf_counter() - start_time))
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+@profile_operator
+class CollisionReportOperator(bpy.types.Operator):
+    """Report muscles penetrating each other or skeletal meshes for each frame in the measure range"""
+    bl_idname = "object.collision_report"
+    bl_label = "Collision Report in Range"
+    
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+
+    @classmethod
+    def poll(cls, context):
+        return sum(obj.type == 'MESH' for obj in context.selected_objects) > 1
+
+    def execute(self, context):
+        scene = bpy.context.scene
+        objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        obstacle_names = set(match_names([obj.name for obj in objects], scene.collision_obstacles))
+        muscles = [obj for obj in objects if obj.name not in obstacle_names]
+        obstacles = [obj for obj in objects if obj.name in obstacle_names]
+        if not muscles:
+            self.report({'WARNING'}, "All selected meshes match the skeletal mesh names")
+            return {'CANCELLED'}
+        start_time = time.perf_counter()
+        with full_resolution_muscles(muscles):
+            report = bake_collisions(
+                scene, muscles, obstacles, scene.measure_start_frame, scene.measure_end_frame, scene.collision_min_depth
+            )
+        write_collision_report(report, self.filepath, os.path.splitext(self.filepath)[0] + "_summary.csv")
+        summary = collision_summary(report)
+        self.report({'INFO'}, "{} colliding pairs{}, {}".format(
+            len(summary),
+            ", deepest {} / {} {:.4f} at frame {}".format(*summary[0]) if summary else "",
+            throughput_message(len(report.frames), time.perf_counter() - start_time)
+        ))
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+@profile_operator
+class ExportMuscleKinematicsOperator(bpy.types.Operator):
+    """Export length, strain, velocity and moment arm of the armature's muscles for each frame in the measure range"""
+    bl_idname = "object.export_muscle_kinematics"
+    bl_label = "Export Muscle Kinematics in Range"
+    
+    filepath: bpy.props.StringProperty(subtype="FILE_PATH")
+    file_format: bpy.props.EnumProperty(name="Format", items=EXPORT_FORMATS, default='CSV')
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and context.active_object.type == 'ARMATURE'
+
+    def execute(self, context):
+        scene = bpy.context.scene
+        armature = context.active_object
+        muscles = armature_muscles(armature)
+        if not muscles:
+            self.report({'WARNING'}, "No muscles found on " + armature.name)
+            return {'CANCELLED'}
+        joint = scene.muscle_joint if scene.muscle_joint in armature.pose.bones else None
+        axis = None if scene.muscle_joint_axis == 'NONE' else scene.muscle_joint_axis
+        start_time = time.perf_counter()
+        kinematics = bake_muscle_kinematics(
+            scene, armature, muscles, scene.measure_start_frame, scene.measure_end_frame, joint, axis
+        )
+        write_muscle_kinematics(kinematics, self.filepath, self.file_format)
+        self.report({'INFO'}, "{} muscles, {}".format(
+            len(muscles), throughput_message(len(kinematics.frames), time.perf_counter() - start_time)
+        ))
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+@profile_operator
 class MuscleRadiusOperator(bpy.types.Operator):
     """Modify radius of selected muscle."""
     bl_idname = "object.muscle_radius"
@@ -501,6 +4820,81 @@ class MuscleRadiusOperator(bpy.types.Operator):
         return {'FINISHED'}
 
 
+@profile_operator
+class MuscleBatchEditOperator(bpy.types.Operator):
+    """Set or scale radius and resolution of all selected muscles at once"""
+    bl_idname = "object.muscle_batch_edit"
+    bl_label = "Edit Selected Muscles"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    mode: bpy.props.EnumProperty(
+        name="Mode",
+        items=[('SET', "Set", "Replace the current values"), ('SCALE', "Scale", "Multiply the current values")],
+        default='SET',
+    )
+    name_filter: bpy.props.StringProperty(name="Name Filter", description="Only edit muscles matching this pattern, e.g. \"*_flexor\"")
+    use_radius: bpy.props.BoolProperty(name="Radius", default=True)
+    radius: bpy.props.FloatProperty(name="Radius Value", default=1.0)
+    use_u_res: bpy.props.BoolProperty(name="U Resolution", default=False)
+    u_res: bpy.props.FloatProperty(name="U Resolution Value", default=1.0, min=0.0)
+    use_r_res: bpy.props.BoolProperty(name="R Resolution", default=False)
+    r_res: bpy.props.FloatProperty(name="R Resolution Value", default=1.0, min=0.0)
+
+    @classmethod
+    def poll(cls, context):
+        return bool(muscle_objects(context.selected_objects))
+
+    def execute(self, context):
+        objects = muscle_objects(context.selected_objects, self.name_filter)
+        modify_muscles(
+            objects,
+            self.radius if self.use_radius else None,
+            self.u_res if self.use_u_res else None,
+            self.r_res if self.use_r_res else None,
+            scale=self.mode == 'SCALE',
+        )
+        self.report({'INFO'}, "Edited {} muscles".format(len(objects)))
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        if self.mode == 'SET' and not self.is_property_set("radius"):
+            self.radius = context.scene.muscle_radius
+        return context.window_manager.invoke_props_dialog(self)
+
+
+@profile_operator
+class MuscleWeightsOperator(bpy.types.Operator):
+    """Weight the selected applied muscles to their nearest bones by distance"""
+    bl_idname = "object.muscle_auto_weights"
+    bl_label = "Weight Muscles to Nearest Bones"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return any(
+            obj.type == 'MESH' and obj.parent is not None and obj.parent.type == 'ARMATURE'
+            for obj in context.selected_objects
+        )
+
+    def execute(self, context):
+        scene = context.scene
+        objects = [
+            obj for obj in context.selected_objects
+            if obj.type == 'MESH' and obj.parent is not None and obj.parent.type == 'ARMATURE'
+        ]
+        start_time = time.perf_counter()
+        vertex_count = 0
+        for armature in {obj.parent for obj in objects}:
+            muscles = [obj for obj in objects if obj.parent == armature]
+            weight_muscles(muscles, armature, None, scene.muscle_weight_bones, scene.muscle_weight_falloff)
+            vertex_count += sum(len(obj.data.vertices) for obj in muscles)
+        self.report({'INFO'}, "Weighted {} vertices of {} muscles in {:.2f}s".format(
+            vertex_count, len(objects), time.perf_counter() - start_time
+        ))
+        return {'FINISHED'}
+
+
+@profile_operator
 class MuscleConvertOperator(bpy.types.Operator):
     """Convert selected muscle."""
     bl_idname = "object.muscle_convert"
@@ -512,7 +4906,10 @@ class MuscleConvertOperator(bpy.types.Operator):
 
     def execute(self, context):
         armature = bpy.context.scene.muscle_armature
-        convert_to_mesh(bpy.context.active_object, armature)
+        scene = bpy.context.scene
+        convert_to_mesh(
+            bpy.context.active_object, armature, scene.muscle_weighting, scene.muscle_weight_bones, scene.muscle_weight_falloff
+        )
         
         return {'FINISHED'}
 
@@ -529,15 +4926,17 @@ class BoneRotationStatsPanel(bpy.types.Panel):
         layout = self.layout
         box = layout.box()
         row = box.row()
-        row.label(text="Timecode: " + get_timecode(bpy.context.scene), icon='TIME')
+        row.label(text="Timecode: " + panel_timecode(bpy.context.scene), icon='TIME')
         try:
-            bone = current_pb_transforms()[0]
+            bone = panel_bone_transforms(context)
             box = layout.box()
             row = box.row()
             row.label(text="Active Bone", icon='BONE_DATA')
             row = box.row()
             row.operator("object.create_muscle", icon='MOD_OUTLINE')
             row = box.row()
+            row.operator("object.create_muscles_from_table", icon='MOD_OUTLINE')
+            row = box.row()
             row.label(text="")
             row.label(text="X")
             row.label(text="Y")
@@ -561,6 +4960,10 @@ class BoneRotationStatsPanel(bpy.types.Panel):
             row = box.row()
             row.operator("object.bone_loc_change", icon='MOD_TIME')
             row = box.row()
+            row.prop(bpy.context.scene, "record_range_stats", icon='REC')
+            if range_recorder.active:
+                row.label(text="Recorded: {} / {}".format(np.count_nonzero(range_recorder.seen), len(range_recorder.seen)))
+            row = box.row()
             row.label(text="Loc Change:")
             row.label(text="{:.3f}".format(degrees(bpy.context.scene.active_bone_loc_difference[0])))
             row.label(text="{:.3f}".format(degrees(bpy.context.scene.active_bone_loc_difference[1])))
@@ -584,6 +4987,30 @@ class BoneRotationStatsPanel(bpy.types.Panel):
             row.label(text="{:.3f}".format(bpy.context.scene.active_bone_rot_max[0]))
             row.label(text="{:.3f}".format(bpy.context.scene.active_bone_rot_max[1]))
             row.label(text="{:.3f}".format(bpy.context.scene.active_bone_rot_max[2]))
+            
+            row = box.row()
+            row.label(text="Mean Angle:")
+            row.label(text="{:.3f}".format(bpy.context.scene.active_bone_rot_mean[0]))
+            row.label(text="{:.3f}".format(bpy.context.scene.active_bone_rot_mean[1]))
+            row.label(text="{:.3f}".format(bpy.context.scene.active_bone_rot_mean[2]))
+            
+            row = box.row()
+            row.label(text="Angle Range:")
+            row.label(text="{:.3f}".format(bpy.context.scene.active_bone_rot_range[0]))
+            row.label(text="{:.3f}".format(bpy.context.scene.active_bone_rot_range[1]))
+            row.label(text="{:.3f}".format(bpy.context.scene.active_bone_rot_range[2]))
+            
+            row = box.row()
+            row.label(text="Min Frame:")
+            row.label(text=str(bpy.context.scene.active_bone_rot_min_frame[0]))
+            row.label(text=str(bpy.context.scene.active_bone_rot_min_frame[1]))
+            row.label(text=str(bpy.context.scene.active_bone_rot_min_frame[2]))
+            
+            row = box.row()
+            row.label(text="Max Frame:")
+            row.label(text=str(bpy.context.scene.active_bone_rot_max_frame[0]))
+            row.label(text=str(bpy.context.scene.active_bone_rot_max_frame[1]))
+            row.label(text=str(bpy.context.scene.active_bone_rot_max_frame[2]))
         except Exception:
              pass
         
@@ -595,15 +5022,38 @@ class BoneRotationStatsPanel(bpy.types.Panel):
                 row = box.row()
                 row.prop(bpy.context.scene, "muscle_radius")
                 row.operator("object.muscle_radius")
+                row = box.row()
+                row.operator("object.muscle_batch_edit")
+                row = box.row()
+                row.prop(bpy.context.scene, "muscle_preview")
+                row.prop(bpy.context.scene, "muscle_preview_u_res", text="U")
+                row.prop(bpy.context.scene, "muscle_preview_r_res", text="R")
                 
             row = box.row()
             row.prop(bpy.context.scene, "muscle_armature")
             row.operator("object.muscle_convert", icon='CHECKMARK')
             row = box.row()
+            row.prop(bpy.context.scene, "muscle_weighting", text="")
+            row.prop(bpy.context.scene, "muscle_weight_bones")
+            row.prop(bpy.context.scene, "muscle_weight_falloff")
+            row = box.row()
+            row.operator("object.muscle_auto_weights", icon='MOD_VERTEX_WEIGHT')
+            row = box.row()
             row.operator("object.obj_vol_area_change", icon='SNAP_VOLUME')
             row = box.row()
             row.label(text="Volume:")
             row.label(text="{:.4f}".format(bpy.context.scene.selected_object_volume))
+            row = box.row()
+            row.label(text="Area:")
+            row.label(text="{:.4f}".format(bpy.context.scene.selected_object_area))
+            row = box.row()
+            row.operator("object.export_mesh_series", icon='EXPORT')
+            row = box.row()
+            row.prop(bpy.context.scene, "collision_obstacles")
+            row = box.row()
+            row.prop(bpy.context.scene, "collision_min_depth")
+            row = box.row()
+            row.operator("object.collision_report", icon='MOD_PHYSICS')
         
         if bpy.context.selected_pose_bones is not None:
             box = layout.box()
@@ -613,11 +5063,69 @@ class BoneRotationStatsPanel(bpy.types.Panel):
             row.prop(bpy.context.scene, "measure_start_frame")
             row.prop(bpy.context.scene, "measure_end_frame")
             row = box.row()
+            row.prop(bpy.context.scene, "measure_armature_only")
+            row = box.row()
+            row.prop(bpy.context.scene, "measure_angle_space")
+            row.prop(bpy.context.scene, "measure_rotation_order")
+            row = box.row()
+            row.prop(bpy.context.scene, "measure_continuous_angles")
+            row = box.row()
+            row.prop(bpy.context.scene, "measure_direct_sampling")
+            row.prop(bpy.context.scene, "measure_samples_per_frame")
+            row = box.row()
+            row.prop(bpy.context.scene, "measure_chunk_size")
+            row = box.row()
+            row.prop(bpy.context.scene, "measure_use_cache")
+            row.prop(bpy.context.scene, "measure_cache_size")
+            row = box.row()
             row.operator("object.export_global_rot", icon='EXPORT')    
             row = box.row()
             row.operator("object.export_global_rot_in_range", icon='EXPORT')
             row = box.row()
-            row.label(text="Selected: " + str(len(bpy.context.selected_pose_bones)))
+            row.prop_search(bpy.context.scene, "muscle_joint", context.active_object.data, "bones")
+            row.prop(bpy.context.scene, "muscle_joint_axis", text="")
+            row = box.row()
+            row.operator("object.export_muscle_kinematics", icon='EXPORT')
+            row = box.row()
+            row.prop(bpy.context.scene, "limit_sheet")
+            row = box.row()
+            row.prop(bpy.context.scene, "limit_joint_map")
+            row = box.row()
+            row.operator("object.check_joint_limits", icon='ERROR')
+            row = box.row()
+            row.prop(bpy.context.scene, "gait_feet")
+            row = box.row()
+            row.prop(bpy.context.scene, "gait_height_fraction")
+            row.prop(bpy.context.scene, "gait_speed_fraction")
+            row = box.row()
+            row.operator("object.gait_analysis", icon='MOD_DYNAMICPAINT')
+            row = box.row()
+            row.label(text="Selected: " + str(len(bpy.context.selected_pose_bones)))
+        
+        if context.active_object is not None and context.active_object.type == 'ARMATURE':
+            box = layout.box()
+            row = box.row()
+            row.label(text="Import Motion", icon='IMPORT')
+            row = box.row()
+            row.prop(bpy.context.scene, "measure_angle_space")
+            row.prop(bpy.context.scene, "measure_rotation_order")
+            row = box.row()
+            row.prop(bpy.context.scene, "import_bone_map")
+            row = box.row()
+            row.prop(bpy.context.scene, "import_step")
+            row.prop(bpy.context.scene, "import_interpolation", text="")
+            row = box.row()
+            row.prop(bpy.context.scene, "import_angle_tolerance")
+            row.prop(bpy.context.scene, "import_location_tolerance")
+            row = box.row()
+            row.operator("object.import_motion", icon='IMPORT')
+        
+        box = layout.box()
+        row = box.row()
+        row.prop(bpy.context.scene, "profile_operators")
+        if bpy.context.scene.profile_operators:
+            row = box.row()
+            row.prop(bpy.context.scene, "profile_directory")
 
 def register():
     bpy.utils.register_class(ExportGlobalRotOperator)
@@ -625,20 +5133,80 @@ def register():
     bpy.utils.register_class(BoneChangeInfoOperator)
     bpy.utils.register_class(BoneRotationStatsPanel)
     bpy.utils.register_class(ObjectVolInfoOperator)
+    bpy.utils.register_class(ExportMeshSeriesOperator)
+    bpy.utils.register_class(CollisionReportOperator)
+    bpy.utils.register_class(ExportMuscleKinematicsOperator)
+    bpy.utils.register_class(CheckJointLimitsOperator)
+    bpy.utils.register_class(GaitAnalysisOperator)
+    bpy.utils.register_class(ImportMotionOperator)
     bpy.utils.register_class(CreateMuscleOperator)
+    bpy.utils.register_class(BulkMuscleOperator)
     bpy.utils.register_class(MuscleRadiusOperator)
+    bpy.utils.register_class(MuscleBatchEditOperator)
     bpy.utils.register_class(MuscleConvertOperator)
+    bpy.utils.register_class(MuscleWeightsOperator)
+    bpy.app.handlers.frame_change_post.append(clear_panel_cache)
+    bpy.app.handlers.depsgraph_update_post.append(clear_panel_cache)
+    bpy.app.handlers.frame_change_post.append(record_range_frame)
+    bpy.app.handlers.save_pre.append(enable_evaluation_disabled)
+    bpy.app.handlers.save_post.append(disable_evaluation_disabled)
+    bpy.app.handlers.load_post.append(restore_evaluation_disabled)
     bpy.types.Scene.active_bone_rot_difference = bpy.props.FloatVectorProperty(name="Rot_Difference", subtype='XYZ')
     bpy.types.Scene.active_bone_loc_difference = bpy.props.FloatVectorProperty(name="Loc_Difference", subtype='XYZ')
     bpy.types.Scene.active_bone_rot_min = bpy.props.FloatVectorProperty(name="Rot Min", subtype='XYZ')
     bpy.types.Scene.active_bone_rot_max = bpy.props.FloatVectorProperty(name="Rot Max", subtype='XYZ')
+    bpy.types.Scene.active_bone_rot_mean = bpy.props.FloatVectorProperty(name="Rot Mean", subtype='XYZ')
+    bpy.types.Scene.active_bone_rot_range = bpy.props.FloatVectorProperty(name="Rot Range", subtype='XYZ')
+    bpy.types.Scene.active_bone_rot_min_frame = bpy.props.IntVectorProperty(name="Rot Min Frame", subtype='XYZ')
+    bpy.types.Scene.active_bone_rot_max_frame = bpy.props.IntVectorProperty(name="Rot Max Frame", subtype='XYZ')
     bpy.types.Scene.measure_start_frame = bpy.props.IntProperty(name="Frame Range Start:", default=(1))
     bpy.types.Scene.measure_end_frame = bpy.props.IntProperty(name="Frame Range End:", default=(80))
+    bpy.types.Scene.measure_chunk_size = bpy.props.IntProperty(name="Frames per Update", description="Frames sampled between interface updates while measuring or exporting in the background", default=25, min=1)
+    bpy.types.Scene.record_range_stats = bpy.props.BoolProperty(name="Record Playback", description="Accumulate range statistics of the selected bones while frames are played or scrubbed", default=False, update=toggle_range_recording)
+    bpy.types.Scene.measure_use_cache = bpy.props.BoolProperty(name="Cache Bakes", description="Reuse baked bones whose animation, constraints and rest pose are unchanged, stored next to the .blend file", default=True)
+    bpy.types.Scene.measure_cache_size = bpy.props.IntProperty(name="Cache Size (MB)", description="Least recently used bakes are removed above this size", default=512, min=1)
+    bpy.types.Scene.measure_angle_space = bpy.props.EnumProperty(name="Angles", description="Space of reported and exported rotations", items=ANGLE_SPACES, default='ARMATURE')
+    bpy.types.Scene.measure_rotation_order = bpy.props.EnumProperty(name="Order", description="Euler rotation order of reported and exported rotations", items=ROTATION_ORDERS, default='XYZ')
+    bpy.types.Scene.measure_continuous_angles = bpy.props.BoolProperty(name="Continuous Angles", description="Unwrap angles past 180 degrees and keep quaternion signs consistent over the frame range", default=True)
+    bpy.types.Scene.measure_direct_sampling = bpy.props.BoolProperty(name="Direct F-Curve Sampling", description="Compute bones without constraints or drivers from their F-curves instead of evaluating every frame", default=True)
+    bpy.types.Scene.measure_samples_per_frame = bpy.props.IntProperty(name="Samples per Frame", description="Sub-frame samples of range exports, e.g. 10 for ten times the scene frame rate", default=1, min=1)
+    bpy.types.Scene.measure_armature_only = bpy.props.BoolProperty(name="Evaluate Armature Only", description="Skip evaluating meshes and other objects the armature does not depend on while measuring", default=True)
+    bpy.types.Scene.profile_operators = bpy.props.BoolProperty(name="Profile Operators", description="Write a JSON trace of wall time, frame evaluations, phase timings and peak memory for every operator run (also enabled by the TETRAPOD_PROFILE environment variable)", default=False)
+    bpy.types.Scene.profile_directory = bpy.props.StringProperty(name="Traces", description="Folder for profile traces, defaults to the temporary directory", subtype='DIR_PATH')
     bpy.types.Scene.selected_object_volume = bpy.props.FloatProperty(name="Select Objects Volume")
     bpy.types.Scene.selected_object_area = bpy.props.FloatProperty(name="Select Objects Area")
     bpy.types.Scene.muscle_radius = bpy.props.FloatProperty(name="Muscle Radius")
     bpy.types.Scene.muscle_armature = bpy.props.StringProperty(name="")
     bpy.types.Scene.muscle_armature = bpy.props.PointerProperty(type=bpy.types.Object, poll=armature_poll, name="")
+    bpy.types.Scene.gait_feet = bpy.props.StringProperty(name="Feet", description="Comma separated name patterns of the foot or toe bones whose tails touch the ground")
+    bpy.types.Scene.gait_height_fraction = bpy.props.FloatProperty(name="Contact Height", description="Fraction of each foot's height range above its lowest point still counted as contact", default=0.1, min=0.0, max=1.0)
+    bpy.types.Scene.gait_speed_fraction = bpy.props.FloatProperty(name="Contact Speed", description="Fraction of each foot's fast speed below which it counts as planted", default=0.2, min=0.0, max=1.0)
+    bpy.types.Scene.limit_sheet = bpy.props.StringProperty(name="Data Sheet", description="Reference data sheet of joint angle limits", subtype='FILE_PATH')
+    bpy.types.Scene.limit_joint_map = bpy.props.StringProperty(name="Joint Map", description="Table of joint, parent and child bone (file or text datablock); guessed from bone names if empty")
+    bpy.types.Scene.import_bone_map = bpy.props.StringProperty(name="Bone Map", description="Table of source and bone columns (file or text datablock) mapping imported tracks to bones; tracks are matched by name if empty")
+    bpy.types.Scene.import_step = bpy.props.IntProperty(name="Step", description="Keep every n-th sample of imported motion", default=1, min=1)
+    bpy.types.Scene.import_angle_tolerance = bpy.props.FloatProperty(name="Angle Tolerance", description="Remove imported keyframes that linear interpolation reproduces within this many degrees", default=0.0, min=0.0)
+    bpy.types.Scene.import_location_tolerance = bpy.props.FloatProperty(name="Location Tolerance", description="Remove imported keyframes that linear interpolation reproduces within this distance", default=0.0, min=0.0)
+    bpy.types.Scene.import_interpolation = bpy.props.EnumProperty(name="Interpolation", description="Interpolation of imported keyframes", items=KEY_INTERPOLATIONS, default='LINEAR')
+    bpy.types.Scene.collision_obstacles = bpy.props.StringProperty(name="Skeletal Meshes", description="Comma separated name patterns of the selected meshes that are bones; the other selected meshes are checked as muscles")
+    bpy.types.Scene.collision_min_depth = bpy.props.FloatProperty(name="Minimum Depth", description="Ignore penetrations shallower than this, e.g. muscles touching their attachment bones", default=0.0, min=0.0)
+    bpy.types.Scene.muscle_joint = bpy.props.StringProperty(name="Joint", description="Bone whose head is the joint center for muscle moment arms")
+    bpy.types.Scene.muscle_joint_axis = bpy.props.EnumProperty(
+        name="Joint Axis",
+        items=[
+            ('NONE', "Distance", "Unsigned distance from the joint center to the line of action"),
+            ('X', "X Axis", "Signed moment arm about the joint bone's X axis"),
+            ('Y', "Y Axis", "Signed moment arm about the joint bone's Y axis"),
+            ('Z', "Z Axis", "Signed moment arm about the joint bone's Z axis"),
+        ],
+        default='X',
+    )
+    bpy.types.Scene.muscle_weighting = bpy.props.EnumProperty(name="Weighting", description="How applied muscles are weighted to the armature", items=MUSCLE_WEIGHTING, default='SINGLE')
+    bpy.types.Scene.muscle_weight_bones = bpy.props.IntProperty(name="Bones", description="Nearest bones blended per vertex by automatic weighting", default=4, min=1)
+    bpy.types.Scene.muscle_weight_falloff = bpy.props.FloatProperty(name="Falloff", description="Power of the inverse distance weights of automatic weighting", default=2.0, min=0.0)
+    bpy.types.Scene.muscle_preview = bpy.props.BoolProperty(name="Preview", description="Show muscles at low resolution in the viewport; measurement and export always use full resolution", default=False, update=toggle_muscle_preview)
+    bpy.types.Scene.muscle_preview_u_res = bpy.props.IntProperty(name="Preview U Resolution", default=8, min=1)
+    bpy.types.Scene.muscle_preview_r_res = bpy.props.IntProperty(name="Preview R Resolution", default=4, min=1)
     
 
 def unregister():
@@ -647,19 +5215,1290 @@ def unregister():
     bpy.utils.unregister_class(BoneChangeInfoOperator)
     bpy.utils.unregister_class(BoneRotationStatsPanel)
     bpy.utils.unregister_class(ObjectVolInfoOperator)
+    bpy.utils.unregister_class(ExportMeshSeriesOperator)
+    bpy.utils.unregister_class(CollisionReportOperator)
+    bpy.utils.unregister_class(ExportMuscleKinematicsOperator)
+    bpy.utils.unregister_class(CheckJointLimitsOperator)
+    bpy.utils.unregister_class(GaitAnalysisOperator)
+    bpy.utils.unregister_class(ImportMotionOperator)
     bpy.utils.unregister_class(CreateMuscleOperator)
+    bpy.utils.unregister_class(BulkMuscleOperator)
     bpy.utils.unregister_class(MuscleRadiusOperator)
+    bpy.utils.unregister_class(MuscleBatchEditOperator)
     bpy.utils.unregister_class(MuscleConvertOperator)
+    bpy.utils.unregister_class(MuscleWeightsOperator)
+    if clear_panel_cache in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(clear_panel_cache)
+    if clear_panel_cache in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(clear_panel_cache)
+    if record_range_frame in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(record_range_frame)
+    if enable_evaluation_disabled in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(enable_evaluation_disabled)
+    if disable_evaluation_disabled in bpy.app.handlers.save_post:
+        bpy.app.handlers.save_post.remove(disable_evaluation_disabled)
+    if restore_evaluation_disabled in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(restore_evaluation_disabled)
+    stop_range_recording()
     del bpy.types.Scene.measure_start_frame
     del bpy.types.Scene.measure_end_frame
+    del bpy.types.Scene.measure_armature_only
+    del bpy.types.Scene.measure_direct_sampling
+    del bpy.types.Scene.measure_angle_space
+    del bpy.types.Scene.measure_rotation_order
+    del bpy.types.Scene.measure_continuous_angles
+    del bpy.types.Scene.measure_samples_per_frame
+    del bpy.types.Scene.measure_use_cache
+    del bpy.types.Scene.measure_cache_size
+    del bpy.types.Scene.record_range_stats
+    del bpy.types.Scene.measure_chunk_size
     del bpy.types.Scene.active_bone_loc_difference
     del bpy.types.Scene.active_bone_rot_difference
     del bpy.types.Scene.active_bone_rot_min
     del bpy.types.Scene.active_bone_rot_max
+    del bpy.types.Scene.active_bone_rot_mean
+    del bpy.types.Scene.active_bone_rot_range
+    del bpy.types.Scene.active_bone_rot_min_frame
+    del bpy.types.Scene.active_bone_rot_max_frame
+    del bpy.types.Scene.profile_operators
+    del bpy.types.Scene.profile_directory
     del bpy.types.Scene.selected_object_volume
     del bpy.types.Scene.selected_object_area
     del bpy.types.Scene.muscle_radius
     del bpy.types.Scene.muscle_armature
+    del bpy.types.Scene.gait_feet
+    del bpy.types.Scene.gait_height_fraction
+    del bpy.types.Scene.gait_speed_fraction
+    del bpy.types.Scene.limit_sheet
+    del bpy.types.Scene.limit_joint_map
+    del bpy.types.Scene.import_bone_map
+    del bpy.types.Scene.import_step
+    del bpy.types.Scene.import_angle_tolerance
+    del bpy.types.Scene.import_location_tolerance
+    del bpy.types.Scene.import_interpolation
+    del bpy.types.Scene.collision_obstacles
+    del bpy.types.Scene.collision_min_depth
+    del bpy.types.Scene.muscle_joint
+    del bpy.types.Scene.muscle_joint_axis
+    del bpy.types.Scene.muscle_weighting
+    del bpy.types.Scene.muscle_weight_bones
+    del bpy.types.Scene.muscle_weight_falloff
+    del bpy.types.Scene.muscle_preview
+    del bpy.types.Scene.muscle_preview_u_res
+    del bpy.types.Scene.muscle_preview_r_res
+
+### Benchmark ###
+BENCHMARK_FORMAT = "tetrapod-toolkit-benchmark"
+
+
+def ensure_muscle_setup():
+    """
+    Returns the muscle_setup node group, building a procedural one if the file has none.
+    
+    The procedural group sweeps a circle of radius Socket_2 and resolution
+    Socket_5 along the muscle edge resampled to Socket_4 points, matching the
+    inputs modify_muscle() sets.
+    
+    """
+    group = bpy.data.node_groups.get("muscle_setup")
+    if group is not None:
+        return group
+    
+    group = bpy.data.node_groups.new("muscle_setup", 'GeometryNodeTree')
+    interface = group.interface
+    interface.new_socket("Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    interface.new_socket("Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    radius = interface.new_socket("Radius", in_out='INPUT', socket_type='NodeSocketFloat')
+    radius.default_value = 0.1
+    fill_caps = interface.new_socket("Fill Caps", in_out='INPUT', socket_type='NodeSocketBool')
+    fill_caps.default_value = True
+    u_res = interface.new_socket("U Resolution", in_out='INPUT', socket_type='NodeSocketInt')
+    u_res.default_value = 16
+    r_res = interface.new_socket("R Resolution", in_out='INPUT', socket_type='NodeSocketInt')
+    r_res.default_value = 8
+    identifiers = [radius.identifier, u_res.identifier, r_res.identifier]
+    if identifiers != [MUSCLE_SOCKETS["radius"], MUSCLE_SOCKETS["u_res"], MUSCLE_SOCKETS["r_res"]]:
+        raise RuntimeError("Unexpected muscle_setup socket identifiers: " + ", ".join(identifiers))
+    
+    nodes = group.nodes
+    group_input = nodes.new('NodeGroupInput')
+    group_output = nodes.new('NodeGroupOutput')
+    to_curve = nodes.new('GeometryNodeMeshToCurve')
+    resample = nodes.new('GeometryNodeResampleCurve')
+    profile = nodes.new('GeometryNodeCurvePrimitiveCircle')
+    to_mesh = nodes.new('GeometryNodeCurveToMesh')
+    
+    links = group.links
+    links.new(group_input.outputs["Geometry"], to_curve.inputs["Mesh"])
+    links.new(to_curve.outputs["Curve"], resample.inputs["Curve"])
+    links.new(group_input.outputs["U Resolution"], resample.inputs["Count"])
+    links.new(group_input.outputs["R Resolution"], profile.inputs["Resolution"])
+    links.new(group_input.outputs["Radius"], profile.inputs["Radius"])
+    links.new(resample.outputs["Curve"], to_mesh.inputs["Curve"])
+    links.new(profile.outputs["Curve"], to_mesh.inputs["Profile Curve"])
+    links.new(group_input.outputs["Fill Caps"], to_mesh.inputs["Fill Caps"])
+    links.new(to_mesh.outputs["Mesh"], group_output.inputs["Geometry"])
+    
+    return group
+
+
+def build_synthetic_armature(scene, bone_count, frame_count, name="Benchmark", seed=0):
+    """
+    Returns a new armature with a chain of bones keyframed on every frame.
+    
+    Each bone gets XYZ Euler sine curves with random amplitude, period and
+    phase, written in bulk with keyframe_points.foreach_set.
+    
+    """
+    data = bpy.data.armatures.new(name)
+    armature = bpy.data.objects.new(name, data)
+    scene.collection.objects.link(armature)
+    bpy.context.view_layer.objects.active = armature
+    
+    bpy.ops.object.mode_set(mode='EDIT')
+    parent = None
+    for i in range(bone_count):
+        bone = data.edit_bones.new("Bone.{:03d}".format(i))
+        bone.head = (0.0, 0.0, float(i))
+        bone.tail = (0.0, 0.0, float(i + 1))
+        bone.parent = parent
+        bone.use_connect = parent is not None
+        parent = bone
+    bpy.ops.object.mode_set(mode='OBJECT')
+    
+    action = bpy.data.actions.new(name + "Action")
+    armature.animation_data_create().action = action
+    rng = np.random.default_rng(seed)
+    frames = np.arange(1, frame_count + 1, dtype=np.float32)
+    for pb in armature.pose.bones:
+        pb.rotation_mode = 'XYZ'
+        for axis in range(3):
+            amplitude, period, phase = rng.uniform(0.1, 1.0), rng.uniform(10.0, 60.0), rng.uniform(0.0, 2 * np.pi)
+            values = amplitude * np.sin(2 * np.pi * frames / period + phase)
+            write_fcurve_keys(action, 'pose.bones["{}"].rotation_euler'.format(pb.name), axis, pb.name, frames, values)
+    
+    scene.frame_start = scene.measure_start_frame = 1
+    scene.frame_end = scene.measure_end_frame = frame_count
+    scene.frame_set(1)
+    
+    return armature
+
+
+def synthetic_muscles(armature, muscle_count):
+    """
+    Returns muscle table rows spanning pairs of bones of a synthetic armature.
+    
+    """
+    names = [pb.name for pb in armature.pose.bones]
+    muscles = []
+    for i in range(muscle_count):
+        muscle = Object()
+        muscle.name = "Muscle.{:03d}".format(i)
+        muscle.origin = names[i % len(names)]
+        muscle.insertion = names[(i + 1) % len(names)]
+        muscle.radius = 0.1
+        muscle.u_res = 16
+        muscle.r_res = 8
+        muscles.append(muscle)
+    
+    return muscles
+
+
+def time_call(function, repeat=1):
+    """
+    Returns the fastest wall time in seconds of calling function repeat times.
+    
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start_time)
+    
+    return best
+
+
+def benchmark_case(scene, bone_count, frame_count, muscle_count, repeat, directory):
+    """
+    Builds one synthetic specimen, times the add-on's pipelines on it and removes it again.
+    
+    The scene's frame ranges and current frame are restored afterwards.
+    
+    """
+    before = [
+        (collection, set(collection)) for collection in
+        (bpy.data.objects, bpy.data.meshes, bpy.data.armatures, bpy.data.actions, bpy.data.node_groups)
+    ]
+    ranges = (
+        scene.frame_start, scene.frame_end, scene.measure_start_frame, scene.measure_end_frame, scene.frame_current
+    )
+    timings = {}
+    try:
+        armature = build_synthetic_armature(scene, bone_count, frame_count)
+        bpy.ops.object.mode_set(mode='POSE')
+        for bone in armature.data.bones:
+            bone.select = True
+        armature.data.bones.active = armature.data.bones[0]
+        
+        paths = iter(os.path.join(directory, "{}.csv".format(i)) for i in range(2 * repeat))
+        timings["write_pb_rot_csv"] = time_call(lambda: write_pb_rot_csv(scene, next(paths)), repeat)
+        timings["write_pb_rot_in_range_csv"] = time_call(lambda: write_pb_rot_in_range_csv(scene, next(paths)), repeat)
+        timings["bone_change_info"] = time_call(lambda: bpy.ops.object.bone_loc_change('EXEC_DEFAULT'), repeat)
+        
+        bpy.ops.object.mode_set(mode='OBJECT')
+        if muscle_count:
+            ensure_muscle_setup()
+            objects = []
+            timings["muscle_create"] = time_call(
+                lambda: objects.extend(add_muscles(synthetic_muscles(armature, muscle_count), armature, scene.collection, False))
+            )
+            timings["muscle_convert"] = time_call(lambda: [convert_to_mesh(obj, armature) for obj in objects])
+            bpy.ops.object.mode_set(mode='OBJECT')
+            timings["current_obj_volume"] = time_call(lambda: [current_obj_volume(obj) for obj in objects], repeat)
+    finally:
+        if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        for collection, existing in before:
+            for block in [block for block in collection if block not in existing]:
+                collection.remove(block)
+        scene.frame_start, scene.frame_end, scene.measure_start_frame, scene.measure_end_frame = ranges[:4]
+        scene.frame_set(ranges[4])
+    
+    return {
+        "case": "bones={},frames={},muscles={}".format(bone_count, frame_count, muscle_count),
+        "bones": bone_count,
+        "frames": frame_count,
+        "muscles": muscle_count,
+        "timings": timings
+    }
+
+
+def run_benchmark(scene, bone_counts, frame_counts, muscle_counts, repeat=3):
+    """
+    Times every combination of bone, frame and muscle counts and returns the results as a dict.
+    
+    The bake cache and playback recording are disabled so every case
+    evaluates its frames.
+    
+    """
+    settings = scene.measure_use_cache, scene.record_range_stats
+    scene.measure_use_cache = False
+    scene.record_range_stats = False
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for bone_count in bone_counts:
+                for frame_count in frame_counts:
+                    for muscle_count in muscle_counts:
+                        result = benchmark_case(scene, bone_count, frame_count, muscle_count, repeat, directory)
+                        print(result["case"], " ".join(
+                            "{}={:.4f}s".format(name, seconds) for name, seconds in result["timings"].items()
+                        ))
+                        results.append(result)
+    finally:
+        scene.measure_use_cache, scene.record_range_stats = settings
+    
+    return {
+        "format": BENCHMARK_FORMAT,
+        "version": 1,
+        "blender": bpy.app.version_string,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+        "results": results
+    }
+
+
+def benchmark_regressions(results, baseline, tolerance=0.25, min_seconds=0.005):
+    """
+    Returns (case, timing, seconds, baseline seconds) for every timing slower than the baseline.
+    
+    A timing regresses if it is more than tolerance (a fraction) and more than
+    min_seconds slower than the same case and timing of the baseline.
+    
+    """
+    reference = {result["case"]: result["timings"] for result in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        for name, seconds in result["timings"].items():
+            baseline_seconds = reference.get(result["case"], {}).get(name)
+            if baseline_seconds is None:
+                continue
+            if seconds > baseline_seconds * (1.0 + tolerance) and seconds - baseline_seconds > min_seconds:
+                regressions.append((result["case"], name, seconds, baseline_seconds))
+    
+    return regressions
+
+
+def parse_counts(text):
+    return [int(count) for count in text.split(",") if count.strip()]
+
+
+### Command Line ###
+def find_armature(scene, name=None):
+    """
+    Returns the named armature, the active object if it is an armature, or the first armature.
+    
+    """
+    if name:
+        obj = bpy.data.objects.get(name)
+        if obj is None or obj.type != 'ARMATURE':
+            raise KeyError("No armature named " + name)
+        return obj
+    active = bpy.context.view_layer.objects.active
+    if active is not None and active.type == 'ARMATURE':
+        return active
+    for obj in scene.objects:
+        if obj.type == 'ARMATURE':
+            return obj
+    raise KeyError("No armature in scene " + scene.name)
+
+
+def split_frame_range(frame_start, frame_end, shard_count):
+    """
+    Returns (start, end) pairs of consecutive, inclusive frame ranges covering the range.
+    
+    """
+    frames = np.arange(frame_start, frame_end + 1)
+    shards = np.array_split(frames, max(min(shard_count, len(frames)), 1))
+    return [(int(shard[0]), int(shard[-1])) for shard in shards if len(shard)]
+
+
+def worker_command(blend_path, arguments):
+    """
+    Returns the command running this script on a .blend file in a background Blender.
+    
+    """
+    return [
+        bpy.app.binary_path,
+        "--background", blend_path,
+        "--python-exit-code", "1",
+        "--python", os.path.abspath(__file__),
+        "--"
+    ] + [str(argument) for argument in arguments]
+
+
+def run_workers(commands, workers, log_dir, timeout=None):
+    """
+    Runs the commands with at most the given number of processes at a time.
+    
+    Returns the exit code of each command, in order. The output of command i
+    is written to worker_<i>.log in log_dir. Workers running longer than
+    timeout seconds are killed and get the exit code None.
+    
+    """
+    pending = list(enumerate(commands))
+    running = []
+    codes = [None] * len(commands)
+    while pending or running:
+        while pending and len(running) < max(workers, 1):
+            i, command = pending.pop(0)
+            log = open(os.path.join(log_dir, "worker_{}.log".format(i)), mode='w')
+            process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+            running.append((i, process, log, time.perf_counter()))
+        for entry in list(running):
+            i, process, log, start_time = entry
+            if process.poll() is not None:
+                codes[i] = process.returncode
+            elif timeout is not None and time.perf_counter() - start_time > timeout:
+                process.kill()
+                process.wait()
+                log.write("\nKilled after {} seconds\n".format(timeout))
+            else:
+                continue
+            log.close()
+            running.remove(entry)
+        time.sleep(0.05)
+    
+    return codes
+
+
+def worker_log_tail(log_dir, i, lines=5):
+    """
+    Returns the last lines of a worker log, used to report failures.
+    
+    """
+    try:
+        with open(os.path.join(log_dir, "worker_{}.log".format(i))) as reader:
+            return " | ".join(line.strip() for line in reader.readlines()[-lines:] if line.strip())
+    except OSError:
+        return ""
+
+
+def export_range_sharded(scene, armature, names, frame_start, frame_end, path, file_format, workers, samples_per_frame=1):
+    """
+    Exports bone rotations for a frame range using several background Blender processes.
+    
+    The range is split into one consecutive shard per worker, every worker
+    bakes its shard from the saved .blend file, and the shards are merged in
+    frame order and written with the same exporters as the interface.
+    
+    """
+    pose_bones = armature_pose_bones(armature, names)
+    names = [pb.name for pb in pose_bones]
+    shards = split_frame_range(frame_start, frame_end, workers)
+    
+    if workers <= 1 or len(shards) <= 1:
+        bake = bake_pose_bones(scene, pose_bones, frame_start, frame_end, samples_per_frame=samples_per_frame)
+    else:
+        if not bpy.data.filepath:
+            raise RuntimeError("The .blend file must be saved before exporting with several workers")
+        shard_dir = tempfile.mkdtemp(prefix="tetrapod_shards_")
+        try:
+            commands = []
+            for i, (start, end) in enumerate(shards):
+                arguments = [
+                    "bake-shard",
+                    "--scene", scene.name,
+                    "--armature", armature.name,
+                    "--bones", ",".join(names),
+                    "--start", start,
+                    "--end", end,
+                    "--samples-per-frame", samples_per_frame,
+                    "--output", os.path.join(shard_dir, "shard_{}.npz".format(i))
+                ]
+                if samples_per_frame > 1 and i + 1 < len(shards):
+                    # Sub-frames between this shard's last frame and the next shard's first.
+                    arguments[arguments.index("--end") + 1] = shards[i + 1][0]
+                    arguments.append("--exclude-end")
+                commands.append(worker_command(bpy.data.filepath, arguments))
+            codes = run_workers(commands, workers, shard_dir)
+            failed = [i for i, code in enumerate(codes) if code != 0]
+            if failed:
+                raise RuntimeError("Shards {} failed, see logs in {}".format(failed, shard_dir))
+            bake = merge_bakes([
+                load_bake(os.path.join(shard_dir, "shard_{}.npz".format(i))) for i in range(len(shards))
+            ])
+        except Exception:
+            print("Shard files kept in", shard_dir)
+            raise
+        shutil.rmtree(shard_dir, ignore_errors=True)
+    
+    if file_format == 'CSV':
+        write_pb_rot_in_range_csv(scene, path, bake)
+    else:
+        write_bake_columns(bake, path, file_format)
+    
+    return bake
+
+
+BATCH_SUMMARY_HEADER = [
+    'specimen', 'file', 'status', 'error', 'type', 'name',
+    'rot_min_x', 'rot_min_y', 'rot_min_z',
+    'rot_max_x', 'rot_max_y', 'rot_max_z',
+    'rot_mean_x', 'rot_mean_y', 'rot_mean_z',
+    'rot_travel_x', 'rot_travel_y', 'rot_travel_z',
+    'loc_change_x', 'loc_change_y', 'loc_change_z',
+    'volume'
+]
+
+
+def match_names(names, patterns):
+    """
+    Returns the names matching any of the comma separated fnmatch patterns, in order.
+    
+    """
+    patterns = [pattern.strip() for pattern in patterns.split(",") if pattern.strip()]
+    return [name for name in names if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+
+def read_blend_manifest(path):
+    """
+    Returns the .blend files of a folder, or listed in a manifest file.
+    
+    A manifest is either a text file with one path per line, a CSV file with
+    a 'file' column or a JSON list of paths. Relative paths are resolved
+    against the manifest's folder.
+    
+    """
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(".blend")
+        )
+    
+    root = os.path.dirname(os.path.abspath(path))
+    with open(path, newline='') as reader:
+        if path.lower().endswith(".json"):
+            files = json.load(reader)
+        elif path.lower().endswith(".csv"):
+            files = [row["file"] for row in csv.DictReader(reader)]
+        else:
+            files = [line.strip() for line in reader if line.strip() and not line.startswith("#")]
+    
+    return [os.path.join(root, file) for file in files]
+
+
+def summarize_specimen(scene, armature, bone_patterns, object_patterns, frame_start, frame_end,
+                       export_path=None, file_format='CSV'):
+    """
+    Returns travel, min/max and volume measurements of the open file as a dict.
+    
+    Bones and mesh objects are picked by fnmatch patterns, defaulting to the
+    selected bones and selected meshes. Patterns matching nothing raise a
+    KeyError rather than falling back to the selection. If export_path is
+    given the bone rotations are exported from the same bake.
+    
+    """
+    summary = {
+        "file": bpy.data.filepath,
+        "scene": scene.name,
+        "frame_start": frame_start,
+        "frame_end": frame_end,
+        "bones": [],
+        "objects": []
+    }
+    
+    if armature is not None:
+        names = match_names([pb.name for pb in armature.pose.bones], bone_patterns) if bone_patterns else None
+        if names == []:
+            raise KeyError("No bones of {} match {}".format(armature.name, bone_patterns))
+        summary["armature"] = armature.name
+        bake = bake_pose_bones(scene, armature_pose_bones(armature, names), frame_start, frame_end)
+        if export_path and file_format == 'CSV':
+            write_pb_rot_in_range_csv(scene, export_path, bake)
+        elif export_path:
+            write_bake_columns(bake, export_path, file_format)
+        if bake.names and len(bake.frames):
+            stats = rotation_stats(bake_rotations(bake), bake.frames)
+            for i, name in enumerate(bake.names):
+                rot_min_max = current_bone_rot_min_max(bake, i, stats)
+                summary["bones"].append({
+                    "name": name,
+                    "rot_min": list(rot_min_max.min),
+                    "rot_max": list(rot_min_max.max),
+                    "rot_mean": list(rot_min_max.mean),
+                    "rot_travel": list(current_bone_rot_change(bake, i, stats)),
+                    "loc_change": list(current_bone_location_change(bake, i))
+                })
+    
+    meshes = [obj for obj in scene.objects if obj.type == 'MESH']
+    if object_patterns:
+        names = match_names([obj.name for obj in meshes], object_patterns)
+        if not names:
+            raise KeyError("No meshes of {} match {}".format(scene.name, object_patterns))
+        meshes = [scene.objects[name] for name in names]
+    else:
+        meshes = [obj for obj in meshes if obj.select_get()]
+    with full_resolution_muscles(meshes):
+        for obj in meshes:
+            summary["objects"].append({"name": obj.name, "volume": current_obj_volume(obj)})
+    
+    return summary
+
+
+def summary_rows(specimen, file, summary):
+    """
+    Yields the rows of the batch summary table for one specimen's summary.
+    
+    """
+    for bone in summary["bones"]:
+        yield [specimen, file, "ok", "", "bone", bone["name"]] + bone["rot_min"] + bone["rot_max"] \
+            + bone["rot_mean"] + bone["rot_travel"] + bone["loc_change"] + [""]
+    for obj in summary["objects"]:
+        yield [specimen, file, "ok", "", "object", obj["name"]] + [""] * 15 + [obj["volume"]]
+
+
+def run_batch(files, output, armature_name=None, bone_patterns=None, object_patterns=None,
+              frame_start=None, frame_end=None, export_dir=None, file_format='CSV', workers=1, timeout=None):
+    """
+    Measures many .blend files in parallel background Blender processes.
+    
+    Every file is summarized by its own worker, so a file that fails or times
+    out is reported in the table without affecting the others. The summary
+    table has one row per measured bone or object of each specimen, and one
+    row with the error for each failed specimen. Returns the number of failures.
+    
+    """
+    work_dir = tempfile.mkdtemp(prefix="tetrapod_batch_")
+    commands = []
+    for i, file in enumerate(files):
+        arguments = ["summarize", "--output", os.path.join(work_dir, "summary_{}.json".format(i))]
+        for flag, value in (
+            ("--armature", armature_name),
+            ("--bones", bone_patterns),
+            ("--objects", object_patterns),
+            ("--start", frame_start),
+            ("--end", frame_end),
+            ("--format", file_format)
+        ):
+            if value is not None:
+                arguments += [flag, value]
+        if export_dir:
+            specimen = os.path.splitext(os.path.basename(file))[0]
+            extension = {'CSV': ".csv", 'NPZ': ".npz", 'NPY': ""}[file_format]
+            arguments += ["--export", os.path.join(os.path.abspath(export_dir), specimen + extension)]
+        commands.append(worker_command(file, arguments))
+    if export_dir:
+        os.makedirs(export_dir, exist_ok=True)
+    codes = run_workers(commands, workers, work_dir, timeout)
+    
+    failures = 0
+    with open(output, mode='w', newline='') as writer:
+        writer = csv.writer(writer)
+        writer.writerow(BATCH_SUMMARY_HEADER)
+        for i, file in enumerate(files):
+            specimen = os.path.splitext(os.path.basename(file))[0]
+            summary_path = os.path.join(work_dir, "summary_{}.json".format(i))
+            if codes[i] == 0 and os.path.exists(summary_path):
+                with open(summary_path) as reader:
+                    writer.writerows(summary_rows(specimen, file, json.load(reader)))
+            else:
+                failures += 1
+                error = "timed out" if codes[i] is None else "exit code {}".format(codes[i])
+                error += ": " + worker_log_tail(work_dir, i)
+                writer.writerow([specimen, file, "failed", error] + [""] * (len(BATCH_SUMMARY_HEADER) - 4))
+    
+    if failures:
+        print("Worker logs kept in", work_dir)
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    return failures
+
+
+SWEEP_LEVELS = ("extreme_min", "average", "extreme_max")
+
+
+def read_sweep_grid(path, limits=None):
+    """
+    Returns the parameters of a sweep grid from a JSON file.
+    
+    The file holds a list of parameters (or an object with a "parameters"
+    list), each with comma separated "bones" name patterns, an optional
+    "axis" (X, Y or Z, all rotation axes if omitted), and lists of
+    "amplitude" scales and "offset" degrees, both defaulting to no change.
+    A parameter with a "sheet_joint" takes its amplitudes from the
+    reference data sheet as the Extreme -50%, Average and Extreme +50%
+    values relative to the Average, and raises a ValueError if the joint
+    lacks one of them or its Average is 0.
+    
+    """
+    with open(path) as reader:
+        grid = json.load(reader)
+    if isinstance(grid, dict):
+        grid = grid["parameters"]
+    
+    parameters = []
+    for entry in grid:
+        parameter = Object()
+        parameter.bones = entry["bones"]
+        parameter.axis = entry.get("axis")
+        parameter.name = entry.get("name") or parameter.bones + (":" + parameter.axis if parameter.axis else "")
+        parameter.amplitudes = [float(value) for value in entry.get("amplitude", [1.0])]
+        parameter.offsets = [float(value) for value in entry.get("offset", [0.0])]
+        if entry.get("sheet_joint"):
+            if limits is None or entry["sheet_joint"] not in limits:
+                raise KeyError("Joint not in the data sheet: " + entry["sheet_joint"])
+            values = limits[entry["sheet_joint"]].values
+            if any(level not in values for level in SWEEP_LEVELS) or values["average"] == 0.0:
+                raise ValueError("Joint {} needs Extreme -50%, Average and Extreme +50% values other than 0".format(
+                    entry["sheet_joint"]
+                ))
+            parameter.amplitudes = [values[level] / values["average"] for level in SWEEP_LEVELS]
+        parameters.append(parameter)
+    
+    return parameters
+
+
+def sweep_channels(armature, parameter):
+    """
+    Returns the (bone, axis index) rotation channels a sweep parameter scales.
+    
+    """
+    names = match_names([pb.name for pb in armature.pose.bones], parameter.bones)
+    
+    return [(name, index) for name in names for index in (["XYZ".index(parameter.axis)] if parameter.axis else range(3))]
+
+
+def unmatched_sweep_parameters(armature, parameters):
+    """
+    Returns the names of parameters without a rotation_euler F-curve to scale in the armature's action.
+    
+    Bones using quaternion or axis angle rotation have none, so scaling them
+    would measure an unchanged variant.
+    
+    """
+    animation = armature.animation_data
+    animated = set()
+    if animation is not None and animation.action is not None:
+        for fcurve in animation.action.fcurves:
+            name = pose_bone_name_from_path(fcurve.data_path)
+            if name is not None and fcurve.data_path.endswith(".rotation_euler") and len(fcurve.keyframe_points):
+                animated.add((name, fcurve.array_index))
+    
+    return [parameter.name for parameter in parameters if not animated.intersection(sweep_channels(armature, parameter))]
+
+
+def sweep_variants(armature, parameters):
+    """
+    Returns every combination of the parameters' amplitudes and offsets as variants.
+    
+    Each variant holds its parameter levels and the resulting scaling of
+    every rotation channel as (bone, axis index, amplitude, offset in
+    degrees), where channels scaled by several parameters compose and
+    unchanged channels are left out. Variants with the same scalings share a
+    key, so they only need to be run once.
+    
+    """
+    channels = [sweep_channels(armature, parameter) for parameter in parameters]
+    variants = []
+    levels = [list(itertools.product(parameter.amplitudes, parameter.offsets)) for parameter in parameters]
+    for combination in itertools.product(*levels):
+        scalings = {}
+        for parameter_channels, (amplitude, offset) in zip(channels, combination):
+            for channel in parameter_channels:
+                previous_amplitude, previous_offset = scalings.get(channel, (1.0, 0.0))
+                scalings[channel] = (previous_amplitude * amplitude, previous_offset * amplitude + offset)
+        variant = Object()
+        variant.levels = list(combination)
+        variant.scalings = sorted(
+            (name, index, round(amplitude, 9), round(offset, 9))
+            for (name, index), (amplitude, offset) in scalings.items()
+            if round(amplitude, 9) != 1.0 or round(offset, 9) != 0.0
+        )
+        variant.key = hashlib.sha1(json.dumps(variant.scalings).encode()).hexdigest()[:16]
+        variants.append(variant)
+    
+    return variants
+
+
+def scale_action(action, scalings):
+    """
+    Scales the rotation_euler F-curves of an action about their mean and offsets them.
+    
+    scalings are (bone, axis index, amplitude, offset in degrees). Keyframe
+    values and handles are read and written in bulk with foreach_get/set.
+    
+    """
+    scalings = {(name, index): (amplitude, offset) for name, index, amplitude, offset in scalings}
+    for fcurve in action.fcurves:
+        name = pose_bone_name_from_path(fcurve.data_path)
+        if name is None or not fcurve.data_path.endswith(".rotation_euler"):
+            continue
+        scaling = scalings.get((name, fcurve.array_index))
+        points = fcurve.keyframe_points
+        if scaling is None or len(points) == 0:
+            continue
+        amplitude, offset = scaling
+        arrays = {}
+        for key in ("co", "handle_left", "handle_right"):
+            arrays[key] = np.empty(len(points) * 2, dtype=np.float32)
+            points.foreach_get(key, arrays[key])
+        mean = arrays["co"][1::2].mean()
+        for key, values in arrays.items():
+            values[1::2] = mean + amplitude * (values[1::2] - mean) + np.radians(offset)
+            points.foreach_set(key, values)
+        fcurve.update()
+
+
+def run_sweep_jobs(scene, armature, jobs, results_dir, bone_patterns=None, object_patterns=None,
+                   frame_start=None, frame_end=None):
+    """
+    Measures sweep variants one after another in the open file, as a worker does.
+    
+    Each variant scales a copy of the armature's action, is summarized like
+    a batch specimen and written to <key>.json in results_dir as soon as it
+    is done, so an interrupted sweep keeps every finished variant. A failing
+    variant is reported and skipped. Returns the number of failed variants.
+    
+    """
+    animation = armature.animation_data_create()
+    initial_action = animation.action
+    if initial_action is None:
+        raise RuntimeError("No action on " + armature.name)
+    failures = 0
+    for job in jobs:
+        action = initial_action.copy()
+        try:
+            animation.action = action
+            scale_action(action, job["scalings"])
+            summary = summarize_specimen(scene, armature, bone_patterns, object_patterns, frame_start, frame_end)
+        except Exception as error:
+            print("Variant {} failed: {}: {}".format(job["key"], type(error).__name__, error))
+            failures += 1
+            continue
+        finally:
+            animation.action = initial_action
+            bpy.data.actions.remove(action)
+        summary["scalings"] = job["scalings"]
+        path = os.path.join(results_dir, job["key"] + ".json")
+        with open(path + ".tmp", mode='w') as writer:
+            json.dump(summary, writer, indent=2)
+        os.replace(path + ".tmp", path)
+    
+    return failures
+
+
+def sweep_manifest(scene, armature, bone_patterns, object_patterns, frame_start, frame_end):
+    """
+    Returns what the results of a sweep depend on besides the scalings of each variant.
+    
+    """
+    hasher = hashlib.sha1()
+    animation = armature.animation_data
+    if animation is not None and animation.action is not None:
+        hash_animation_settings(hasher, animation)
+        hash_fcurves(hasher, animation.action.fcurves)
+    
+    return {
+        "format": "tetrapod-toolkit-sweep",
+        "version": 1,
+        "file": os.path.basename(bpy.data.filepath),
+        "scene": scene.name,
+        "armature": armature.name,
+        "action": hasher.hexdigest(),
+        "bones": bone_patterns,
+        "objects": object_patterns,
+        "frame_start": frame_start,
+        "frame_end": frame_end
+    }
+
+
+def check_sweep_manifest(results_dir, manifest):
+    """
+    Writes the manifest of a results folder, or raises a RuntimeError if its results were measured differently.
+    
+    """
+    path = os.path.join(results_dir, "manifest.json")
+    if os.path.exists(path):
+        with open(path) as reader:
+            existing = json.load(reader)
+        changed = sorted(key for key in set(manifest) | set(existing) if manifest.get(key) != existing.get(key))
+        if changed:
+            raise RuntimeError("Results in {} were measured with a different {}, use another results folder".format(
+                results_dir, ", ".join(changed)
+            ))
+        return
+    if any(name.endswith(".json") for name in os.listdir(results_dir)):
+        raise RuntimeError("Results in {} have no manifest, use another results folder".format(results_dir))
+    with open(path, mode='w') as writer:
+        json.dump(manifest, writer, indent=2)
+
+
+def run_sweep(scene, armature, parameters, output, results_dir, bone_patterns=None, object_patterns=None,
+              frame_start=None, frame_end=None, workers=1, timeout=None):
+    """
+    Measures every variant of a parameter grid in parallel background Blender processes.
+    
+    Variants are deduplicated by their scalings and those with a result in
+    results_dir are skipped, so rerunning an interrupted sweep resumes it.
+    The rest are split over at most workers processes that each open the
+    file once and measure their share of variants in turn. The results table
+    has the parameter levels of every variant followed by its batch summary
+    rows. Returns the number of variants that failed.
+    
+    The folder's manifest records the action, patterns and frame range, and
+    a sweep with other settings refuses to reuse it. Parameters without a
+    rotation_euler F-curve to scale raise a ValueError before any variant runs.
+    
+    """
+    if not bpy.data.filepath:
+        raise RuntimeError("Save the .blend file before running a sweep")
+    os.makedirs(results_dir, exist_ok=True)
+    frame_start = scene.measure_start_frame if frame_start is None else frame_start
+    frame_end = scene.measure_end_frame if frame_end is None else frame_end
+    unmatched = unmatched_sweep_parameters(armature, parameters)
+    if unmatched:
+        raise ValueError("No rotation_euler F-curves of {} to scale for: {}".format(armature.name, ", ".join(unmatched)))
+    check_sweep_manifest(results_dir, sweep_manifest(
+        scene, armature, bone_patterns, object_patterns, frame_start, frame_end
+    ))
+    variants = sweep_variants(armature, parameters)
+    pending = {}
+    for variant in variants:
+        if not os.path.exists(os.path.join(results_dir, variant.key + ".json")):
+            pending.setdefault(variant.key, {"key": variant.key, "scalings": variant.scalings})
+    pending = list(pending.values())
+    print("{} variants, {} unique, {} to run".format(
+        len(variants), len({variant.key for variant in variants}), len(pending)
+    ))
+    
+    work_dir = tempfile.mkdtemp(prefix="tetrapod_sweep_")
+    commands = []
+    for i in range(min(max(workers, 1), len(pending))):
+        jobs_path = os.path.join(work_dir, "jobs_{}.json".format(i))
+        with open(jobs_path, mode='w') as writer:
+            json.dump(pending[i::max(workers, 1)], writer)
+        arguments = [
+            "sweep-worker", "--jobs", jobs_path, "--results", os.path.abspath(results_dir),
+            "--scene", scene.name, "--armature", armature.name, "--start", frame_start, "--end", frame_end
+        ]
+        for flag, value in (("--bones", bone_patterns), ("--objects", object_patterns)):
+            if value is not None:
+                arguments += [flag, value]
+        commands.append(worker_command(bpy.data.filepath, arguments))
+    codes = run_workers(commands, workers, work_dir, timeout)
+    
+    failures = 0
+    header = ['variant', 'key'] + [
+        parameter.name + suffix for parameter in parameters for suffix in (" amplitude", " offset")
+    ] + BATCH_SUMMARY_HEADER[2:]
+    with open(output, mode='w', newline='') as writer:
+        writer = csv.writer(writer)
+        writer.writerow(header)
+        for i, variant in enumerate(variants):
+            prefix = [i + 1, variant.key] + [value for level in variant.levels for value in level]
+            result_path = os.path.join(results_dir, variant.key + ".json")
+            if os.path.exists(result_path):
+                with open(result_path) as reader:
+                    writer.writerows(prefix + row[2:] for row in summary_rows("", "", json.load(reader)))
+            else:
+                failures += 1
+                writer.writerow(prefix + ["failed", "no result, see the worker logs"] + [""] * (len(header) - len(prefix) - 2))
+    
+    if any(code != 0 for code in codes):
+        print("Worker logs kept in", work_dir)
+        for i, code in enumerate(codes):
+            if code != 0:
+                print("Worker {} {}: {}".format(
+                    i, "timed out" if code is None else "exit code {}".format(code), worker_log_tail(work_dir, i)
+                ))
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    return failures
+
+
+def cli_parser():
+    parser = argparse.ArgumentParser(
+        prog="blender -b file.blend --python tetrapod-toolkit-addon.py --",
+        description="Tetrapod Toolkit command line tools."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    export_range = commands.add_parser("export-range", help="Export bone rotations for a frame range")
+    add_bone_arguments(export_range)
+    export_range.add_argument("--output", required=True, help="Output file, or folder for NPY")
+    export_range.add_argument("--format", default='CSV', choices=[item[0] for item in EXPORT_FORMATS])
+    export_range.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Background Blender processes to use")
+    export_range.add_argument("--samples-per-frame", type=int, default=1, help="Sub-frame samples, e.g. 10 for ten times the scene frame rate")
+    
+    bake_shard = commands.add_parser("bake-shard", help="Bake a frame range to an .npz archive (used by export-range)")
+    add_bone_arguments(bake_shard)
+    bake_shard.add_argument("--samples-per-frame", type=int, default=1)
+    bake_shard.add_argument("--exclude-end", action="store_true", help="Leave out the sample at the end frame")
+    bake_shard.add_argument("--output", required=True)
+    
+    muscles = commands.add_parser("muscle-kinematics", help="Export muscle length, strain, velocity and moment arm for a frame range")
+    add_bone_arguments(muscles)
+    muscles.add_argument("--joint", help="Joint bone for moment arms")
+    muscles.add_argument("--axis", choices=["X", "Y", "Z"], help="Joint bone axis for signed moment arms, defaults to the distance")
+    muscles.add_argument("--output", required=True, help="Output file, or folder for NPY")
+    muscles.add_argument("--format", default='CSV', choices=[item[0] for item in EXPORT_FORMATS])
+    
+    gait = commands.add_parser("gait", help="Segment strides and normalize joint angles to the gait cycle for a frame range")
+    add_bone_arguments(gait)
+    gait.add_argument("--feet", required=True, help="Comma separated foot or toe bone name patterns")
+    gait.add_argument("--reference", help="Foot whose strides define the gait cycle, defaults to the first")
+    gait.add_argument("--height-fraction", type=float, default=0.1, help="Contact height as a fraction of each foot's height range")
+    gait.add_argument("--speed-fraction", type=float, default=0.2, help="Contact speed as a fraction of each foot's fast speed")
+    gait.add_argument("--min-frames", type=int, default=2, help="Shortest stance or swing in samples")
+    gait.add_argument("--samples-per-frame", type=int, default=1)
+    gait.add_argument("--output", required=True, help="Stride table CSV")
+    gait.add_argument("--cycles-output", help="Mean and standard deviation cycle CSV, or .npz with every cycle")
+    
+    limits = commands.add_parser("check-limits", help="Check joint angles of one or more actions against a reference data sheet")
+    limits.add_argument("--sheet", required=True, help="Reference data sheet CSV")
+    limits.add_argument("--map", help="Joint map CSV or text datablock with joint, parent and child columns, guessed if omitted")
+    limits.add_argument("--scene", help="Scene name, defaults to the active scene")
+    limits.add_argument("--armature", help="Armature object name, defaults to the active or first armature")
+    limits.add_argument("--actions", help="Comma separated action name patterns checked as trials, defaults to the current action")
+    limits.add_argument("--start", type=int, help="First frame, defaults to each action's range")
+    limits.add_argument("--end", type=int, help="Last frame, defaults to each action's range")
+    limits.add_argument("--output", required=True, help="Summary CSV")
+    limits.add_argument("--frames-output", help="Also list every frame out of range in this CSV")
+    
+    collisions = commands.add_parser("collisions", help="Report muscles penetrating each other or skeletal meshes for a frame range")
+    collisions.add_argument("--scene", help="Scene name, defaults to the active scene")
+    collisions.add_argument("--muscles", help="Comma separated muscle mesh name patterns, defaults to all unapplied muscles")
+    collisions.add_argument("--obstacles", help="Comma separated skeletal mesh name patterns")
+    collisions.add_argument("--start", type=int, help="First frame, defaults to the scene's measure range")
+    collisions.add_argument("--end", type=int, help="Last frame, defaults to the scene's measure range")
+    collisions.add_argument("--min-depth", type=float, default=0.0, help="Ignore shallower penetrations")
+    collisions.add_argument("--output", required=True, help="Per frame CSV")
+    collisions.add_argument("--summary-output", help="Also write one row per colliding pair to this CSV")
+    
+    motion = commands.add_parser("import-motion", help="Keyframe an armature from a motion table or a columnar export")
+    motion.add_argument("input", help="Long or wide CSV table, .npz archive or .npy folder")
+    motion.add_argument("--scene", help="Scene name, defaults to the active scene")
+    motion.add_argument("--armature", help="Armature object name, defaults to the active or first armature")
+    motion.add_argument("--map", help="Bone map CSV or text datablock with source and bone columns")
+    motion.add_argument("--space", choices=[item[0] for item in ANGLE_SPACES], help="Angle space of the rotations, defaults to the scene's")
+    motion.add_argument("--order", choices=list(EULER_AXES), help="Euler rotation order of the rotations, defaults to the scene's")
+    motion.add_argument("--action", help="Action name, defaults to the input file name")
+    motion.add_argument("--frame-offset", type=float, default=0.0, help="Added to every imported frame")
+    motion.add_argument("--step", type=int, default=1, help="Keep every n-th sample")
+    motion.add_argument("--angle-tolerance", type=float, default=0.0, help="Decimation tolerance in degrees")
+    motion.add_argument("--location-tolerance", type=float, default=0.0, help="Decimation tolerance in scene units")
+    motion.add_argument("--interpolation", default='LINEAR', choices=[item[0] for item in KEY_INTERPOLATIONS])
+    motion.add_argument("--save", help="Save the .blend file to this path afterwards")
+    
+    batch = commands.add_parser("batch", help="Summarize many .blend files in parallel")
+    batch.add_argument("input", help="Folder of .blend files, or a .txt, .csv or .json manifest")
+    batch.add_argument("--output", required=True, help="Summary table CSV")
+    batch.add_argument("--armature", help="Armature object name in each file")
+    batch.add_argument("--bones", help="Comma separated bone name patterns, defaults to the selected bones")
+    batch.add_argument("--objects", help="Comma separated mesh name patterns for volumes, defaults to the selected meshes")
+    batch.add_argument("--start", type=int, help="First frame, defaults to each scene's measure range")
+    batch.add_argument("--end", type=int, help="Last frame, defaults to each scene's measure range")
+    batch.add_argument("--export-dir", help="Also export each file's bone rotations to this folder")
+    batch.add_argument("--format", default='CSV', choices=[item[0] for item in EXPORT_FORMATS])
+    batch.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    batch.add_argument("--timeout", type=float, help="Seconds after which a file's worker is killed")
+    
+    sweep = commands.add_parser("sweep", help="Measure every variant of a grid of amplitude and offset scalings of the action in parallel")
+    sweep.add_argument("--grid", required=True, help="JSON list of parameters with bones, axis, amplitude and offset lists")
+    sweep.add_argument("--sheet", help="Reference data sheet for parameters with a sheet_joint")
+    sweep.add_argument("--scene", help="Scene name, defaults to the active scene")
+    sweep.add_argument("--armature", help="Armature object name, defaults to the active or first armature")
+    sweep.add_argument("--bones", help="Comma separated bone name patterns to measure, defaults to the selected bones")
+    sweep.add_argument("--objects", help="Comma separated mesh name patterns for volumes, defaults to the selected meshes")
+    sweep.add_argument("--start", type=int, help="First frame, defaults to the scene's measure range")
+    sweep.add_argument("--end", type=int, help="Last frame, defaults to the scene's measure range")
+    sweep.add_argument("--output", required=True, help="Results table CSV")
+    sweep.add_argument("--results", help="Folder of per variant results, reused to resume, defaults to next to the output")
+    sweep.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    sweep.add_argument("--timeout", type=float, help="Seconds after which a worker is killed")
+    
+    sweep_worker = commands.add_parser("sweep-worker", help="Measure a list of sweep variants (used by sweep)")
+    add_bone_arguments(sweep_worker)
+    sweep_worker.add_argument("--objects", help="Comma separated mesh name patterns for volumes")
+    sweep_worker.add_argument("--jobs", required=True)
+    sweep_worker.add_argument("--results", required=True)
+    
+    benchmark = commands.add_parser("benchmark", help="Time the add-on on synthetic armatures, optionally against a baseline")
+    benchmark.add_argument("--bones", type=parse_counts, default=[10, 100], help="Comma separated bone counts")
+    benchmark.add_argument("--frames", type=parse_counts, default=[100, 1000], help="Comma separated frame counts")
+    benchmark.add_argument("--muscles", type=parse_counts, default=[0, 10], help="Comma separated muscle counts")
+    benchmark.add_argument("--repeat", type=int, default=3, help="Runs per timing, the fastest is kept")
+    benchmark.add_argument("--output", required=True, help="Results JSON")
+    benchmark.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    benchmark.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline as a fraction")
+    
+    summarize = commands.add_parser("summarize", help="Write a JSON summary of the open file (used by batch)")
+    add_bone_arguments(summarize)
+    summarize.add_argument("--objects", help="Comma separated mesh name patterns for volumes")
+    summarize.add_argument("--output", required=True)
+    summarize.add_argument("--export", help="Also export the bone rotations to this path")
+    summarize.add_argument("--format", default='CSV', choices=[item[0] for item in EXPORT_FORMATS])
+    
+    return parser
+
+
+def add_bone_arguments(parser):
+    parser.add_argument("--scene", help="Scene name, defaults to the active scene")
+    parser.add_argument("--armature", help="Armature object name, defaults to the active or first armature")
+    parser.add_argument("--bones", help="Comma separated bone names, defaults to the selected bones")
+    parser.add_argument("--start", type=int, help="First frame, defaults to the scene's measure range")
+    parser.add_argument("--end", type=int, help="Last frame, defaults to the scene's measure range")
+
+
+def cli_bone_arguments(args):
+    """
+    Returns the scene, armature, bone names and frame range selected by the arguments.
+    
+    """
+    scene = bpy.data.scenes[args.scene] if args.scene else bpy.context.scene
+    armature = find_armature(scene, args.armature)
+    names = [name.strip() for name in args.bones.split(",")] if args.bones else None
+    frame_start = scene.measure_start_frame if args.start is None else args.start
+    frame_end = scene.measure_end_frame if args.end is None else args.end
+    
+    return scene, armature, names, frame_start, frame_end
+
+
+def run_cli(argv):
+    args = cli_parser().parse_args(argv)
+    if not profiling_enabled():
+        return run_cli_command(args)
+    
+    begin_trace("cli." + args.command)
+    try:
+        status = run_cli_command(args)
+    except Exception:
+        end_trace("ERROR")
+        raise
+    print("Profile written to " + end_trace("FINISHED" if status == 0 else "FAILED"))
+    return status
+
+
+def run_cli_command(args):
+    if args.command == "batch":
+        failures = run_batch(
+            read_blend_manifest(args.input), args.output, args.armature, args.bones, args.objects,
+            args.start, args.end, args.export_dir, args.format, args.workers, args.timeout
+        )
+        print("{} files failed".format(failures) if failures else "All files summarized")
+        return 1 if failures else 0
+    
+    if args.command == "sweep":
+        scene = bpy.data.scenes[args.scene] if args.scene else bpy.context.scene
+        armature = find_armature(scene, args.armature)
+        parameters = read_sweep_grid(args.grid, read_limit_sheet(args.sheet) if args.sheet else None)
+        results_dir = args.results or os.path.splitext(args.output)[0] + "_variants"
+        start_time = time.perf_counter()
+        failures = run_sweep(
+            scene, armature, parameters, args.output, results_dir, args.bones, args.objects,
+            args.start, args.end, args.workers, args.timeout
+        )
+        print("{} variants failed".format(failures) if failures else "All variants measured")
+        print("{:.1f} s".format(time.perf_counter() - start_time))
+        return 1 if failures else 0
+    
+    if args.command == "sweep-worker":
+        scene = bpy.data.scenes[args.scene] if args.scene else bpy.context.scene
+        armature = find_armature(scene, args.armature)
+        with open(args.jobs) as reader:
+            jobs = json.load(reader)
+        frame_start = scene.measure_start_frame if args.start is None else args.start
+        frame_end = scene.measure_end_frame if args.end is None else args.end
+        failures = run_sweep_jobs(scene, armature, jobs, args.results, args.bones, args.objects, frame_start, frame_end)
+        return 1 if failures else 0
+    
+    if args.command == "benchmark":
+        results = run_benchmark(bpy.context.scene, args.bones, args.frames, args.muscles, args.repeat)
+        with open(args.output, mode='w') as writer:
+            json.dump(results, writer, indent=2)
+        if not args.baseline:
+            return 0
+        with open(args.baseline) as reader:
+            baseline = json.load(reader)
+        regressions = benchmark_regressions(results, baseline, args.tolerance)
+        for case, name, seconds, baseline_seconds in regressions:
+            print("Regression {} {}: {:.4f}s, baseline {:.4f}s".format(case, name, seconds, baseline_seconds))
+        print("{} regressions".format(len(regressions)) if regressions else "No regressions")
+        return 1 if regressions else 0
+    
+    if args.command == "collisions":
+        scene = bpy.data.scenes[args.scene] if args.scene else bpy.context.scene
+        meshes = [obj for obj in scene.objects if obj.type == 'MESH']
+        if args.muscles:
+            names = set(match_names([obj.name for obj in meshes], args.muscles))
+            muscles = [obj for obj in meshes if obj.name in names]
+        else:
+            muscles = muscle_objects(meshes)
+        names = set(match_names([obj.name for obj in meshes], args.obstacles)) if args.obstacles else set()
+        obstacles = [obj for obj in meshes if obj.name in names and obj not in muscles]
+        frame_start = scene.measure_start_frame if args.start is None else args.start
+        frame_end = scene.measure_end_frame if args.end is None else args.end
+        start_time = time.perf_counter()
+        with full_resolution_muscles(muscles):
+            report = bake_collisions(scene, muscles, obstacles, frame_start, frame_end, args.min_depth)
+        write_collision_report(report, args.output, args.summary_output)
+        for row in collision_summary(report)[:10]:
+            print("{} / {}: {} frames, max depth {:.4f} at frame {}".format(*row))
+        print("{} muscles, {} skeletal meshes, {}".format(
+            len(muscles), len(obstacles), throughput_message(len(report.frames), time.perf_counter() - start_time)
+        ))
+        return 0
+    
+    if args.command == "import-motion":
+        scene = bpy.data.scenes[args.scene] if args.scene else bpy.context.scene
+        armature = find_armature(scene, args.armature)
+        settings = angle_settings(scene)
+        start_time = time.perf_counter()
+        tracks = read_motion(args.input, scene.render.fps)
+        name = args.action or os.path.splitext(os.path.basename(motion_path(args.input)))[0]
+        existing = bpy.data.actions.get(name)
+        action = existing or bpy.data.actions.new(name)
+        summary = import_motion(
+            armature, tracks, args.space or settings.space, args.order or settings.order,
+            action, read_bone_map(args.map) if args.map else None,
+            args.frame_offset, args.step, args.angle_tolerance, args.location_tolerance, args.interpolation
+        )
+        if not summary.bones and existing is None:
+            bpy.data.actions.remove(action)
+        if summary.skipped:
+            print("Skipped tracks without a bone: " + ", ".join(summary.skipped))
+        print("{} bones, {} of {} samples keyed in {:.2f} s".format(
+            len(summary.bones), summary.keys, summary.samples, time.perf_counter() - start_time
+        ))
+        if args.save:
+            bpy.ops.wm.save_as_mainfile(filepath=os.path.abspath(args.save))
+        return 0 if summary.bones else 1
+    
+    if args.command == "check-limits":
+        scene = bpy.data.scenes[args.scene] if args.scene else bpy.context.scene
+        armature = find_armature(scene, args.armature)
+        limits = read_limit_sheet(args.sheet)
+        mapping = armature_limit_mapping(armature, limits, args.map)
+        if not mapping:
+            print("No joints of the sheet map to bones of " + armature.name)
+            return 1
+        if args.actions:
+            names = match_names([action.name for action in bpy.data.actions], args.actions)
+            actions = [bpy.data.actions[name] for name in names]
+        elif armature.animation_data and armature.animation_data.action:
+            actions = [armature.animation_data.action]
+        else:
+            raise RuntimeError("No action to check on " + armature.name)
+        start_time = time.perf_counter()
+        results = check_action_limits(scene, armature, limits, mapping, actions, args.start, args.end)
+        write_limit_report(args.output, results, limits, args.frames_output)
+        frame_count = sum(len(result.frames) for result in results)
+        print("{} trials, {} joints, {}".format(
+            len(results), len(results[0].mapping) if results else 0,
+            throughput_message(frame_count, time.perf_counter() - start_time)
+        ))
+        return 0
+    
+    if args.command == "summarize":
+        if not bpy.data.filepath:
+            raise RuntimeError("The .blend file could not be opened")
+        scene = bpy.data.scenes[args.scene] if args.scene else bpy.context.scene
+        try:
+            armature = find_armature(scene, args.armature)
+        except KeyError:
+            if args.armature:
+                raise
+            armature = None
+        frame_start = scene.measure_start_frame if args.start is None else args.start
+        frame_end = scene.measure_end_frame if args.end is None else args.end
+        summary = summarize_specimen(
+            scene, armature, args.bones, args.objects, frame_start, frame_end, args.export, args.format
+        )
+        with open(args.output, mode='w') as writer:
+            json.dump(summary, writer, indent=2)
+        return 0
+    
+    scene, armature, names, frame_start, frame_end = cli_bone_arguments(args)
+    if args.command == "export-range":
+        start_time = time.perf_counter()
+        bake = export_range_sharded(
+            scene, armature, names, frame_start, frame_end, args.output, args.format, args.workers, args.samples_per_frame
+        )
+        print(throughput_message(len(bake.frames), time.perf_counter() - start_time))
+    elif args.command == "bake-shard":
+        pose_bones = armature_pose_bones(armature, names)
+        if args.exclude_end:
+            frames = sample_frames(frame_start, frame_end, args.samples_per_frame)[:-1]
+            bake = bake_pose_bone_frames(scene, pose_bones, frames)
+        else:
+            bake = bake_pose_bones(scene, pose_bones, frame_start, frame_end, samples_per_frame=args.samples_per_frame)
+        save_bake(bake, args.output)
+    elif args.command == "gait":
+        start_time = time.perf_counter()
+        gait = bake_gait(
+            scene, armature, armature_pose_bones(armature, names), args.feet, frame_start, frame_end,
+            args.samples_per_frame, reference=args.reference, height_fraction=args.height_fraction,
+            speed_fraction=args.speed_fraction, min_samples=args.min_frames
+        )
+        write_gait_report(gait, args.output, args.cycles_output)
+        print(gait_message(gait))
+        print(throughput_message(len(gait.frames), time.perf_counter() - start_time))
+    elif args.command == "muscle-kinematics":
+        start_time = time.perf_counter()
+        muscles = armature_muscles(armature, names)
+        kinematics = bake_muscle_kinematics(scene, armature, muscles, frame_start, frame_end, args.joint, args.axis)
+        write_muscle_kinematics(kinematics, args.output, args.format)
+        print("{} muscles, {}".format(len(muscles), throughput_message(len(kinematics.frames), time.perf_counter() - start_time)))
+    
+    return 0
+
 
 if __name__ == "__main__":
     register()
+    # Command line use: blender -b file.blend --python tetrapod-toolkit-addon.py -- <command> ...
+    if "--" in sys.argv:
+        sys.exit(run_cli(sys.argv[sys.argv.index("--") + 1:]))